@@ -0,0 +1,110 @@
+"""Alias autocomplete latency: in-memory search index vs the previous SQL LIKE scan.
+
+Usage: python -m benchmarks.bench_autocomplete [--aliases N] [--queries N]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from core.search import AliasSearchIndex, choseong
+
+_SYLLABLES = "가나다라마바사아자차카타파하제트소바세이지레이나킬조이브림스카이네온"
+_LATIN = "abcdefghijklmnopqrstuvwxyz"
+
+
+def _aliases(count: int, rng: random.Random) -> List[Dict[str, str]]:
+    records = []
+    for i in range(count):
+        if i % 2:
+            alias = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 5))) + str(i)
+        else:
+            alias = "".join(rng.choice(_LATIN) for _ in range(rng.randint(4, 10))) + str(i)
+        name = "".join(rng.choice(_LATIN) for _ in range(rng.randint(3, 12)))
+        tag = "".join(rng.choice(_LATIN + "0123456789") for _ in range(rng.randint(3, 5)))
+        records.append({"alias": alias, "alias_norm": alias.lower(), "name": name, "tag": tag})
+    records.sort(key=lambda r: r["alias"].lower())
+    return records
+
+
+def _queries(records: List[Dict[str, str]], count: int, rng: random.Random) -> Dict[str, List[str]]:
+    picks = [rng.choice(records)["alias_norm"] for _ in range(count)]
+    return {
+        "prefix": [p[: rng.randint(1, 3)] for p in picks],
+        "substring": [p[1:4] for p in picks],
+        "choseong": [choseong(p)[:2] for p in picks],
+        "miss": ["zzqx"] * count,
+    }
+
+
+def _like_search(conn: sqlite3.Connection) -> Callable[[str], object]:
+    # The query search_aliases ran on every keystroke before the index existed.
+    def run(query: str) -> object:
+        like = f"%{query}%"
+        return conn.execute(
+            """
+            SELECT alias, alias_norm, name, tag FROM aliases
+            WHERE alias_norm LIKE ? OR LOWER(name) LIKE ? OR LOWER(tag) LIKE ?
+            ORDER BY alias COLLATE NOCASE
+            LIMIT 25
+            """,
+            (like, like, like),
+        ).fetchall()
+
+    return run
+
+
+def _percentiles(fn: Callable[[str], object], queries: List[str]) -> Dict[str, float]:
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - started) * 1e3)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "max": samples[-1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--aliases", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    records = _aliases(args.aliases, rng)
+
+    started = time.perf_counter()
+    index = AliasSearchIndex(records)
+    build_ms = (time.perf_counter() - started) * 1e3
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE aliases (alias TEXT, alias_norm TEXT, name TEXT, tag TEXT)")
+    conn.executemany(
+        "INSERT INTO aliases VALUES (?, ?, ?, ?)",
+        [(r["alias"], r["alias_norm"], r["name"], r["tag"]) for r in records],
+    )
+    like = _like_search(conn)
+
+    print(f"{args.aliases} aliases, index built in {build_ms:.0f} ms")
+    print(f"{'query':<12}{'index p50':>11}{'p99':>9}{'max':>9}{'LIKE p50':>11}{'p99':>9}{'max':>9}   (ms)")
+    for kind, queries in _queries(records, args.queries, rng).items():
+        ours = _percentiles(lambda q: index.search(q, 25), queries)
+        # LIKE can't answer 초성 queries at all, but it still scans the table for them
+        theirs = _percentiles(like, queries[: max(1, len(queries) // 10)])
+        print(
+            f"{kind:<12}{ours['p50']:>11.3f}{ours['p99']:>9.3f}{ours['max']:>9.3f}"
+            f"{theirs['p50']:>11.3f}{theirs['p99']:>9.3f}{theirs['max']:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Compare per-call SQLite connections with the pooled connection in core.store.
+
+Usage: python -m benchmarks.bench_store [--aliases N] [--iterations N]
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from core import store
+
+# alias reads are served from memory now, so these run the queries directly
+_ALIAS_BY_KEY = f"SELECT {store._ALIAS_COLUMNS} FROM aliases WHERE alias_norm = ?"
+_ALIAS_LIKE = f"""
+    SELECT {store._ALIAS_COLUMNS}
+    FROM aliases
+    WHERE alias_norm LIKE ? OR LOWER(name) LIKE ? OR LOWER(tag) LIKE ?
+    ORDER BY alias COLLATE NOCASE
+    LIMIT 25
+"""
+
+
+class _PerCallConnection(sqlite3.Connection):
+    # closed as soon as its ``with`` block commits, like the old per-call helper
+    def __exit__(self, *exc_info: Any) -> Any:
+        try:
+            return super().__exit__(*exc_info)
+        finally:
+            self.close()
+
+
+_per_call_conns: List[sqlite3.Connection] = []
+
+
+def _per_call_connect() -> sqlite3.Connection:
+    # The previous behaviour: a fresh rollback-journal connection per query.
+    conn = sqlite3.connect(store.DB_FILE, factory=_PerCallConnection)
+    conn.row_factory = sqlite3.Row
+    _per_call_conns.append(conn)
+    return conn
+
+
+def _close_per_call() -> None:
+    # store helpers that don't use ``with`` leave theirs open until here
+    while _per_call_conns:
+        _per_call_conns.pop().close()
+
+
+def _query(sql: str, *params: Any) -> List[sqlite3.Row]:
+    with store._connect() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def _sample_match(index: int, puuid: str) -> dict:
+    return {
+        "metadata": {"matchid": f"bench-{index}", "map": "Ascent", "mode": "Competitive"},
+        "players": {
+            "all_players": [
+                {"puuid": puuid, "team": "Red", "stats": {"kills": 10, "deaths": 8, "assists": 5}}
+            ]
+        },
+        "teams": {"red": {"has_won": True, "rounds_won": 13}, "blue": {"has_won": False, "rounds_won": 7}},
+    }
+
+
+def _time(fn: Callable[[int], object], iterations: int) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def _run(label: str, aliases: int, iterations: int) -> Dict[str, float]:
+    ops: Dict[str, Callable[[int], object]] = {
+        "alias_by_key": lambda i: _query(_ALIAS_BY_KEY, f"alias{i % aliases}"),
+        "alias_like": lambda i: _query(_ALIAS_LIKE, *[f"%as{i % 10}%"] * 3),
+        "store_match_batch": lambda i: store.store_match_batch(
+            f"alias:{label}", "bench-puuid", [_sample_match(i, "bench-puuid")]
+        ),
+    }
+    return {name: _time(fn, iterations) for name, fn in ops.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--aliases", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    original_db, original_connect = store.DB_FILE, store._connect
+    with tempfile.TemporaryDirectory() as tmp:
+        store.DB_FILE = Path(tmp) / "bench.sqlite3"
+        try:
+            store._ensure_schema()
+            for i in range(args.aliases):
+                store.upsert_alias(f"alias{i}", f"name{i}", f"tag{i}", "ap", f"puuid-{i}")
+
+            store.close_db()
+            store._connect = _per_call_connect
+            try:
+                per_call = _run("per_call", args.aliases, args.iterations)
+            finally:
+                _close_per_call()
+
+            store._connect = original_connect
+            pooled = _run("pooled", args.aliases, args.iterations)
+        finally:
+            store._connect = original_connect
+            store.close_db()
+            store.DB_FILE = original_db
+
+    print(f"{'operation':<20}{'per-call us':>14}{'pooled us':>12}{'speedup':>10}")
+    for name in per_call:
+        print(f"{name:<20}{per_call[name]:>14.1f}{pooled[name]:>12.1f}{per_call[name] / pooled[name]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
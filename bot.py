@@ -7,6 +7,8 @@ from discord import app_commands
 from discord.ext import commands
 from core.config import DISCORD_TOKEN, LOG_LEVEL, GUILD_ID, LOG_FILE
 from core.http import close_session
+from core.ingest import match_ingest
+from core import db, store
 
 
 def _resolve_log_level(name: str) -> int:
@@ -55,6 +57,7 @@ COGS = [
     "cogs.agent",
     "cogs.admin",
     "cogs.alerts",
+    "cogs.maintenance",
 ]
 
 
@@ -118,6 +121,8 @@ async def on_ready():
 async def main():
     if not DISCORD_TOKEN:
         raise SystemExit("DISCORD_TOKEN is missing in .env")
+    await db.run_write(store.migrate)
+    await db.run_read(store.alias_registry.refresh)
     # load cogs
     for ext in COGS:
         try:
@@ -134,6 +139,8 @@ async def main():
                 await bot.close()
         finally:
             await close_session()
+            await match_ingest.close()
+            await db.shutdown()
 
 
 if __name__ == "__main__":
@@ -1,9 +1,18 @@
+from typing import Optional
+
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 from core.config import GUILD_ID
-from core.store import set_alert_channel, remove_alert_channel, get_alert_channel
+from core.http import upstream_stats
+from core.db import (
+    get_alert_channel,
+    match_storage_stats,
+    rebuild_summaries,
+    remove_alert_channel,
+    set_alert_channel,
+)
 
 
 class AdminCog(commands.Cog):
@@ -35,6 +44,59 @@ class AdminCog(commands.Cog):
         except Exception as e:
             await inter.followup.send(f"Resync error: {e}", ephemeral=True)
 
+    @app_commands.command(name="봇상태", description="API 요청 대기열과 캐시 상태를 확인합니다 (관리자 전용).")
+    async def status(self, inter: discord.Interaction):
+        app = await self.bot.application_info()
+        if inter.user.id != app.owner.id:
+            await inter.response.send_message("권한이 없습니다.", ephemeral=True)
+            return
+
+        stats = upstream_stats()
+        lines = [
+            f"Circuit: {stats['circuit']}",
+            f"Tokens: {stats['tokens']:.1f}/{stats['limit']}",
+        ]
+        for name, queue in stats["queues"].items():
+            lines.append(
+                f"{name}: depth={queue['depth']} granted={queue['granted']} "
+                f"wait avg={queue['wait_avg']:.2f}s max={queue['wait_max']:.2f}s"
+            )
+        cache = stats["cache"]
+        lines.append(
+            f"Cache: {cache['entries']} entries / {cache['bytes'] // 1024} KiB, "
+            f"hits mem={cache['memory_hits']} disk={cache['disk_hits']} stale={cache['stale_hits']}, "
+            f"misses={cache['misses']}"
+        )
+        storage = await match_storage_stats()
+        lines.append(
+            f"Match blobs: {storage['blobs']} for {storage['rows']} rows, "
+            f"{storage['stored_bytes'] // 1024} KiB stored / {storage['saved_bytes'] // 1024} KiB saved"
+        )
+        alerts = self.bot.get_cog("AlertCog")
+        if alerts is not None and alerts.metrics["sweeps"]:
+            m = alerts.metrics
+            lines.append(
+                f"Alert sweep: {m['last_polled']}/{len(alerts.schedule)} players due, {m['last_duration']:.1f}s, "
+                f"downloads={m['last_downloads']} alerts={m['last_alerts']} errors={m['last_errors']} "
+                f"skipped={m['last_skipped']}, sweeps={m['sweeps']} overlaps={m['overlaps']}"
+            )
+        await inter.response.send_message("```\n" + "\n".join(lines) + "\n```", ephemeral=True)
+
+    @app_commands.command(name="요약재계산", description="저장된 경기로 일별/액트 요약을 다시 계산합니다 (관리자 전용).")
+    @app_commands.describe(alias="특정 별명만 다시 계산 (비우면 전체)")
+    async def rebuild_summaries_cmd(self, inter: discord.Interaction, alias: Optional[str] = None):
+        app = await self.bot.application_info()
+        if inter.user.id != app.owner.id:
+            await inter.response.send_message("권한이 없습니다.", ephemeral=True)
+            return
+
+        await inter.response.defer(ephemeral=True)
+        owner_key = f"alias:{alias.strip().lower()}" if alias and alias.strip() else None
+        counts = await rebuild_summaries(owner_key)
+        await inter.followup.send(
+            f"요약을 다시 계산했습니다: 일별 {counts['daily']}건, 액트 {counts['acts']}건", ephemeral=True
+        )
+
     @app_commands.command(name="알림채널설정", description="실시간 경기 알림을 게시할 채널을 설정합니다.")
     @app_commands.describe(channel="알림을 보낼 텍스트 채널")
     @app_commands.guild_only()
@@ -42,7 +104,7 @@ class AdminCog(commands.Cog):
         if not inter.user.guild_permissions.manage_guild:
             await inter.response.send_message("이 명령을 실행하려면 서버 관리 권한이 필요합니다.", ephemeral=True)
             return
-        set_alert_channel(inter.guild_id, channel.id)
+        await set_alert_channel(inter.guild_id, channel.id)
         await inter.response.send_message(
             f"실시간 경기 알림 채널이 {channel.mention} 으로 설정되었습니다.", ephemeral=True
         )
@@ -54,12 +116,12 @@ class AdminCog(commands.Cog):
             await inter.response.send_message("이 명령을 실행하려면 서버 관리 권한이 필요합니다.", ephemeral=True)
             return
 
-        existing = get_alert_channel(inter.guild_id)
+        existing = await get_alert_channel(inter.guild_id)
         if existing is None:
             await inter.response.send_message("등록된 알림 채널이 없습니다.", ephemeral=True)
             return
 
-        remove_alert_channel(inter.guild_id)
+        await remove_alert_channel(inter.guild_id)
         await inter.response.send_message("실시간 경기 알림 채널 설정이 해제되었습니다.", ephemeral=True)
 
 
@@ -1,184 +1,443 @@
 import asyncio
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import discord
 from discord.ext import commands, tasks
 
-from core.config import HENRIK_BASE
-from core.http import http_get
-from core.store import (
+from core.config import (
+    ALERT_CHANNEL_RETRY,
+    ALERT_INGEST_TIMEOUT,
+    ALERT_POLL_CONCURRENCY,
+    ALERT_POLL_INTERVAL,
+    ALERT_POLL_MAX_INTERVAL,
+    ALERT_POLL_MIN_INTERVAL,
+    ALERT_SEND_CONCURRENCY,
+    HENRIK_BASE,
+    SUMMARY_UTC_OFFSET_HOURS,
+)
+from core.api import fetch_match, latest_match_id
+from core.http import HTTPStatusError, Priority, http_get, request_priority, upstream_available
+from core.ingest import match_ingest
+from core.models import Match, parse_matches
+from core.poll import PollSchedule, poll_key
+from core.db import (
     list_aliases,
-    latest_match,
-    store_match_batch,
     list_alert_channels,
+    load_poll_state,
 )
-from core.utils import clean_text, metadata_label, q, team_outcome_from_entry, team_result
+from core.utils import clean_text, q
 
 
 log = logging.getLogger(__name__)
 
+_RESULT_LABELS = {"win": "승리", "loss": "패배"}
+# at most this many aliases are named in a combined alert's title
+_TITLE_NAMES = 3
+# a newly seen match, its payload (kept for storing), and the poll keys that found it
+_Found = Tuple[Match, Dict[str, Any], Set[str]]
+# (keys, advanced, submitted) of a match queued by _queue_announcement
+_Queued = Tuple[List[str], Set[str], List["asyncio.Future[int]"]]
+
+
+def _owner_key(entry: Dict[str, Any]) -> str:
+    return f"alias:{entry['alias_norm']}"
 
-def _find_player(
-    all_players: List[Dict[str, Any]],
-    *,
-    puuid: Optional[str],
-    name: Optional[str] = None,
-    tag: Optional[str] = None,
-):
-    puuid_norm = clean_text(puuid).lower() if puuid else ""
-    if puuid_norm:
-        for player in all_players:
-            candidate = clean_text(player.get("puuid")).lower()
-            if candidate and candidate == puuid_norm:
-                return player
-
-    name_norm = clean_text(name).lower()
-    tag_norm = clean_text(tag).upper()
-    if name_norm and tag_norm:
-        for player in all_players:
-            player_name = clean_text(
-                player.get("game_name")
-                or player.get("gameName")
-                or player.get("name")
-            ).lower()
-            player_tag = clean_text(
-                player.get("tag_line")
-                or player.get("tagLine")
-                or player.get("tag")
-            ).upper()
-            if player_name == name_norm and player_tag == tag_norm:
-                return player
-
-    return None
+
+def _alias_names(entries: List[Dict[str, Any]]) -> str:
+    return " / ".join(entry["alias"] for entry in entries)
 
 
 class AlertCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self._last_seen: Dict[str, str] = {}
+        # matches whose rows weren't confirmed stored in time; alerted on retry even if already persisted
+        self._unannounced: Set[str] = set()
         self._bootstrapped = False
+        self._sweep_task: Optional[asyncio.Task] = None
+        # resolved alert channels, and channel id -> (retry at, route ts) for
+        # ones that were missing or forbidden; a re-set route is retried at once
+        self._channels: Dict[int, discord.abc.Messageable] = {}
+        self._unreachable: Dict[int, Tuple[float, int]] = {}
+        self._channel_locks: Dict[int, asyncio.Lock] = {}
+        self._send_slots = asyncio.Semaphore(ALERT_SEND_CONCURRENCY)
+        self.schedule = PollSchedule(
+            ALERT_POLL_MIN_INTERVAL, ALERT_POLL_MAX_INTERVAL, utc_offset_hours=SUMMARY_UTC_OFFSET_HOURS
+        )
+        self.metrics: Dict[str, Any] = {
+            "sweeps": 0,
+            "overlaps": 0,
+            "alerts": 0,
+            "downloads": 0,
+            "last_started": None,
+            "last_duration": None,
+            "last_polled": 0,
+            "last_errors": 0,
+            "last_skipped": 0,
+            "last_alerts": 0,
+            "last_downloads": 0,
+        }
         self.poll_matches.start()
 
     def cog_unload(self) -> None:
         self.poll_matches.cancel()
-
-    def _bootstrap_last_seen(self) -> None:
-        for record in list_aliases():
-            owner_key = f"alias:{record['alias_norm']}"
-            latest = latest_match(owner_key)
-            if latest and latest.get("match_id"):
-                self._last_seen[owner_key] = latest["match_id"]
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+
+    async def _restore_cursors(self) -> None:
+        """Load every player's saved poll cursor in one query."""
+        cursors = await load_poll_state()
+        restored = 0
+        for key in {poll_key(entry) for entry in await list_aliases()}:
+            cursor = cursors.get(key)
+            if cursor is None:
+                self.schedule.add(key, stagger=True)
+                continue
+            if cursor["last_match_id"]:
+                self._last_seen[key] = cursor["last_match_id"]
+            self.schedule.add(
+                key,
+                cursor["last_played_at"],
+                misses=cursor["misses"],
+                due=cursor["next_due_at"],
+                stagger=True,
+            )
+            restored += 1
         self._bootstrapped = True
-        log.info("[ALERT] Bootstrapped last seen matches for %s aliases", len(self._last_seen))
+        log.info("[ALERT] Restored poll cursors for %s of %s players", restored, len(self.schedule))
+
+    def _save_cursor(
+        self, key: str, *, last_match_id: Optional[str] = None, polled_at: Optional[float] = None
+    ) -> None:
+        last_played, misses, due = self.schedule.state(key)
+        last_match_id = last_match_id or self._last_seen.get(key)
+        match_ingest.save_cursor(key, last_match_id, last_played, misses, polled_at, due)
 
-    @tasks.loop(minutes=5)
+    @tasks.loop(seconds=ALERT_POLL_INTERVAL)
     async def poll_matches(self) -> None:
         await self.bot.wait_until_ready()
 
-        if not self._bootstrapped:
-            self._bootstrap_last_seen()
-
-        aliases = list_aliases()
-        if not aliases:
+        if self._sweep_task is not None and not self._sweep_task.done():
+            # never stack sweeps; anything that comes due meanwhile waits for the next tick
+            self.metrics["overlaps"] += 1
+            log.warning("[ALERT] Previous sweep still running after %.0fs, skipping this tick", ALERT_POLL_INTERVAL)
             return
+        self._sweep_task = asyncio.create_task(self._sweep())
 
-        for entry in aliases:
-            owner_key = f"alias:{entry['alias_norm']}"
-            try:
-                await self._process_alias(entry, owner_key)
-            except Exception:
-                log.exception("[ALERT] Failed to process alias %s", owner_key)
-            await asyncio.sleep(1)
-
-    async def _process_alias(self, entry: Dict[str, Any], owner_key: str) -> None:
-        name = entry["name"]
-        tag = entry["tag"]
-        region = entry.get("region", "ap")
-        puuid = entry.get("puuid")
-
-        params = {"size": "1"}
-        data = await http_get(f"{HENRIK_BASE}/v3/matches/{region}/{q(name)}/{q(tag)}", params=params)
-        matches = data.get("data") or []
-        if not matches:
+    async def _sweep(self) -> None:
+        if not self._bootstrapped:
+            await self._restore_cursors()
+
+        players: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in await list_aliases():
+            players.setdefault(poll_key(entry), []).append(entry)
+        self._sync_schedule(players)
+        due = self.schedule.pop_due()
+        if not due:
             return
 
-        match = matches[0]
-        match_id = self._match_id(match)
-        if not match_id:
-            return
+        started = time.monotonic()
+        alerts_before = self.metrics["alerts"]
+        downloads_before = self.metrics["downloads"]
+        pending: asyncio.Queue = asyncio.Queue()
+        for key in due:
+            pending.put_nowait(key)
+        counts = {"errors": 0, "skipped": 0}
+        # teammates polled in the same sweep share one entry and one alert
+        found: Dict[str, _Found] = {}
+
+        async def worker() -> None:
+            while True:
+                try:
+                    key = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if not upstream_available():
+                    counts["skipped"] += 1
+                    self.schedule.defer(key, time.time())
+                    continue
+                seen: Optional[Match] = None
+                try:
+                    seen = await self._poll_player(key, players[key], found)
+                except Exception:
+                    counts["errors"] += 1
+                    log.exception("[ALERT] Failed to poll %s", key)
+                finally:
+                    last_played = (seen.game_start or time.time()) if seen is not None else None
+                    self.schedule.record(key, last_played=last_played)
+                    if seen is None:
+                        # a new match's cursor is saved together with the match in _announce
+                        self._save_cursor(key, polled_at=time.time())
+
+        # Polling only gets the quota left over by interactive commands; the
+        # request scheduler paces the workers, the pool size only bounds how
+        # many players wait on it at once.
+        with request_priority(Priority.BACKGROUND):
+            workers = [asyncio.create_task(worker()) for _ in range(min(ALERT_POLL_CONCURRENCY, len(due)))]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+
+        # every new match is queued first and written in one flush, rather
+        # than each announcement waiting out the ingest timer in turn
+        queued = [
+            (match, self._queue_announcement(match, payload, polled_by, players))
+            for match, payload, polled_by in found.values()
+        ]
+        if queued:
+            await match_ingest.flush()
+        results = await asyncio.gather(
+            *(self._deliver_announcement(match, *announcement, players) for match, announcement in queued),
+            return_exceptions=True,
+        )
+        for (match, _), result in zip(queued, results):
+            if isinstance(result, BaseException):
+                counts["errors"] += 1
+                log.error("[ALERT] Failed to announce match %s", match.match_id, exc_info=result)
+
+        duration = time.monotonic() - started
+        self.metrics.update(
+            sweeps=self.metrics["sweeps"] + 1,
+            last_started=time.time() - duration,
+            last_duration=duration,
+            last_polled=len(due),
+            last_errors=counts["errors"],
+            last_skipped=counts["skipped"],
+            last_alerts=self.metrics["alerts"] - alerts_before,
+            last_downloads=self.metrics["downloads"] - downloads_before,
+        )
+        if counts["skipped"]:
+            log.warning("[ALERT] Valorant API circuit open, deferred %s players this sweep", counts["skipped"])
+        log.info(
+            "[ALERT] Polled %s of %s players in %.1fs (%s new matches, %s downloaded, %s alerts, %s errors)",
+            len(due),
+            len(players),
+            duration,
+            len(found),
+            self.metrics["last_downloads"],
+            self.metrics["last_alerts"],
+            counts["errors"],
+        )
 
-        if self._last_seen.get(owner_key) == match_id:
-            return
+    def _sync_schedule(self, players: Dict[str, List[Dict[str, Any]]]) -> None:
+        for key in list(self.schedule.keys()):
+            if key not in players:
+                self.schedule.discard(key)
+                self._last_seen.pop(key, None)
+        for key in players:
+            if key not in self.schedule:
+                # registered since the last tick: poll right away
+                self.schedule.add(key)
+
+    async def _fetch_latest(self, entry: Dict[str, Any]) -> Optional[Tuple[Match, Dict[str, Any]]]:
+        """The player's newest match and its payload; used when the cheap probe isn't available."""
+        region = entry.get("region", "ap")
+        puuid = clean_text(entry.get("puuid"))
+        if puuid:
+            url = f"{HENRIK_BASE}/v3/by-puuid/matches/{region}/{q(puuid)}"
+        else:
+            url = f"{HENRIK_BASE}/v3/matches/{region}/{q(entry['name'])}/{q(entry['tag'])}"
+        data = await http_get(url, params={"size": "1"})
+        payloads = [p for p in data.get("data") or () if isinstance(p, dict)]
+        matches = parse_matches(payloads[:1])
+        if not matches or not matches[0].match_id:
+            return None
+        return matches[0], payloads[0]
+
+    async def _poll_player(
+        self, key: str, entries: List[Dict[str, Any]], found: Dict[str, _Found]
+    ) -> Optional[Match]:
+        """Check one player; returns their newest match when it hadn't been seen before.
+
+        Only the newest match id is asked for first; the full payload is
+        downloaded when that id is new, and once per sweep for teammates.
+        Without an id from the probe the newest full match is fetched instead.
+        The match only counts as seen once :meth:`_announce` has stored it.
+        """
+        entry = entries[0]
+        fetched: Optional[Tuple[Match, Dict[str, Any]]] = None
+        try:
+            latest_id = await latest_match_id(
+                entry.get("region", "ap"),
+                puuid=clean_text(entry.get("puuid")) or None,
+                name=entry["name"],
+                tag=entry["tag"],
+            )
+        except HTTPStatusError as err:
+            log.debug("[ALERT] Stored-matches probe failed for %s (%s); fetching the full match", key, err.status)
+            latest_id = None
+        if latest_id is None:
+            # an error, or a player the stored-matches index doesn't list (yet)
+            self.metrics["downloads"] += 1
+            fetched = await self._fetch_latest(entry)
+            if fetched is None:
+                return None
+            latest_id = fetched[0].match_id
+
+        if self._last_seen.get(key) == latest_id:
+            for entry in entries:
+                match_ingest.mark_checked(_owner_key(entry))
+            return None
 
-        stored = store_match_batch(owner_key, puuid, [match])
-        if stored == 0:
-            # store_match_batch returns the number of newly inserted rows; zero means this match was already persisted.
-            self._last_seen[owner_key] = match_id
+        if fetched is None:
+            shared = found.get(latest_id)
+            if shared is not None:
+                fetched = shared[0], shared[1]
+            else:
+                self.metrics["downloads"] += 1
+                fetched = await fetch_match(latest_id)
+            if fetched is None:
+                return None
+
+        match, payload = fetched
+        found.setdefault(match.match_id, (match, payload, set()))[2].add(key)
+        return match
+
+    async def _announce(
+        self,
+        match: Match,
+        payload: Dict[str, Any],
+        polled_by: Set[str],
+        players: Dict[str, List[Dict[str, Any]]],
+    ) -> None:
+        """Store a newly seen match for every registered player in it and post one alert."""
+        announcement = self._queue_announcement(match, payload, polled_by, players)
+        await self._deliver_announcement(match, *announcement, players)
+
+    def _queue_announcement(
+        self,
+        match: Match,
+        payload: Dict[str, Any],
+        polled_by: Set[str],
+        players: Dict[str, List[Dict[str, Any]]],
+    ) -> _Queued:
+        """Queue the match rows and poller cursors of every registered player in ``match``."""
+        keys = sorted(polled_by)
+        for player in match.players:
+            key = f"puuid:{player.puuid.lower()}" if player.puuid else None
+            if key in players and key not in polled_by:
+                keys.append(key)
+
+        game_start = match.game_start or time.time()
+        advanced = set(polled_by)
+        for key in keys:
+            if key in polled_by:
+                continue
+            # teammates learn about the match here instead of from their own poll
+            if (self.schedule.last_played(key) or 0) <= game_start:
+                advanced.add(key)
+                self.schedule.record(key, last_played=game_start)
+
+        submitted = [
+            match_ingest.submit(
+                _owner_key(entry), entry.get("puuid"), [match], payloads=[payload], checked=key in polled_by
+            )
+            for key in keys
+            for entry in players[key]
+        ]
+        # queued before yielding, so the cursors land in the same flush as the rows
+        polled_at = time.time()
+        for key in keys:
+            self._save_cursor(
+                key,
+                last_match_id=match.match_id if key in advanced else None,
+                polled_at=polled_at if key in polled_by else None,
+            )
+        return keys, advanced, submitted
+
+    async def _deliver_announcement(
+        self,
+        match: Match,
+        keys: List[str],
+        advanced: Set[str],
+        submitted: List["asyncio.Future[int]"],
+        players: Dict[str, List[Dict[str, Any]]],
+    ) -> None:
+        """Wait for the queued rows and post the alert if the match is new."""
+        try:
+            stored = await asyncio.wait_for(asyncio.gather(*submitted), timeout=ALERT_INGEST_TIMEOUT)
+        except Exception:
+            # the rows stay queued and may land before the retry, which must still alert
+            self._unannounced.add(match.match_id)
+            raise
+        # only now is the match safely stored; until here a failure leaves it
+        # unseen so the next poll finds it again
+        for key in advanced:
+            self._last_seen[key] = match.match_id
+        if not any(stored) and match.match_id not in self._unannounced:
+            # submit resolves to the number of newly inserted rows; zero means this match was already persisted.
             return
+        self._unannounced.discard(match.match_id)
 
-        self._last_seen[owner_key] = match_id
-        embed = self._build_embed(entry, match, match_id)
+        embed = self._build_embed([players[key] for key in keys], match)
         await self._dispatch_alert(embed)
+        self.metrics["alerts"] += 1
 
-    def _match_id(self, match: Dict[str, Any]) -> Optional[str]:
-        metadata = match.get("metadata") or {}
-        return (
-            metadata.get("matchid")
-            or metadata.get("matchId")
-            or metadata.get("matchID")
-            or match.get("match_id")
-        )
-
-    def _build_embed(self, entry: Dict[str, Any], match: Dict[str, Any], match_id: str) -> discord.Embed:
-        metadata = match.get("metadata") or {}
-        map_name = metadata_label(metadata, "map")
-        mode_name = metadata_label(metadata, "mode")
-        started = metadata.get("game_start_patched") or metadata.get("game_start") or "Unknown"
-        player_stats, outcome = self._extract_player_stats(entry, match)
+    def _build_embed(self, participants: List[List[Dict[str, Any]]], match: Match) -> discord.Embed:
+        map_name = match.map or "?"
+        mode_name = match.mode or "?"
+        started = match.started_label or "Unknown"
+        lines = [(entries, *self._extract_player_stats(entries[0], match)) for entries in participants]
 
+        # a shared result colours the embed; players on opposite teams leave it grey
+        outcomes = {outcome for _, _, outcome in lines}
+        outcome = next(iter(outcomes)) if len(outcomes) == 1 else None
         color = discord.Color.from_rgb(149, 165, 166)  # default grey
-        result_label = "결과 정보 없음"
         if outcome == "win":
             color = discord.Color.from_rgb(46, 204, 113)
-            result_label = "승리"
         elif outcome == "loss":
             color = discord.Color.from_rgb(231, 76, 60)
-            result_label = "패배"
 
+        names = [_alias_names(entries) for entries in participants]
+        title = ", ".join(names[:_TITLE_NAMES])
+        if len(names) > _TITLE_NAMES:
+            title += f" 외 {len(names) - _TITLE_NAMES}명"
         embed = discord.Embed(
-            title=f"{entry['alias']} 최신 경기",
+            title=f"{title} 최신 경기",
             description=f"{map_name} · {mode_name}",
             color=color,
         )
-        embed.add_field(name="Riot ID", value=f"{entry['name']}#{entry['tag']}", inline=True)
-        embed.add_field(name="결과", value=result_label, inline=True)
-
-        if player_stats:
-            k = player_stats.get("kills", 0)
-            d = player_stats.get("deaths", 0)
-            a = player_stats.get("assists", 0)
-            embed.add_field(name="K/D/A", value=f"{k}/{d}/{a}", inline=True)
 
-        rounds = self._round_score(match, outcome)
+        if len(lines) == 1:
+            entries, player_stats, _ = lines[0]
+            embed.add_field(name="Riot ID", value=f"{entries[0]['name']}#{entries[0]['tag']}", inline=True)
+            embed.add_field(name="결과", value=_RESULT_LABELS.get(outcome, "결과 정보 없음"), inline=True)
+            if player_stats:
+                k = player_stats.get("kills", 0)
+                d = player_stats.get("deaths", 0)
+                a = player_stats.get("assists", 0)
+                embed.add_field(name="K/D/A", value=f"{k}/{d}/{a}", inline=True)
+        else:
+            for entries, player_stats, own in lines:
+                value = f"{entries[0]['name']}#{entries[0]['tag']} · {_RESULT_LABELS.get(own, '결과 정보 없음')}"
+                if player_stats:
+                    k = player_stats.get("kills", 0)
+                    d = player_stats.get("deaths", 0)
+                    a = player_stats.get("assists", 0)
+                    value += f"\nK/D/A {k}/{d}/{a}"
+                embed.add_field(name=_alias_names(entries), value=value, inline=True)
+
+        rounds = self._round_score(match, lines[0][2])
         if rounds:
             embed.add_field(name="라운드 스코어", value=rounds, inline=True)
 
         embed.set_footer(text=f"경기 시작: {started}")
         embed.timestamp = discord.utils.utcnow()
-        embed.url = f"https://tracker.gg/valorant/match/{match_id}"
+        embed.url = f"https://tracker.gg/valorant/match/{match.match_id}"
         return embed
 
     def _extract_player_stats(
-        self, entry: Dict[str, Any], match: Dict[str, Any]
+        self, entry: Dict[str, Any], match: Match
     ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         puuid = entry.get("puuid")
         if not puuid and not entry.get("name"):
             return None, None
 
-        players = (match.get("players") or {}).get("all_players") or []
-        me = _find_player(
-            players,
+        me = match.find_player(
             puuid=puuid,
             name=entry.get("name"),
             tag=entry.get("tag"),
@@ -186,63 +445,97 @@ class AlertCog(commands.Cog):
         if me is None:
             return None, None
 
-        team = me.get("team")
-        outcome = None
-        result_flag = team_result(match.get("teams"), team)
-        if result_flag is True:
-            outcome = "win"
-        elif result_flag is False:
-            outcome = "loss"
-
-        return me.get("stats") or {}, outcome
-
-    def _round_score(self, match: Dict[str, Any], outcome: Optional[str]) -> Optional[str]:
-        teams = match.get("teams")
-        if not isinstance(teams, dict):
-            return None
+        return me.stats(), match.outcome(me)
 
+    def _round_score(self, match: Match, outcome: Optional[str]) -> Optional[str]:
         scores: List[str] = []
-        for name, info in teams.items():
-            if not isinstance(info, dict):
-                continue
-            rounds_won = info.get("rounds_won")
-            if rounds_won is None:
+        for team in match.teams.values():
+            if team.rounds_won is None:
                 continue
-            has_won = team_outcome_from_entry(info)
-            label = name.title()
-            if has_won is True:
+            label = team.name.title()
+            if team.won is True:
                 label = "우리 팀" if outcome == "win" else "상대 팀"
-            elif has_won is False:
+            elif team.won is False:
                 label = "우리 팀" if outcome == "loss" else "상대 팀"
-            scores.append(f"{label}: {rounds_won}")
+            scores.append(f"{label}: {team.rounds_won}")
         return "\n".join(scores) if scores else None
 
     async def _dispatch_alert(self, embed: discord.Embed) -> None:
-        targets = list_alert_channels()
+        targets = await list_alert_channels()
         if not targets:
             return
+        # each channel gets its sends in order; the slowest channel bounds delivery
+        await asyncio.gather(*(self._send_alert(route, embed) for route in targets))
 
-        for entry in targets:
-            guild = self.bot.get_guild(entry["guild_id"])
-            if not guild:
-                continue
-            channel = guild.get_channel(entry["channel_id"])
-            if channel is None:
-                try:
-                    channel = await guild.fetch_channel(entry["channel_id"])
-                except (discord.Forbidden, discord.HTTPException):
-                    continue
-            if not isinstance(channel, (discord.TextChannel, discord.Thread)):
-                continue
+    async def _send_alert(self, route: Dict[str, Any], embed: discord.Embed) -> None:
+        channel = await self._resolve_channel(route)
+        if channel is None:
+            return
+        channel_id = route["channel_id"]
+        lock = self._channel_locks.setdefault(channel_id, asyncio.Lock())
+        async with lock, self._send_slots:
             try:
                 await channel.send(embed=embed)
+            except (discord.Forbidden, discord.NotFound):
+                self._mark_unreachable(route)
+                log.warning(
+                    "[ALERT] Alert channel guild=%s channel=%s is gone or forbidden",
+                    route["guild_id"],
+                    channel_id,
+                )
             except discord.HTTPException:
                 log.exception(
                     "[ALERT] Failed to send alert to guild=%s channel=%s",
-                    entry["guild_id"],
-                    entry["channel_id"],
+                    route["guild_id"],
+                    channel_id,
                 )
 
+    async def _resolve_channel(self, route: Dict[str, Any]) -> Optional[discord.abc.Messageable]:
+        channel_id = route["channel_id"]
+        unreachable = self._unreachable.get(channel_id)
+        if unreachable is not None:
+            retry_at, route_ts = unreachable
+            if time.monotonic() < retry_at and route_ts == route.get("ts"):
+                return None
+            del self._unreachable[channel_id]
+
+        channel = self._channels.get(channel_id)
+        if channel is not None:
+            return channel
+
+        guild = self.bot.get_guild(route["guild_id"])
+        if not guild:
+            return None
+        channel = guild.get_channel(channel_id)
+        if channel is None:
+            try:
+                channel = await guild.fetch_channel(channel_id)
+            except (discord.Forbidden, discord.NotFound):
+                self._mark_unreachable(route)
+                return None
+            except discord.HTTPException:
+                return None
+        if not isinstance(channel, (discord.TextChannel, discord.Thread)):
+            self._mark_unreachable(route)
+            return None
+        self._channels[channel_id] = channel
+        return channel
+
+    def _mark_unreachable(self, route: Dict[str, Any]) -> None:
+        self._channels.pop(route["channel_id"], None)
+        self._unreachable[route["channel_id"]] = (time.monotonic() + ALERT_CHANNEL_RETRY, route.get("ts"))
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        self._channels.pop(channel.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(
+        self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel
+    ) -> None:
+        # permission changes may make a forbidden channel usable again
+        self._unreachable.pop(after.id, None)
+
 
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(AlertCog(bot))
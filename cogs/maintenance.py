@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from discord.ext import commands, tasks
+
+from core.config import (
+    DB_MAX_BYTES,
+    MAINTENANCE_INTERVAL,
+    PRUNE_BATCH_SIZE,
+    RETENTION_PAYLOAD_DAYS,
+    RETENTION_STATS_DAYS,
+    VACUUM_STEP_PAGES,
+)
+from core.db import (
+    database_size,
+    incremental_vacuum,
+    prune_http_cache,
+    prune_match_payloads,
+    prune_match_rows,
+    prune_oldest_matches,
+)
+
+
+log = logging.getLogger(__name__)
+
+DAY = 86400
+
+
+async def _drain(step: Callable[[], Awaitable[int]]) -> int:
+    """Run ``step`` until it reports nothing left, yielding between batches."""
+    total = 0
+    while True:
+        done = await step()
+        if not done:
+            return total
+        total += done
+        await asyncio.sleep(0)
+
+
+class MaintenanceCog(commands.Cog):
+    """Applies the retention policy and reclaims free pages in the background."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._vacuum_mode_checked = False
+        self.maintain.start()
+
+    def cog_unload(self) -> None:
+        self.maintain.cancel()
+
+    @tasks.loop(seconds=MAINTENANCE_INTERVAL)
+    async def maintain(self) -> None:
+        try:
+            await self.run_once()
+        except Exception:
+            log.exception("[MAINT] Maintenance run failed")
+
+    @maintain.before_loop
+    async def _before_maintain(self) -> None:
+        await self.bot.wait_until_ready()
+
+    async def run_once(self) -> None:
+        if not self._vacuum_mode_checked:
+            # the switch needs a full VACUUM, which would stall every write; it's left to an offline run
+            if (await database_size())["auto_vacuum"] != 2:
+                log.warning(
+                    "[MAINT] Free pages can't be reclaimed until incremental auto_vacuum is enabled; "
+                    "stop the bot and run `python migrate.py --enable-incremental-vacuum`"
+                )
+            self._vacuum_mode_checked = True
+
+        now = int(time.time())
+        removed = {"payloads": 0, "matches": 0, "http_cache": 0, "size_cap": 0}
+
+        if RETENTION_PAYLOAD_DAYS:
+            payload_cutoff = now - RETENTION_PAYLOAD_DAYS * DAY
+            removed["payloads"] = await _drain(lambda: prune_match_payloads(payload_cutoff, PRUNE_BATCH_SIZE))
+            removed["http_cache"] = await _drain(lambda: prune_http_cache(payload_cutoff, PRUNE_BATCH_SIZE))
+        if RETENTION_STATS_DAYS:
+            stats_cutoff = now - RETENTION_STATS_DAYS * DAY
+            removed["matches"] = await _drain(lambda: prune_match_rows(stats_cutoff, PRUNE_BATCH_SIZE))
+        if DB_MAX_BYTES:
+            while (await database_size())["used_bytes"] > DB_MAX_BYTES:
+                done = await prune_oldest_matches(PRUNE_BATCH_SIZE)
+                if not done:
+                    break
+                removed["size_cap"] += done
+                await asyncio.sleep(0)
+
+        freed = await _drain(lambda: incremental_vacuum(VACUUM_STEP_PAGES))
+        if any(removed.values()) or freed:
+            size = await database_size()
+            log.info(
+                "[MAINT] Pruned %s, freed %s pages; database now %s KiB",
+                removed,
+                freed,
+                size["file_bytes"] // 1024,
+            )
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(MaintenanceCog(bot))
@@ -1,5 +1,4 @@
-import logging
-from typing import Any, Dict, List, Optional
+from typing import List, Optional
 
 import discord
 from discord import app_commands
@@ -8,53 +7,21 @@ from discord.ext import commands
 
 from core.api import fetch_player_info
 from core.config import HENRIK_BASE
-from core.http import http_get
-from core.store import get_alias, search_aliases, store_match_batch
+from core.http import UpstreamError, http_get, is_stale
+from core.models import parse_matches
+from core.db import get_alias, recent_matches, search_aliases
+from core.ingest import match_ingest
 from core.utils import (
     ALIAS_REGISTRATION_PROMPT,
+    STALE_DATA_NOTICE,
     alias_display,
     check_cooldown,
     clean_text,
     format_exception_message,
     is_account_not_found_error,
-    metadata_label,
     q,
-    team_result,
 )
 
-def _find_player(
-    all_players: List[Dict[str, Any]],
-    *,
-    puuid: Optional[str],
-    name: str,
-    tag: str,
-):
-    puuid_norm = clean_text(puuid).lower() if puuid else ""
-    if puuid_norm:
-        for player in all_players:
-            candidate = clean_text(player.get("puuid")).lower()
-            if candidate and candidate == puuid_norm:
-                return player
-
-    name_norm = clean_text(name).lower()
-    tag_norm = clean_text(tag).upper()
-    if name_norm and tag_norm:
-        for player in all_players:
-            player_name = clean_text(
-                player.get("game_name")
-                or player.get("gameName")
-                or player.get("name")
-            ).lower()
-            player_tag = clean_text(
-                player.get("tag_line")
-                or player.get("tagLine")
-                or player.get("tag")
-            ).upper()
-            if player_name == name_norm and player_tag == tag_norm:
-                return player
-
-    return None
-
 
 class MatchesCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -103,7 +70,7 @@ class MatchesCog(commands.Cog):
             )
             return
 
-        alias_info = get_alias(alias_input)
+        alias_info = await get_alias(alias_input)
         if not alias_info:
             await inter.response.send_message(
                 f"`{alias_input}` 별명을 찾을 수 없습니다.", ephemeral=True
@@ -120,7 +87,9 @@ class MatchesCog(commands.Cog):
 
         await inter.response.defer()
         try:
-            info = await fetch_player_info(name, tag, region=region)
+            info = await fetch_player_info(
+                name, tag, region=region, puuid=alias_info.get("puuid")
+            )
             puuid = info["puuid"]
 
             params = {"size": str(count)}
@@ -129,46 +98,54 @@ class MatchesCog(commands.Cog):
             if map:
                 params["map"] = map
 
-            js = await http_get(
-                f"{HENRIK_BASE}/v3/matches/{region}/{q(name)}/{q(tag)}",
-                params=params,
-            )
-            matches = js.get("data") or []
+            stale = bool(info.get("stale"))
+            try:
+                js = await http_get(
+                    f"{HENRIK_BASE}/v3/matches/{region}/{q(name)}/{q(tag)}",
+                    params=params,
+                    allow_stale=True,
+                )
+                payloads = js.get("data")
+                matches = parse_matches(payloads)
+                fresh_matches = not is_stale(js)
+            except UpstreamError:
+                matches = parse_matches(
+                    await recent_matches(owner_key, count, mode=mode or None, map_name=map or None)
+                )
+                if not matches:
+                    raise
+                fresh_matches = False
+            stale = stale or not fresh_matches
             if not matches:
                 await inter.followup.send("최근 경기 기록이 없습니다.")
                 return
 
-            try:
-                store_match_batch(owner_key, puuid, matches)
-            except Exception as store_err:
-                logging.getLogger(__name__).warning(
-                    "Failed to persist match cache: %s", store_err, exc_info=True
-                )
+            if fresh_matches:
+                # written behind the response; the ingest queue logs failures
+                match_ingest.submit(owner_key, puuid, matches, payloads=payloads)
 
             lines = []
             for match in matches:
-                metadata = match.get("metadata") or {}
-                map_name = metadata_label(metadata, "map")
-                mode_name = metadata_label(metadata, "mode")
+                map_name = match.map or "?"
+                mode_name = match.mode or "?"
 
-                all_players = (match.get("players") or {}).get("all_players") or []
-                me = _find_player(all_players, puuid=puuid, name=name, tag=tag)
-                stats = (me or {}).get("stats") or {}
-                k = int(stats.get("kills") or 0)
-                d = int(stats.get("deaths") or 0)
-                a = int(stats.get("assists") or 0)
+                me = match.find_player(puuid=puuid, name=name, tag=tag)
+                k = me.kills if me else 0
+                d = me.deaths if me else 0
+                a = me.assists if me else 0
 
                 result = "?"
-                team = me.get("team") if me else None
-                outcome = team_result(match.get("teams"), team)
-                if outcome is True:
+                outcome = match.outcome(me)
+                if outcome == "win":
                     result = "승"
-                elif outcome is False:
+                elif outcome == "loss":
                     result = "패"
 
                 lines.append(f"{map_name} / {mode_name} · {result} · {k}/{d}/{a}")
 
             body = "**최근 경기 요약**\n" + "\n".join(f"- {line}" for line in lines)
+            if stale:
+                body += f"\n-# {STALE_DATA_NOTICE}"
             await inter.followup.send(body)
         except Exception as e:
             if is_account_not_found_error(e):
@@ -182,10 +159,10 @@ class MatchesCog(commands.Cog):
                     f"오류가 발생했습니다: {err}", ephemeral=True
                 )
 
-    def _alias_choices(
+    async def _alias_choices(
         self, query: Optional[str]
     ) -> List[app_commands.Choice[str]]:
-        records = search_aliases(query, limit=25)
+        records = await search_aliases(query, limit=25)
         return [
             app_commands.Choice(name=alias_display(rec), value=rec["alias"])
             for rec in records
@@ -195,7 +172,7 @@ class MatchesCog(commands.Cog):
     async def vmatches_target_autocomplete(
         self, inter: discord.Interaction, current: str
     ):
-        return self._alias_choices(current)
+        return await self._alias_choices(current)
 
 
 async def setup(bot: commands.Bot):
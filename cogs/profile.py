@@ -6,9 +6,10 @@ from discord.app_commands import locale_str
 from discord.ext import commands
 
 from core.api import fetch_player_info
-from core.store import get_alias, search_aliases
+from core.db import get_alias, search_aliases
 from core.utils import (
     ALIAS_REGISTRATION_PROMPT,
+    STALE_DATA_NOTICE,
     alias_display,
     check_cooldown,
     clean_text,
@@ -47,7 +48,7 @@ class ProfileCog(commands.Cog):
             )
             return
 
-        alias_info = get_alias(alias_input)
+        alias_info = await get_alias(alias_input)
         if not alias_info:
             await inter.response.send_message(
                 f"`{alias_input}` 별명을 찾을 수 없습니다.", ephemeral=True
@@ -60,7 +61,9 @@ class ProfileCog(commands.Cog):
 
         await inter.response.defer()
         try:
-            info = await fetch_player_info(name, tag, region=region)
+            info = await fetch_player_info(
+                name, tag, region=region, puuid=alias_info.get("puuid")
+            )
             data = info.get("account") or {}
             card = data.get("card", {}) or {}
             level = data.get("account_level", 0)
@@ -79,6 +82,8 @@ class ProfileCog(commands.Cog):
             embed.add_field(name="랭크", value=f"{tier} ({rr} RR)")
             if card.get("small"):
                 embed.set_thumbnail(url=card["small"])
+            if info.get("stale"):
+                embed.set_footer(text=STALE_DATA_NOTICE)
 
             await inter.followup.send(embed=embed)
         except Exception as e:
@@ -93,10 +98,10 @@ class ProfileCog(commands.Cog):
                     f"오류가 발생했습니다: {msg}", ephemeral=True
                 )
 
-    def _alias_choices(
+    async def _alias_choices(
         self, query: Optional[str]
     ) -> List[app_commands.Choice[str]]:
-        records = search_aliases(query, limit=25)
+        records = await search_aliases(query, limit=25)
         return [
             app_commands.Choice(name=alias_display(rec), value=rec["alias"])
             for rec in records
@@ -106,7 +111,7 @@ class ProfileCog(commands.Cog):
     async def vprofile_target_autocomplete(
         self, inter: discord.Interaction, current: str
     ):
-        return self._alias_choices(current)
+        return await self._alias_choices(current)
 
 
 async def setup(bot: commands.Bot):
@@ -9,7 +9,7 @@ from discord.ext import commands
 
 from core.config import HENRIK_BASE, TIERS_DIR
 from core.http import http_get
-from core.store import list_aliases, remove_alias, upsert_alias
+from core.db import list_aliases, remove_alias, upsert_alias
 from core.utils import (
     check_cooldown,
     clean_text,
@@ -87,7 +87,7 @@ class RegisterCog(commands.Cog):
             if not puuid:
                 raise RuntimeError("Puuid missing in HenrikDev response")
 
-            upsert_alias(alias, name, tag, region, puuid)
+            await upsert_alias(alias, name, tag, region, puuid)
             await inter.followup.send(
                 f"등록 완료: **{alias}** → **{name}#{tag}** ({region.upper()})", ephemeral=True
             )
@@ -121,7 +121,7 @@ class RegisterCog(commands.Cog):
             return
 
         await inter.response.defer(ephemeral=True)
-        removed = remove_alias(alias)
+        removed = await remove_alias(alias)
         if removed:
             await inter.followup.send(f"별명 **{alias}** 을(를) 삭제했습니다.", ephemeral=True)
         else:
@@ -138,45 +138,16 @@ class RegisterCog(commands.Cog):
             )
             return
 
-        records = list_aliases()
+        records = await list_aliases()
         if not records:
             await inter.response.send_message("등록된 별명이 없습니다.", ephemeral=True)
             return
 
         await inter.response.defer()
 
-        tier_tasks: Dict[Tuple[str, str, str], asyncio.Task] = {}
-        semaphore = asyncio.Semaphore(3)
-
-        async def fetch_tier_with_cache(record: Dict[str, Any]) -> Tuple[str, Optional[str]]:
-            key = (
-                record.get("region", "ap"),
-                record.get("name", ""),
-                record.get("tag", ""),
-            )
-            task = tier_tasks.get(key)
-            if task is None:
-                async def _task() -> Tuple[str, Optional[str]]:
-                    async with semaphore:
-                        return await self._fetch_tier(record)
-
-                task = asyncio.create_task(_task())
-                tier_tasks[key] = task
-            return await task
-
-        tier_results = await asyncio.gather(
-            *(fetch_tier_with_cache(rec) for rec in records)
-        )
-
-        embeds_payload: List[Tuple[discord.Embed, Optional[str]]] = []
-
-        tier_results = await asyncio.gather(
-            *(self._fetch_tier_with_semaphore(rec) for rec in records)
-        )
-        semaphore = asyncio.Semaphore(5)
-
+        # Duplicate Riot IDs are coalesced by http_get, so a plain gather is enough.
         async def fetch_tier(record: Dict[str, Any]) -> Tuple[str, Optional[str]]:
-            async with semaphore:
+            async with self._tier_fetch_semaphore:
                 try:
                     return await self._fetch_tier(record)
                 except Exception:
@@ -184,6 +155,7 @@ class RegisterCog(commands.Cog):
 
         tier_results = await asyncio.gather(*(fetch_tier(rec) for rec in records))
 
+        embeds_payload: List[Tuple[discord.Embed, Optional[str]]] = []
         for rec, (tier_name, image_url) in zip(records, tier_results):
             embed = discord.Embed(
                 description=f"**{rec['name']}#{rec['tag']}** ({rec['region'].upper()})",
@@ -205,10 +177,6 @@ class RegisterCog(commands.Cog):
 
         await self._send_alias_embeds(inter, embeds_payload)
 
-    async def _fetch_tier_with_semaphore(self, record: Dict[str, Any]) -> Tuple[str, Optional[str]]:
-        async with self._tier_fetch_semaphore:
-            return await self._fetch_tier(record)
-
     def _tier_cache_key(self, record: Dict[str, Any]) -> str:
         region = (record.get("region") or "ap").lower()
         name = (record.get("name") or "").lower()
@@ -250,17 +218,14 @@ class RegisterCog(commands.Cog):
                 result = (tier_name, image_url)
                 self._store_tier_cache(cache_key, result)
                 return result
-            except Exception as exc:
+            except Exception:
                 is_last_attempt = attempt == self._tier_fetch_retries - 1
                 if is_last_attempt:
                     break
 
-                error_text = str(exc)
-                backoff_delay = delay
-                if "429" in error_text:
-                    backoff_delay *= 2
-
-                await asyncio.sleep(backoff_delay)
+                # 429s are already absorbed by the shared limiter in core.http;
+                # this only smooths over transient upstream failures.
+                await asyncio.sleep(delay)
                 delay *= 2
 
         fallback = (TIER_NOT_FOUND_LABEL, None)
@@ -1,17 +1,23 @@
+import asyncio
 import logging
-from typing import List, Optional
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 import discord
 from discord import app_commands
 from discord.app_commands import locale_str
 from discord.ext import commands
 
-from core.api import fetch_player_info
-from core.config import HENRIK_BASE, TIERS_DIR
-from core.http import http_get
-from core.store import get_alias, search_aliases, store_match_batch
+from core.api import PlayerInfo, cached_player_info, fetch_player_info
+from core.config import HENRIK_BASE, SUMMARY_FRESH_SECONDS, TIERS_DIR
+from core.http import UpstreamError, http_get, is_stale
+from core.models import Match, match_id_of, parse_matches
+from core.db import fetch_summary_totals, get_alias, recent_matches, search_aliases
+from core.ingest import match_ingest
 from core.utils import (
     ALIAS_REGISTRATION_PROMPT,
+    CACHED_DATA_NOTICE,
+    STALE_DATA_NOTICE,
     alias_display,
     check_cooldown,
     clean_text,
@@ -20,10 +26,12 @@ from core.utils import (
     q,
     tier_key,
     trunc2,
-    team_result,
 )
 
 
+log = logging.getLogger(__name__)
+
+
 async def fetch_matches(
     region: str, name: str, tag: str, *, mode: Optional[str], size: int
 ) -> dict:
@@ -32,7 +40,109 @@ async def fetch_matches(
         "size": str(max(1, min(10, size))),
     }
     url = f"{HENRIK_BASE}/v3/matches/{region}/{q(name)}/{q(tag)}"
-    return await http_get(url, params=params)
+    return await http_get(url, params=params, allow_stale=True)
+
+
+class _SummaryView:
+    """Aggregated numbers behind one /최근전적요약 embed."""
+
+    def __init__(
+        self,
+        name: str,
+        info: PlayerInfo,
+        matches: List[Match],
+        *,
+        stale: bool,
+        cached: bool = False,
+        totals: Optional[Dict[str, Any]] = None,
+    ):
+        puuid = info["puuid"]
+        cur = info.get("current_mmr") or {}
+        self.name = name
+        self.tier_name = cur.get("currenttierpatched") or "Unrated"
+        self.rr = cur.get("ranking_in_tier", 0)
+        self.stale = stale
+        self.cached = cached
+        # stored daily/act rollups (see store.fetch_summary_totals)
+        self.totals = totals or {}
+
+        wins = losses = 0
+        tot_k = tot_d = 0
+        for match in matches:
+            me = match.player(puuid)
+            if not me:
+                continue
+
+            tot_k += me.kills
+            tot_d += me.deaths
+
+            outcome = match.outcome(me)
+            if outcome == "win":
+                wins += 1
+            elif outcome == "loss":
+                losses += 1
+
+        self.wins = wins
+        self.losses = losses
+        self.total = wins + losses
+        self.winrate = (wins / self.total * 100) if self.total else 0
+        self.kd = trunc2(tot_k / tot_d) if tot_d else float(tot_k)
+
+    @property
+    def signature(self) -> tuple:
+        return (self.tier_name, self.rr, self.wins, self.losses, self.kd, self.stale, self.cached)
+
+    @property
+    def tier_image(self) -> Optional[Path]:
+        img = TIERS_DIR / (tier_key(self.tier_name) + ".png")
+        return img if img.exists() else None
+
+    def embed(self) -> discord.Embed:
+        winrate, kd = self.winrate, self.kd
+        if winrate >= 50 and kd >= 1:
+            msg = "오~ 요즘 잘하고 있네"
+        elif winrate >= 50 and kd < 1:
+            msg = "오~ 승리엔 팀워크가!"
+        elif winrate <= 45 and kd >= 1:
+            msg = "혼자 고생하는 느낌이야"
+        elif winrate <= 45 and kd < 1:
+            msg = "연패는 이제 그만...!"
+        else:
+            msg = ""
+
+        desc = (
+            f"**{self.name}** 최근 경기 **{self.total}전**: **{self.wins}승 {self.losses}패** (**{winrate:.0f}%**)\n"
+            f"**KD : {kd:.2f}**"
+        )
+        if msg:
+            desc += f"\n**{msg}**"
+        rollups = [
+            f"{label} {row['wins']}승 {row['losses']}패"
+            for label, row in (("오늘", self.totals.get("today")), ("이번 액트", self.totals.get("act")))
+            if row
+        ]
+        if rollups:
+            desc += "\n" + " · ".join(rollups)
+        diff_block = f"\n```diff\n+ 승 {self.wins}\n- 패 {self.losses}\n```"
+
+        color = (
+            discord.Color.from_rgb(46, 204, 113)
+            if winrate >= 55
+            else discord.Color.from_rgb(241, 196, 15)
+            if winrate >= 45
+            else discord.Color.from_rgb(231, 76, 60)
+        )
+        embed = discord.Embed(
+            title=f"{self.tier_name} {self.rr}RR", description=desc + diff_block, color=color
+        )
+        if self.stale:
+            embed.set_footer(text=STALE_DATA_NOTICE)
+        elif self.cached:
+            embed.set_footer(text=CACHED_DATA_NOTICE)
+        img = self.tier_image
+        if img is not None:
+            embed.set_thumbnail(url=f"attachment://{img.name}")
+        return embed
 
 
 class SummaryCog(commands.Cog):
@@ -73,7 +183,7 @@ class SummaryCog(commands.Cog):
             )
             return
 
-        alias_info = get_alias(alias_input)
+        alias_info = await get_alias(alias_input)
         if not alias_info:
             await inter.response.send_message(
                 f"`{alias_input}` 별명을 찾을 수 없습니다.", ephemeral=True
@@ -86,90 +196,47 @@ class SummaryCog(commands.Cog):
         owner_key = f"alias:{alias_info['alias_norm']}"
 
         await inter.response.defer()
+        puuid = alias_info.get("puuid")
+
+        # Render from the store first; upstream is only asked for what's newer.
+        shown: Optional[_SummaryView] = None
+        cached_info = await cached_player_info(puuid, region=region) if puuid else None
+        cached = parse_matches(await recent_matches(owner_key, count, mode="competitive"))
+        # precomputed at ingest; one primary-key read each instead of re-aggregating
+        totals = await fetch_summary_totals(owner_key, cached[0].season_id if cached else None)
+        if cached_info and cached:
+            shown = _SummaryView(name, cached_info, cached, stale=False, cached=True, totals=totals)
+            await self._send(inter, shown)
+            # a short cache still has older matches to fetch, however fresh its head
+            if (
+                not cached_info.get("cache_expired")
+                and len(cached) >= count
+                and match_ingest.checked_within(owner_key, SUMMARY_FRESH_SECONDS)
+            ):
+                return
+
         try:
-            info = await fetch_player_info(name, tag, region=region)
-            puuid = info["puuid"]
-            cur = info.get("current_mmr") or {}
-            tier_name = cur.get("currenttierpatched") or "Unrated"
-            rr = cur.get("ranking_in_tier", 0)
-
-            js = await fetch_matches(region, name, tag, mode=None, size=count)
-            matches = js.get("data") or []
+            info, matches, fresh_matches = await self._refresh(
+                name, tag, region, owner_key, puuid, cached, count
+            )
             if not matches:
-                await inter.followup.send("최근 경기 기록이 없습니다.")
+                if shown is None:
+                    await inter.followup.send("최근 경기 기록이 없습니다.")
                 return
 
-            wins = losses = 0
-            tot_k = tot_d = 0
-            for match in matches:
-                players = (match.get("players") or {}).get("all_players") or []
-                me = next((p for p in players if p.get("puuid") == puuid), None)
-                if not me:
-                    continue
-
-                stats = me.get("stats") or {}
-                k = stats.get("kills", 0)
-                d = stats.get("deaths", 0)
-                tot_k += k
-                tot_d += d
-
-                team = me.get("team")
-                outcome = team_result(match.get("teams"), team)
-                if outcome is True:
-                    wins += 1
-                elif outcome is False:
-                    losses += 1
-
-            total = wins + losses
-            winrate = (wins / total * 100) if total else 0
-            kd = trunc2(tot_k / tot_d) if tot_d else float(tot_k)
-
-            try:
-                store_match_batch(owner_key, puuid, matches)
-            except Exception as store_err:
-                logging.getLogger(__name__).warning(
-                    "Failed to persist match cache: %s", store_err, exc_info=True
-                )
-
-            if winrate >= 50 and kd >= 1:
-                msg = "오~ 요즘 잘하고 있네"
-            elif winrate >= 50 and kd < 1:
-                msg = "오~ 승리엔 팀워크가!"
-            elif winrate <= 45 and kd >= 1:
-                msg = "혼자 고생하는 느낌이야"
-            elif winrate <= 45 and kd < 1:
-                msg = "연패는 이제 그만...!"
-            else:
-                msg = ""
-
-            desc = (
-                f"**{name}** 최근 경기 **{total}전**: **{wins}승 {losses}패** (**{winrate:.0f}%**)\n"
-                f"**KD : {kd:.2f}**"
-            )
-            if msg:
-                desc += f"\n**{msg}**"
-            diff_block = f"\n```diff\n+ 승 {wins}\n- 패 {losses}\n```"
-
-            color = (
-                discord.Color.from_rgb(46, 204, 113)
-                if winrate >= 55
-                else discord.Color.from_rgb(241, 196, 15)
-                if winrate >= 45
-                else discord.Color.from_rgb(231, 76, 60)
-            )
-            embed = discord.Embed(
-                title=f"{tier_name} {rr}RR", description=desc + diff_block, color=color
+            view = _SummaryView(
+                name, info, matches, stale=bool(info.get("stale")) or not fresh_matches, totals=totals
             )
-
-            img = TIERS_DIR / (tier_key(tier_name) + ".png")
-            if img.exists():
-                file = discord.File(img, filename=img.name)
-                embed.set_thumbnail(url=f"attachment://{img.name}")
-                await inter.followup.send(embed=embed, file=file)
-            else:
-                await inter.followup.send(embed=embed)
+            if shown is None:
+                await self._send(inter, view)
+            elif view.signature != shown.signature:
+                await self._edit(inter, view, new_thumbnail=view.tier_name != shown.tier_name)
 
         except Exception as e:
+            if shown is not None:
+                # the cached summary is already on screen; keep it
+                log.warning("Failed to refresh summary for %s: %s", owner_key, e)
+                return
             if is_account_not_found_error(e):
                 await inter.followup.send(
                     "계정을 찾을 수 없습니다. Riot ID 이름과 태그를 확인해 주세요.",
@@ -181,10 +248,89 @@ class SummaryCog(commands.Cog):
                     f"오류가 발생했습니다: {msg}", ephemeral=True
                 )
 
-    def _alias_choices(
+    async def _refresh(
+        self,
+        name: str,
+        tag: str,
+        region: str,
+        owner_key: str,
+        puuid: Optional[str],
+        cached: List[Match],
+        count: int,
+    ) -> Tuple[PlayerInfo, List[Match], bool]:
+        """Fresh player info plus ``count`` matches, fetching upstream only back to the newest stored one."""
+        info, delta = await asyncio.gather(
+            fetch_player_info(name, tag, region=region, puuid=puuid),
+            self._fetch_delta(region, name, tag, cached, count),
+            return_exceptions=True,
+        )
+        if isinstance(info, BaseException):
+            raise info
+        puuid = info["puuid"]
+
+        if isinstance(delta, UpstreamError):
+            if not cached:
+                raise delta
+            return info, cached, False
+        if isinstance(delta, BaseException):
+            raise delta
+        payloads, fresh_matches = delta
+        fetched = parse_matches(payloads)
+
+        if fresh_matches and fetched:
+            # written behind the response; the ingest queue logs failures
+            match_ingest.submit(owner_key, puuid, fetched, payloads=payloads, checked=True)
+        elif fresh_matches:
+            match_ingest.mark_checked(owner_key)
+
+        merged = {m.match_id: m for m in fetched}
+        for match in cached:
+            merged.setdefault(match.match_id, match)
+        matches = sorted(merged.values(), key=lambda m: m.game_start or 0, reverse=True)
+        return info, matches[:count], fresh_matches
+
+    async def _fetch_delta(
+        self, region: str, name: str, tag: str, cached: List[Match], count: int
+    ) -> Tuple[List[Any], bool]:
+        """Payloads of matches newer than the cached ones, plus the page's older neighbours.
+
+        When the store already has ``count`` matches, a 1-match probe is
+        followed by a 2-match page and then the full ``count`` page, stopping
+        as soon as a page reaches a cached match: an unchanged history costs
+        the probe, a single new match two small requests. A shorter cache is
+        missing older matches too and gets the full page right away.
+        """
+        if len(cached) >= count:
+            known = {m.match_id for m in cached}
+            size = 1
+            while True:
+                js = await fetch_matches(region, name, tag, mode=None, size=size)
+                page = js.get("data") or []
+                if size >= count or len(page) < size or any(match_id_of(p) in known for p in page):
+                    return page, not is_stale(js)
+                size = min(count, 2) if size == 1 else count
+        js = await fetch_matches(region, name, tag, mode=None, size=count)
+        return js.get("data") or [], not is_stale(js)
+
+    async def _send(self, inter: discord.Interaction, view: "_SummaryView") -> None:
+        img = view.tier_image
+        if img is not None:
+            await inter.followup.send(embed=view.embed(), file=discord.File(img, filename=img.name))
+        else:
+            await inter.followup.send(embed=view.embed())
+
+    async def _edit(self, inter: discord.Interaction, view: "_SummaryView", *, new_thumbnail: bool) -> None:
+        if not new_thumbnail:
+            await inter.edit_original_response(embed=view.embed())
+            return
+        img = view.tier_image
+        files = [discord.File(img, filename=img.name)] if img is not None else []
+        await inter.edit_original_response(embed=view.embed(), attachments=files)
+
+    async def _alias_choices(
         self, query: Optional[str]
     ) -> List[app_commands.Choice[str]]:
-        records = search_aliases(query, limit=25)
+        records = await search_aliases(query, limit=25)
         return [
             app_commands.Choice(name=alias_display(rec), value=rec["alias"])
             for rec in records
@@ -194,7 +340,7 @@ class SummaryCog(commands.Cog):
     async def vsummary_target_autocomplete(
         self, inter: discord.Interaction, current: str
     ):
-        return self._alias_choices(current)
+        return await self._alias_choices(current)
 
 
 async def setup(bot: commands.Bot):
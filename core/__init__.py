@@ -1,6 +1,6 @@
 """Core package for Valorant stats Discord bot."""
 
 # Re-export frequently used helpers for convenience in tests and extensions.
-from . import api, config, http, store, utils  # noqa: F401
+from . import api, cache, config, db, http, ingest, models, poll, search, store, utils  # noqa: F401
 
-__all__ = ["api", "config", "http", "store", "utils"]
+__all__ = ["api", "cache", "config", "db", "http", "ingest", "models", "poll", "search", "store", "utils"]
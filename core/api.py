@@ -1,12 +1,19 @@
 """High-level API helpers for Riot-related lookups."""
 from __future__ import annotations
 
-from typing import Any, Dict, TypedDict
+import asyncio
+import logging
+from collections.abc import Mapping
+from typing import Any, Dict, Optional, Tuple, TypedDict
 
+from .cache import cache_key, response_cache
 from .config import HENRIK_BASE
-from .http import http_get
+from .http import HTTPStatusError, http_get, is_stale
+from .models import Match
 from .utils import is_account_not_found_error, q
 
+logger = logging.getLogger(__name__)
+
 
 class PlayerInfo(TypedDict, total=False):
     """Aggregated account/MMR information for a Riot player."""
@@ -15,37 +22,125 @@ class PlayerInfo(TypedDict, total=False):
     mmr: Dict[str, Any]
     current_mmr: Dict[str, Any]
     puuid: str
+    stale: bool
+    cached: bool
+    cache_expired: bool
 
 
-async def fetch_player_info(name: str, tag: str, *, region: str) -> PlayerInfo:
+async def fetch_player_info(
+    name: str, tag: str, *, region: str, puuid: Optional[str] = None
+) -> PlayerInfo:
     """Fetch Riot account, PUUID and MMR information for the given player.
 
     The helper consolidates HTTP requests and normalises error handling so that
     callers can rely on consistent exceptions (e.g. ``Account not found``).
+    During an upstream outage previously cached responses are used and
+    ``stale`` is set.
+
+    When the alias already knows its ``puuid`` the by-PUUID endpoints are used;
+    the Riot ID is only resolved when that PUUID no longer exists. Account and
+    MMR are requested concurrently either way.
+    """
+
+    if puuid:
+        try:
+            return await _fetch_by_puuid(puuid, region)
+        except HTTPStatusError as err:
+            if err.status not in (400, 404):
+                raise
+            logger.info("Stored PUUID %s did not resolve (%s); using Riot ID", puuid, err.status)
+
+    return await _fetch_by_riot_id(name, tag, region)
+
+
+async def cached_player_info(puuid: str, *, region: str) -> Optional[PlayerInfo]:
+    """Last known by-PUUID account/MMR from the response cache, without a request.
+
+    The result is marked ``cached``, with ``cache_expired`` set when either
+    entry is past its TTL; ``stale`` is left to the outage fallback in
+    :func:`fetch_player_info`. ``None`` means nothing usable is cached.
+    """
+    puuid_q = q(puuid)
+    account = await response_cache.lookup(
+        cache_key(f"{HENRIK_BASE}/v1/by-puuid/account/{puuid_q}"), allow_stale=True
+    )
+    mmr = await response_cache.lookup(
+        cache_key(f"{HENRIK_BASE}/v2/by-puuid/mmr/{region}/{puuid_q}"), allow_stale=True
+    )
+    if account is None or mmr is None:
+        return None
+    try:
+        info = _player_info(account.payload, mmr.payload)
+    except RuntimeError:
+        return None
+    info["cached"] = True
+    info["cache_expired"] = not (account.fresh and mmr.fresh)
+    return info
+
+
+async def latest_match_id(
+    region: str, *, puuid: Optional[str] = None, name: str = "", tag: str = ""
+) -> Optional[str]:
+    """Id of the player's newest match from HenrikDev's stored-matches list.
+
+    Each entry there is a few hundred bytes of metadata instead of the full
+    player/round/kill payload, which makes it the cheap "anything new?"
+    check before :func:`fetch_match`. Uses the PUUID when known.
     """
+    if puuid:
+        url = f"{HENRIK_BASE}/v1/by-puuid/stored-matches/{region}/{q(puuid)}"
+    else:
+        url = f"{HENRIK_BASE}/v1/stored-matches/{region}/{q(name)}/{q(tag)}"
+    resp = await http_get(url, params={"size": "1"})
+    for item in resp.get("data") or ():
+        match_id = (item.get("meta") or {}).get("id") if isinstance(item, Mapping) else None
+        if match_id:
+            return str(match_id)
+    return None
 
+
+async def fetch_match(match_id: str) -> Optional[Tuple[Match, Dict[str, Any]]]:
+    """One match by id, parsed, plus its full payload for storing."""
+    resp = await http_get(f"{HENRIK_BASE}/v2/match/{q(match_id)}")
+    data = resp.get("data")
+    if not isinstance(data, dict):
+        return None
+    match = Match.from_payload(data)
+    return (match, data) if match.match_id else None
+
+
+async def _fetch_by_puuid(puuid: str, region: str) -> PlayerInfo:
+    puuid_q = q(puuid)
+    account_resp, mmr_resp = await asyncio.gather(
+        http_get(f"{HENRIK_BASE}/v1/by-puuid/account/{puuid_q}", allow_stale=True),
+        http_get(f"{HENRIK_BASE}/v2/by-puuid/mmr/{region}/{puuid_q}", allow_stale=True),
+    )
+    return _player_info(account_resp, mmr_resp)
+
+
+async def _fetch_by_riot_id(name: str, tag: str, region: str) -> PlayerInfo:
     name_q = q(name)
     tag_q = q(tag)
 
     try:
-        account_resp = await http_get(f"{HENRIK_BASE}/v1/account/{name_q}/{tag_q}")
+        account_resp, mmr_resp = await asyncio.gather(
+            http_get(f"{HENRIK_BASE}/v1/account/{name_q}/{tag_q}", allow_stale=True),
+            http_get(f"{HENRIK_BASE}/v2/mmr/{region}/{name_q}/{tag_q}", allow_stale=True),
+        )
     except Exception as err:  # pragma: no cover - thin wrapper
         if is_account_not_found_error(err):
             raise RuntimeError("Account not found") from err
         raise
 
+    return _player_info(account_resp, mmr_resp)
+
+
+def _player_info(account_resp: Dict[str, Any], mmr_resp: Dict[str, Any]) -> PlayerInfo:
     account_data = account_resp.get("data") or {}
     puuid = account_data.get("puuid")
     if not puuid:
         raise RuntimeError("Account not found: missing PUUID")
 
-    try:
-        mmr_resp = await http_get(f"{HENRIK_BASE}/v2/mmr/{region}/{name_q}/{tag_q}")
-    except Exception as err:  # pragma: no cover - thin wrapper
-        if is_account_not_found_error(err):
-            raise RuntimeError("Account not found") from err
-        raise
-
     mmr_data = mmr_resp.get("data") or {}
     current = mmr_data.get("current_data") or {}
 
@@ -54,4 +149,5 @@ async def fetch_player_info(name: str, tag: str, *, region: str) -> PlayerInfo:
         "mmr": mmr_data,
         "current_mmr": current,
         "puuid": puuid,
+        "stale": is_stale(account_resp) or is_stale(mmr_resp),
     }
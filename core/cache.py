@@ -0,0 +1,164 @@
+"""Two-tier (memory LRU + SQLite) cache for upstream JSON responses."""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .config import (
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_PERSIST_MIN_TTL,
+    CACHE_TTL_ACCOUNT,
+    CACHE_TTL_ASSETS,
+    CACHE_TTL_MATCHES,
+    CACHE_TTL_MMR,
+    HENRIK_BASE,
+    VAL_ASSET,
+)
+from . import db, store
+
+logger = logging.getLogger(__name__)
+
+# URL prefix -> TTL in seconds. Endpoints without a rule are never cached.
+TTL_RULES = (
+    (f"{HENRIK_BASE}/v1/account/", CACHE_TTL_ACCOUNT),
+    (f"{HENRIK_BASE}/v1/by-puuid/account/", CACHE_TTL_ACCOUNT),
+    (f"{HENRIK_BASE}/v2/mmr/", CACHE_TTL_MMR),
+    (f"{HENRIK_BASE}/v2/by-puuid/mmr/", CACHE_TTL_MMR),
+    (f"{HENRIK_BASE}/v3/matches/", CACHE_TTL_MATCHES),
+    (f"{HENRIK_BASE}/v3/by-puuid/matches/", CACHE_TTL_MATCHES),
+    (f"{HENRIK_BASE}/v1/stored-matches/", CACHE_TTL_MATCHES),
+    (f"{HENRIK_BASE}/v1/by-puuid/stored-matches/", CACHE_TTL_MATCHES),
+    (VAL_ASSET, CACHE_TTL_ASSETS),
+)
+
+
+def ttl_for(url: str) -> float:
+    for prefix, ttl in TTL_RULES:
+        if url.startswith(prefix):
+            return max(0.0, ttl)
+    return 0.0
+
+
+def cache_key(url: str, params: Dict[str, Any] | None = None) -> str:
+    if not params:
+        return url
+    query = urllib.parse.urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+    return f"{url}?{query}"
+
+
+class CacheEntry:
+    __slots__ = ("payload", "expires_at", "size")
+
+    def __init__(self, payload: Any, expires_at: float, size: int):
+        self.payload = payload
+        self.expires_at = expires_at
+        self.size = size
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+
+class ResponseCache:
+    """Bounded in-memory LRU in front of the persistent ``http_cache`` table.
+
+    Expired entries are kept (and returned when ``allow_stale`` is set) so that
+    callers can fall back to the last known response; the LRU bounds evict them
+    like any other entry. Only entries whose TTL is at least
+    ``persist_min_ttl`` are written to the table.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, persist_min_ttl: float = 0.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persist_min_ttl = persist_min_ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stale_hits": 0, "evictions": 0}
+
+    def get(self, key: str, *, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """Memory-only lookup, safe to call on the event loop."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        if entry.fresh:
+            self._stats["memory_hits"] += 1
+            return entry
+        if allow_stale:
+            self._stats["stale_hits"] += 1
+            return entry
+        return None
+
+    async def lookup(self, key: str, *, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """Memory lookup falling back to the ``http_cache`` table."""
+        entry = self.get(key, allow_stale=allow_stale)
+        if entry is not None:
+            return entry
+
+        if key not in self._entries:
+            entry = await self._load(key)
+            if entry is not None:
+                self._remember(key, entry)
+                if entry.fresh:
+                    self._stats["disk_hits"] += 1
+                    return entry
+                if allow_stale:
+                    self._stats["stale_hits"] += 1
+                    return entry
+
+        self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, payload: Any, text: str, ttl: float) -> None:
+        """Remember ``payload`` and, for long enough TTLs, persist ``text`` on the database writer thread."""
+        expires_at = time.time() + ttl
+        self._remember(key, CacheEntry(payload, expires_at, len(text)))
+        if ttl >= self.persist_min_ttl:
+            db.write_nowait(store.put_cached_response, key, text, int(expires_at))
+
+    def stats(self) -> Dict[str, int]:
+        data = dict(self._stats)
+        data["entries"] = len(self._entries)
+        data["bytes"] = self._bytes
+        return data
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    async def _load(self, key: str) -> Optional[CacheEntry]:
+        try:
+            row = await db.get_cached_response(key)
+        except sqlite3.Error:
+            logger.warning("Failed to read cached response for %s", key, exc_info=True)
+            return None
+        if not row:
+            return None
+        try:
+            payload = json.loads(row["body"])
+        except json.JSONDecodeError:
+            return None
+        return CacheEntry(payload, float(row["expires_at"]), len(row["body"]))
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._stats["evictions"] += 1
+
+
+response_cache = ResponseCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_PERSIST_MIN_TTL)
@@ -4,14 +4,26 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key) or default)
+    except ValueError:
+        return float(default)
+
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(os.getenv(key) or default)
+    except ValueError:
+        return int(default)
+
+
 # env
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN") or ""
 HENRIK_API_KEY = os.getenv("HENRIK_API_KEY") or ""
 LOG_LEVEL = (os.getenv("LOG_LEVEL") or "INFO").upper()
-try:
-    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT") or 20)
-except ValueError:
-    HTTP_TIMEOUT = 20.0
+HTTP_TIMEOUT = _env_float("HTTP_TIMEOUT", 20.0)
 _guild_id_raw = os.getenv("GUILD_ID")
 #_guild_id_raw = os.getenv()
 if _guild_id_raw:
@@ -27,6 +39,26 @@ else:
 HENRIK_BASE = "https://api.henrikdev.xyz/valorant"
 VAL_ASSET   = "https://valorant-api.com/v1"
 
+# HenrikDev quota (requests per window, per API key)
+HENRIK_RATE_LIMIT  = max(1, _env_int("HENRIK_RATE_LIMIT", 30))
+HENRIK_RATE_WINDOW = max(1.0, _env_float("HENRIK_RATE_WINDOW", 60.0))
+HTTP_MAX_RETRIES   = max(0, _env_int("HTTP_MAX_RETRIES", 2))
+# share of the quota that background polling must leave for interactive commands
+SCHEDULER_BACKGROUND_RESERVE = min(0.9, max(0.0, _env_float("SCHEDULER_BACKGROUND_RESERVE", 0.25)))
+CIRCUIT_FAILURE_THRESHOLD = max(1, _env_int("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RESET_TIMEOUT     = max(1.0, _env_float("CIRCUIT_RESET_TIMEOUT", 30.0))
+
+# response cache (seconds / sizes)
+CACHE_MAX_ENTRIES  = max(1, _env_int("CACHE_MAX_ENTRIES", 2048))
+CACHE_MAX_BYTES    = max(1, _env_int("CACHE_MAX_BYTES", 32 * 1024 * 1024))
+CACHE_TTL_ACCOUNT  = _env_float("CACHE_TTL_ACCOUNT", 6 * 3600)
+CACHE_TTL_MMR      = _env_float("CACHE_TTL_MMR", 5 * 60)
+CACHE_TTL_MATCHES  = _env_float("CACHE_TTL_MATCHES", 30)
+CACHE_TTL_ASSETS   = _env_float("CACHE_TTL_ASSETS", 3 * 86400)
+# shorter-lived entries (match lists) stay in memory; persisting them would
+# rewrite multi-MB rows that are useless seconds later
+CACHE_PERSIST_MIN_TTL = max(0.0, _env_float("CACHE_PERSIST_MIN_TTL", 5 * 60))
+
 # paths
 ROOT_DIR   = Path(__file__).resolve().parents[1]
 DATA_DIR   = ROOT_DIR / "data"
@@ -35,6 +67,40 @@ TIERS_DIR  = ASSETS_DIR / "tiers"
 LOG_FILE   = DATA_DIR / "bot.log"
 
 DB_FILE = DATA_DIR / "bot.sqlite3"
+DB_CACHE_KB   = max(0, _env_int("DB_CACHE_KB", 16 * 1024))
+DB_MMAP_BYTES = max(0, _env_int("DB_MMAP_BYTES", 64 * 1024 * 1024))
+DB_READER_THREADS = max(0, _env_int("DB_READER_THREADS", 2))
+# how often the in-memory alias registry checks for changes made by other processes
+ALIAS_REFRESH_INTERVAL = max(0.0, _env_float("ALIAS_REFRESH_INTERVAL", 5.0))
+
+# write-behind match ingestion (rows per flush / seconds before a partial flush)
+INGEST_MAX_BATCH   = max(1, _env_int("INGEST_MAX_BATCH", 200))
+INGEST_FLUSH_DELAY = max(0.0, _env_float("INGEST_FLUSH_DELAY", 1.0))
+
+# /최근전적요약 skips the upstream match check when the poller confirmed this recently (seconds)
+SUMMARY_FRESH_SECONDS = max(0.0, _env_float("SUMMARY_FRESH_SECONDS", 300.0))
+# daily summaries roll over at local midnight (UTC offset in hours; KST by default)
+SUMMARY_UTC_OFFSET_HOURS = _env_int("SUMMARY_UTC_OFFSET_HOURS", 9)
+
+# retention (days; 0 keeps forever) and background maintenance
+RETENTION_PAYLOAD_DAYS = max(0, _env_int("RETENTION_PAYLOAD_DAYS", 30))
+RETENTION_STATS_DAYS   = max(0, _env_int("RETENTION_STATS_DAYS", 365))
+DB_MAX_BYTES           = max(0, _env_int("DB_MAX_BYTES", 512 * 1024 * 1024))
+MAINTENANCE_INTERVAL   = max(60.0, _env_float("MAINTENANCE_INTERVAL", 3600.0))
+PRUNE_BATCH_SIZE       = max(1, _env_int("PRUNE_BATCH_SIZE", 500))
+VACUUM_STEP_PAGES      = max(1, _env_int("VACUUM_STEP_PAGES", 256))
+
+# match alert poller: seconds between scheduler ticks, aliases checked concurrently,
+# and the per-alias poll interval range (active players at the floor, idle ones back off to the ceiling)
+ALERT_POLL_INTERVAL     = max(10.0, _env_float("ALERT_POLL_INTERVAL", 60.0))
+ALERT_POLL_CONCURRENCY  = max(1, _env_int("ALERT_POLL_CONCURRENCY", 4))
+ALERT_POLL_MIN_INTERVAL = max(ALERT_POLL_INTERVAL, _env_float("ALERT_POLL_MIN_INTERVAL", 120.0))
+ALERT_POLL_MAX_INTERVAL = max(ALERT_POLL_MIN_INTERVAL, _env_float("ALERT_POLL_MAX_INTERVAL", 3600.0))
+# seconds a sweep waits for a new match to be stored before leaving it for the next poll
+ALERT_INGEST_TIMEOUT    = max(1.0, _env_float("ALERT_INGEST_TIMEOUT", 30.0))
+# alert delivery: channels sent to at once, and seconds before retrying a missing/forbidden channel
+ALERT_SEND_CONCURRENCY  = max(1, _env_int("ALERT_SEND_CONCURRENCY", 8))
+ALERT_CHANNEL_RETRY     = max(0.0, _env_float("ALERT_CHANNEL_RETRY", 600.0))
 
 # fs bootstrap
 DATA_DIR.mkdir(exist_ok=True)
@@ -0,0 +1,155 @@
+"""Awaitable facade over :mod:`core.store` that keeps SQLite off the event loop.
+
+Every write runs on a single dedicated writer thread, so writes are serialised
+exactly as before. Reads go to ``DB_READER_THREADS`` reader threads (WAL lets
+them run alongside the writer) or to the writer thread when that is ``0``.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from . import store
+from .config import DB_READER_THREADS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_writer: Optional[ThreadPoolExecutor] = None
+_readers: Optional[ThreadPoolExecutor] = None
+
+
+def _writer_executor() -> ThreadPoolExecutor:
+    global _writer
+    if _writer is None:
+        _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+    return _writer
+
+
+def _reader_executor() -> ThreadPoolExecutor:
+    global _readers
+    if DB_READER_THREADS <= 0:
+        return _writer_executor()
+    if _readers is None:
+        _readers = ThreadPoolExecutor(max_workers=DB_READER_THREADS, thread_name_prefix="db-reader")
+    return _readers
+
+
+async def run_read(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_reader_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def run_write(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_writer_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def write_nowait(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> "Future[Any]":
+    """Queue a write without waiting for it; failures are logged."""
+    future = _writer_executor().submit(fn, *args, **kwargs)
+    future.add_done_callback(_log_write_failure)
+    return future
+
+
+def _log_write_failure(future: "Future[Any]") -> None:
+    if future.cancelled():
+        return
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Background database write failed", exc_info=(type(exc), exc, exc.__traceback__))
+
+
+async def shutdown() -> None:
+    """Drain queued writes, stop the database threads and close connections."""
+    global _writer, _readers
+    executors = [e for e in (_readers, _writer) if e is not None]
+    _writer = _readers = None
+    loop = asyncio.get_running_loop()
+    for executor in executors:
+        await loop.run_in_executor(None, functools.partial(executor.shutdown, wait=True))
+    store.close_db()
+
+
+def _reading(fn: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_read(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def _writing(fn: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_write(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def _in_memory(table: Any) -> Callable[[Callable[..., T]], Callable[..., Awaitable[T]]]:
+    """Serve reads from an in-memory table, hopping threads whenever it may need a (re)load.
+
+    ``table.cached()`` decides and holds the table in one step, so a read it
+    lets through on the event loop can't start a reload halfway.
+    """
+
+    def decorate(fn: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with table.cached() as fresh:
+                if fresh:
+                    return fn(*args, **kwargs)
+            return await run_read(fn, *args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+_alias_lookup = _in_memory(store.alias_registry)
+_route_lookup = _in_memory(store.alert_routes)
+
+
+# aliases
+upsert_alias = _writing(store.upsert_alias)
+remove_alias = _writing(store.remove_alias)
+get_alias = _alias_lookup(store.get_alias)
+aliases_for_puuid = _alias_lookup(store.aliases_for_puuid)
+list_aliases = _alias_lookup(store.list_aliases)
+search_aliases = _alias_lookup(store.search_aliases)
+
+# match cache
+store_match_batch = _writing(store.store_match_batch)
+latest_match = _reading(store.latest_match)
+recent_matches = _reading(store.recent_matches)
+match_storage_stats = _reading(store.match_storage_stats)
+
+# summaries
+rebuild_summaries = _writing(store.rebuild_summaries)
+fetch_summary_totals = _reading(store.fetch_summary_totals)
+
+# alert channels
+set_alert_channel = _writing(store.set_alert_channel)
+remove_alert_channel = _writing(store.remove_alert_channel)
+get_alert_channel = _route_lookup(store.get_alert_channel)
+list_alert_channels = _route_lookup(store.list_alert_channels)
+
+# alert poller
+load_poll_state = _reading(store.load_poll_state)
+
+# retention / maintenance
+prune_match_payloads = _writing(store.prune_match_payloads)
+prune_match_rows = _writing(store.prune_match_rows)
+prune_oldest_matches = _writing(store.prune_oldest_matches)
+prune_http_cache = _writing(store.prune_http_cache)
+database_size = _reading(store.database_size)
+incremental_vacuum = _writing(store.incremental_vacuum)
+
+# http cache
+get_cached_response = _reading(store.get_cached_response)
+put_cached_response = _writing(store.put_cached_response)
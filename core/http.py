@@ -1,15 +1,397 @@
 import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
 import json
 import logging
-from typing import Optional, Dict, Any
+import time
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Optional, Dict, Any, Iterator, List, Mapping, Tuple
 
 import aiohttp
 
-from .config import HENRIK_API_KEY, HTTP_TIMEOUT
+from .cache import cache_key, response_cache, ttl_for
+from .config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    HENRIK_API_KEY,
+    HENRIK_BASE,
+    HENRIK_RATE_LIMIT,
+    HENRIK_RATE_WINDOW,
+    HTTP_MAX_RETRIES,
+    HTTP_TIMEOUT,
+    SCHEDULER_BACKGROUND_RESERVE,
+)
 
 logger = logging.getLogger(__name__)
 
 _session: Optional[aiohttp.ClientSession] = None
+_inflight: Dict[Tuple[Any, ...], Tuple["asyncio.Future[dict]", "_Ticket"]] = {}
+
+STALE_KEY = "_stale"
+
+
+class HTTPStatusError(RuntimeError):
+    """Non-200 response that is not a transient upstream failure (e.g. 404)."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class UpstreamError(RuntimeError):
+    """Transient upstream failure: timeout, connection error or 5xx."""
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without touching the network while the circuit is open."""
+
+
+class Priority(IntEnum):
+    """Scheduling class of an upstream request (lower runs first)."""
+
+    INTERACTIVE = 0
+    PREFETCH = 1
+    BACKGROUND = 2
+
+
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "http_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextlib.contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Run every ``http_get`` issued inside the block at ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimiter:
+    """Token bucket modelling the HenrikDev per-key quota.
+
+    ``limit`` tokens refill evenly over ``window`` seconds and the bucket is
+    re-synchronised from the rate-limit headers of every response. Ordering of
+    waiting callers is left to :class:`RequestScheduler`.
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = max(1, int(limit))
+        self.window = max(1.0, float(window))
+        self._rate = self.limit / self.window
+        self._tokens = float(self.limit)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(float(self.limit), self._tokens + elapsed * self._rate)
+            self._updated = now
+
+    def delay(self, reserve: float = 0.0) -> float:
+        """Seconds until a token can be taken while leaving ``reserve`` tokens."""
+        now = time.monotonic()
+        self._refill(now)
+        blocked = self._blocked_until - now
+        if blocked > 0:
+            return blocked
+        needed = 1 + min(reserve, self.limit - 1)
+        if self._tokens >= needed:
+            return 0.0
+        return (needed - self._tokens) / self._rate
+
+    def take(self) -> None:
+        self._refill(time.monotonic())
+        self._tokens -= 1
+
+    @property
+    def tokens(self) -> float:
+        self._refill(time.monotonic())
+        return self._tokens
+
+    def pause(self, seconds: float) -> None:
+        """Block the bucket for ``seconds`` (e.g. after a 429)."""
+        if seconds <= 0:
+            return
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, now + seconds)
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Align the bucket with the server's view of the remaining quota."""
+        remaining = _header_number(headers, "x-ratelimit-remaining")
+        if remaining is None:
+            return
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = min(self._tokens, max(0.0, remaining))
+        if remaining <= 0:
+            reset = _header_number(headers, "x-ratelimit-reset")
+            self.pause(reset if reset is not None else self.window)
+
+
+class _Ticket:
+    __slots__ = ("priority", "seq", "waiting", "wakeup")
+
+    def __init__(self, priority: Priority):
+        self.priority = priority
+        # assigned on the first acquire and kept, so a retry keeps its place
+        self.seq: Optional[int] = None
+        self.waiting = False
+        self.wakeup: Optional[asyncio.Event] = None
+
+
+class RequestScheduler:
+    """Hands out limiter tokens by priority class.
+
+    Waiters are served strictly by class and FIFO within a class, from one
+    heap per class. A ticket keeps its place across retries of the same
+    request. Lower classes must additionally leave a share of the bucket
+    untouched (``reserves``), so background sweeps only consume budget that
+    interactive commands are not using. Only the head waiter watches the
+    limiter; the others sleep until they become the head. Per-class queue
+    depth and wait times are kept for :meth:`stats`.
+    """
+
+    def __init__(self, limiter: RateLimiter, reserves: Mapping[Priority, float]):
+        self.limiter = limiter
+        self.reserves = {p: max(0.0, reserves.get(p, 0.0)) for p in Priority}
+        # (seq, ticket); an entry is stale once its ticket stopped waiting or
+        # was promoted to another class, and is dropped when it reaches the top
+        self._queues: Dict[Priority, List[Tuple[int, _Ticket]]] = {p: [] for p in Priority}
+        self._seq = itertools.count()
+        self._awake: Optional[_Ticket] = None
+        self._stats = {
+            p: {"granted": 0, "wait_total": 0.0, "wait_max": 0.0, "wait_last": 0.0} for p in Priority
+        }
+
+    async def acquire(self, ticket: _Ticket) -> float:
+        """Wait until ``ticket`` may use a token. Returns the time spent waiting."""
+        if ticket.seq is None:
+            ticket.seq = next(self._seq)
+        ticket.waiting = True
+        ticket.wakeup = asyncio.Event()
+        heapq.heappush(self._queues[ticket.priority], (ticket.seq, ticket))
+        self._wake_head()
+        started = time.monotonic()
+        granted = False
+        try:
+            while True:
+                timeout: Optional[float] = None
+                if self._head() is ticket:
+                    timeout = self.limiter.delay(self.reserves[ticket.priority])
+                    if timeout <= 0:
+                        self.limiter.take()
+                        heapq.heappop(self._queues[ticket.priority])
+                        granted = True
+                        break
+                ticket.wakeup.clear()
+                try:
+                    await asyncio.wait_for(ticket.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            ticket.waiting = False
+            if not granted:
+                queue = self._queues[ticket.priority]
+                entry = (ticket.seq, ticket)
+                if entry in queue:
+                    queue.remove(entry)
+                    heapq.heapify(queue)
+            self._wake_head()
+
+        waited = time.monotonic() - started
+        stats = self._stats[ticket.priority]
+        stats["granted"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+        stats["wait_last"] = waited
+        return waited
+
+    def promote(self, ticket: _Ticket, priority: Priority) -> None:
+        """Raise a queued ticket's class when a more urgent caller joins it."""
+        if priority < ticket.priority:
+            ticket.priority = priority
+            if ticket.waiting:
+                heapq.heappush(self._queues[priority], (ticket.seq, ticket))
+                self._wake_head()
+
+    def _head(self) -> Optional[_Ticket]:
+        for priority, queue in self._queues.items():
+            while queue:
+                ticket = queue[0][1]
+                if ticket.waiting and ticket.priority == priority:
+                    return ticket
+                heapq.heappop(queue)
+        return None
+
+    def _wake_head(self) -> None:
+        # a new head starts watching the limiter; the others stay asleep
+        head = self._head()
+        if head is not self._awake:
+            self._awake = head
+            if head is not None and head.wakeup is not None:
+                head.wakeup.set()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        depth = {
+            p: sum(1 for _, ticket in queue if ticket.waiting and ticket.priority == p)
+            for p, queue in self._queues.items()
+        }
+        data: Dict[str, Dict[str, float]] = {}
+        for priority in Priority:
+            stats = self._stats[priority]
+            granted = stats["granted"]
+            data[priority.name.lower()] = {
+                "depth": depth[priority],
+                "granted": granted,
+                "wait_avg": stats["wait_total"] / granted if granted else 0.0,
+                "wait_max": stats["wait_max"],
+                "wait_last": stats["wait_last"],
+            }
+        return data
+
+
+class CircuitBreaker:
+    """Fail fast while an upstream is down.
+
+    ``threshold`` consecutive transient failures open the circuit. After
+    ``reset_timeout`` seconds a single half-open probe is let through; its
+    outcome either closes the circuit again or re-opens it.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = max(1, int(threshold))
+        self.reset_timeout = max(0.0, float(reset_timeout))
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def is_open(self) -> bool:
+        return self.state == "open" and self.retry_in() > 0
+
+    def retry_in(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if self.retry_in() > 0:
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info("Circuit closed after successful probe")
+        self.state = "closed"
+        self._failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probing = False
+        if self.state == "half_open" or self._failures >= self.threshold:
+            if self.state != "open":
+                logger.warning("Circuit opened after %s consecutive failures", self._failures)
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Forget an in-flight probe that ended without a verdict."""
+        self._probing = False
+
+
+_henrik_limiter = RateLimiter(HENRIK_RATE_LIMIT, HENRIK_RATE_WINDOW)
+_henrik_scheduler = RequestScheduler(
+    _henrik_limiter,
+    {
+        Priority.PREFETCH: HENRIK_RATE_LIMIT * SCHEDULER_BACKGROUND_RESERVE / 2,
+        Priority.BACKGROUND: HENRIK_RATE_LIMIT * SCHEDULER_BACKGROUND_RESERVE,
+    },
+)
+_henrik_breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+
+
+def _scheduler_for(url: str) -> Optional[RequestScheduler]:
+    if url.startswith(HENRIK_BASE):
+        return _henrik_scheduler
+    return None
+
+
+def _breaker_for(url: str) -> Optional[CircuitBreaker]:
+    if url.startswith(HENRIK_BASE):
+        return _henrik_breaker
+    return None
+
+
+def upstream_stats() -> Dict[str, Any]:
+    """Snapshot of the HenrikDev scheduler, limiter, breaker and cache state."""
+    return {
+        "queues": _henrik_scheduler.stats(),
+        "tokens": _henrik_limiter.tokens,
+        "limit": _henrik_limiter.limit,
+        "circuit": _henrik_breaker.state,
+        "cache": response_cache.stats(),
+    }
+
+
+def upstream_available(url: str = HENRIK_BASE) -> bool:
+    """False while the circuit for ``url``'s upstream is open."""
+    breaker = _breaker_for(url)
+    return breaker is None or not breaker.is_open()
+
+
+def is_stale(payload: Mapping[str, Any] | None) -> bool:
+    """True when ``payload`` is a cached fallback served during an outage."""
+    return bool(payload) and bool(payload.get(STALE_KEY))
+
+
+def _mark_stale(payload: Any) -> Any:
+    if not isinstance(payload, dict):
+        return payload
+    marked = dict(payload)
+    marked[STALE_KEY] = True
+    return marked
+
+
+def _header_number(headers: Mapping[str, str], key: str) -> Optional[float]:
+    value = headers.get(key) if headers else None
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_after(headers: Mapping[str, str], default: float) -> float:
+    value = headers.get("Retry-After") if headers else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    reset = _header_number(headers, "x-ratelimit-reset")
+    if reset is not None:
+        return max(0.0, reset)
+    return default
 
 
 async def ensure_session() -> aiohttp.ClientSession:
@@ -40,45 +422,217 @@ def _extract_error_detail(text: str) -> str:
     return text[:240]
 
 
+def _request_key(
+    url: str, params: Dict[str, Any] | None, headers: Dict[str, str] | None
+) -> Tuple[Any, ...]:
+    return (
+        url,
+        tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())),
+        tuple(sorted((headers or {}).items())),
+    )
+
+
+def _forget_inflight(key: Tuple[Any, ...], future: "asyncio.Future[dict]") -> None:
+    inflight = _inflight.get(key)
+    if inflight is not None and inflight[0] is future:
+        del _inflight[key]
+    if not future.cancelled():
+        # Mark the error as retrieved even if every waiter was cancelled.
+        future.exception()
+
+
 async def http_get(
     url: str,
     *,
     params: Dict[str, Any] | None = None,
     headers: Dict[str, str] | None = None,
+    cache: bool = True,
+    allow_stale: bool = False,
+    priority: Optional[Priority] = None,
 ) -> dict:
+    """GET ``url`` and return the decoded JSON payload.
+
+    Responses from endpoints with a TTL rule in :mod:`core.cache` are served
+    from the response cache while fresh; pass ``cache=False`` to force an
+    upstream request (the result still refreshes the cache).
+
+    With ``allow_stale`` an expired cache entry is returned instead of raising
+    :class:`UpstreamError` when the upstream times out, fails or has its
+    circuit open. Such payloads carry ``STALE_KEY`` (see :func:`is_stale`).
+
+    HenrikDev requests are queued by ``priority``, which defaults to the
+    class set with :func:`request_priority` (interactive otherwise).
+
+    Identical requests (same URL, params, headers, ``cache`` and
+    ``allow_stale``) that are already in flight are coalesced: only one upstream call is made and every waiter
+    receives the same payload object, so callers must treat it as read-only.
+    """
+    ttl = 0.0 if headers else ttl_for(url)
+    ckey = cache_key(url, params) if ttl else None
+    if ckey is not None and cache:
+        entry = response_cache.get(ckey)
+        if entry is not None:
+            return entry.payload
+
+    if priority is None:
+        priority = _priority.get()
+    # a cache=False caller must not get the cached payload a cache=True leader may return
+    key = (*_request_key(url, params, headers), allow_stale, cache)
+    inflight = _inflight.get(key)
+    if inflight is None:
+        ticket = _Ticket(priority)
+        future = asyncio.ensure_future(
+            _load(
+                url,
+                params=params,
+                headers=headers,
+                ckey=ckey,
+                ttl=ttl,
+                use_cache=cache,
+                allow_stale=allow_stale,
+                ticket=ticket,
+            )
+        )
+        _inflight[key] = (future, ticket)
+        future.add_done_callback(lambda f, _key=key: _forget_inflight(_key, f))
+    else:
+        future, ticket = inflight
+        logger.debug("Coalescing in-flight GET %s params=%s", url, params)
+        scheduler = _scheduler_for(url)
+        if scheduler is not None:
+            scheduler.promote(ticket, priority)
+    # Shield so that one cancelled waiter does not abort the shared request.
+    return await asyncio.shield(future)
+
+
+async def _load(
+    url: str,
+    *,
+    params: Dict[str, Any] | None,
+    headers: Dict[str, str] | None,
+    ckey: Optional[str],
+    ttl: float,
+    use_cache: bool,
+    allow_stale: bool,
+    ticket: _Ticket,
+) -> dict:
+    if ckey is not None and use_cache:
+        entry = await response_cache.lookup(ckey)
+        if entry is not None:
+            return entry.payload
+
+    try:
+        payload, text = await _fetch(url, params=params, headers=headers, ticket=ticket)
+    except UpstreamError:
+        if ckey is not None and allow_stale:
+            entry = await response_cache.lookup(ckey, allow_stale=True)
+            if entry is not None:
+                logger.warning("Serving stale response for %s", url)
+                return _mark_stale(entry.payload)
+        raise
+    if ckey is not None:
+        response_cache.put(ckey, payload, text, ttl)
+    return payload
+
+
+async def _fetch(
+    url: str,
+    *,
+    params: Dict[str, Any] | None = None,
+    headers: Dict[str, str] | None = None,
+    ticket: Optional[_Ticket] = None,
+) -> Tuple[dict, str]:
+    breaker = _breaker_for(url)
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError(
+            f"Valorant API is temporarily unavailable. Retry in {breaker.retry_in():.0f}s."
+        )
+
     sess = await ensure_session()
     hdrs = dict(headers or {})
     if HENRIK_API_KEY:
         hdrs["Authorization"] = HENRIK_API_KEY
 
+    scheduler = _scheduler_for(url)
+    limiter = scheduler.limiter if scheduler is not None else None
+    if ticket is None:
+        ticket = _Ticket(_priority.get())
+    attempt = 0
+    healthy: Optional[bool] = None
     logger.info("HTTP GET %s params=%s", url, params)
     try:
-        async with sess.get(url, params=params, headers=hdrs) as response:
-            text = await response.text()
-            if response.status != 200:
-                detail = _extract_error_detail(text)
-                logger.error(
-                    "HTTP GET failed %s -> %s %s | detail=%s",
-                    url,
-                    response.status,
-                    response.reason,
-                    detail,
-                )
-                raise RuntimeError(
-                    f"GET {url} -> {response.status} {response.reason}: {detail}"
-                )
+        while True:
+            if scheduler is not None:
+                waited = await scheduler.acquire(ticket)
+                if waited >= 1:
+                    logger.debug(
+                        "Scheduler delayed %s (%s) by %.1fs", url, ticket.priority.name.lower(), waited
+                    )
 
-            try:
-                payload = json.loads(text)
-            except json.JSONDecodeError:
-                logger.error("Invalid JSON from %s: %s", url, text[:240])
-                raise RuntimeError(f"Invalid JSON from {url}: {text[:120]}")
+            async with sess.get(url, params=params, headers=hdrs) as response:
+                text = await response.text()
+                if limiter is not None:
+                    limiter.observe(response.headers)
+
+                if response.status == 429 and attempt < HTTP_MAX_RETRIES:
+                    attempt += 1
+                    delay = min(_retry_after(response.headers, 2.0 ** attempt), HENRIK_RATE_WINDOW)
+                    logger.warning(
+                        "HTTP GET rate limited %s, retry %s/%s in %.1fs",
+                        url,
+                        attempt,
+                        HTTP_MAX_RETRIES,
+                        delay,
+                    )
+                    if limiter is not None:
+                        limiter.pause(delay)
+                    else:
+                        await asyncio.sleep(delay)
+                    continue
 
-            logger.debug("HTTP GET success %s (%s bytes)", url, len(text))
-            return payload
+                healthy = response.status < 500
+                return _parse_response(url, response.status, response.reason, text), text
     except asyncio.TimeoutError as exc:
+        healthy = False
         logger.error("HTTP GET timeout for %s", url)
-        raise RuntimeError("Request to Valorant API timed out. Please try again later.") from exc
+        raise UpstreamError("Request to Valorant API timed out. Please try again later.") from exc
+    except aiohttp.ClientError as exc:
+        healthy = False
+        logger.error("HTTP GET connection error for %s: %s", url, exc)
+        raise UpstreamError(f"Could not reach Valorant API: {exc}") from exc
+    finally:
+        if breaker is not None:
+            if healthy is True:
+                breaker.record_success()
+            elif healthy is False:
+                breaker.record_failure()
+            else:
+                breaker.release()
+
+
+def _parse_response(url: str, status: int, reason: Optional[str], text: str) -> dict:
+    if status != 200:
+        detail = _extract_error_detail(text)
+        logger.error(
+            "HTTP GET failed %s -> %s %s | detail=%s",
+            url,
+            status,
+            reason,
+            detail,
+        )
+        message = f"GET {url} -> {status} {reason}: {detail}"
+        if status >= 500:
+            raise UpstreamError(message)
+        raise HTTPStatusError(message, status)
+
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError:
+        logger.error("Invalid JSON from %s: %s", url, text[:240])
+        raise RuntimeError(f"Invalid JSON from {url}: {text[:120]}")
+
+    logger.debug("HTTP GET success %s (%s bytes)", url, len(text))
+    return payload
 
 
 async def close_session():
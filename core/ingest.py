@@ -0,0 +1,280 @@
+"""Write-behind queue that batches match ingestion into larger transactions."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import time
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import db, store
+from .config import INGEST_FLUSH_DELAY, INGEST_MAX_BATCH
+from .models import Match, parse_matches
+
+logger = logging.getLogger(__name__)
+
+_Key = Tuple[str, str]  # (match_id, owner_key)
+
+
+class _Submission:
+    __slots__ = ("keys", "future", "checked_owner", "submitted_at")
+
+    def __init__(self, future: "asyncio.Future[int]", checked_owner: Optional[str]):
+        self.keys: List[_Key] = []
+        self.future = future
+        self.checked_owner = checked_owner
+        self.submitted_at = time.monotonic()
+
+
+def _consume_exception(future: "asyncio.Future[int]") -> None:
+    if not future.cancelled():
+        future.exception()
+
+
+class MatchIngestQueue:
+    """Collects ``store_match_batch`` calls and flushes them together.
+
+    Rows are coalesced by ``(match_id, owner_key)`` (the latest payload wins)
+    and written in one transaction once ``max_batch`` rows are pending or
+    ``flush_delay`` seconds after the first pending row. :meth:`submit` returns
+    a future resolving to the number of rows that were new for that call; a
+    row submitted twice before a flush only counts as new for the first caller,
+    as it would have with sequential inline writes.
+
+    Source payloads, passed as ``payloads`` or as the matches themselves, are
+    held only until their rows are flushed into ``match_blobs``.
+
+    Callers that just fetched an owner's newest upstream match pass
+    ``checked=True``; once those rows are stored :meth:`checked_within` lets
+    readers serve that owner from the store without asking upstream again.
+
+    Alert poller cursors queued with :meth:`save_cursor` are written in the
+    same transaction as the rows pending alongside them.
+
+    A flush the database rejects (:class:`sqlite3.OperationalError`) fails
+    the futures of that flush but keeps its rows and cursors queued; they are
+    retried ``flush_delay`` (at least a second) later. Any other failure is
+    taken to be a bad row: the flush is redone one row at a time, and a row
+    that fails on its own is dropped, failing only the futures waiting on it.
+    """
+
+    def __init__(self, max_batch: int, flush_delay: float):
+        self.max_batch = max(1, max_batch)
+        self.flush_delay = max(0.0, flush_delay)
+        self._pending: Dict[_Key, Tuple[str, Match]] = {}
+        self._payloads: store.MatchPayloads = {}
+        self._first_claim: Dict[_Key, _Submission] = {}
+        self._submissions: List[_Submission] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._checked: Dict[str, float] = {}
+        self._cursors: Dict[str, store.PollCursor] = {}
+
+    def submit(
+        self,
+        owner_key: str,
+        puuid: str,
+        matches: Iterable[Dict[str, Any] | Match],
+        *,
+        payloads: Iterable[Dict[str, Any]] = (),
+        checked: bool = False,
+    ) -> "asyncio.Future[int]":
+        loop = asyncio.get_running_loop()
+        submission = _Submission(loop.create_future(), owner_key if checked else None)
+        # flush() already logs failures; callers that never await shouldn't warn again
+        submission.future.add_done_callback(_consume_exception)
+        matches = list(matches)
+        by_id = store.payloads_by_id(chain(matches, payloads))
+        for match in parse_matches(matches):
+            if not match.match_id:
+                continue
+            key = (match.match_id, owner_key)
+            self._pending[key] = (puuid, match)
+            if match.match_id in by_id:
+                self._payloads[match.match_id] = by_id[match.match_id]
+            self._first_claim.setdefault(key, submission)
+            submission.keys.append(key)
+
+        if not submission.keys:
+            self._resolve(submission, 0)
+            return submission.future
+
+        self._submissions.append(submission)
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush()
+        else:
+            self._arm_timer(self.flush_delay)
+        return submission.future
+
+    def save_cursor(
+        self,
+        poll_key: str,
+        last_match_id: Optional[str],
+        last_played_at: Optional[float],
+        misses: int,
+        last_polled_at: Optional[float],
+        next_due_at: Optional[float],
+    ) -> None:
+        """Queue a poller cursor; a later one for the same key replaces it."""
+        self._cursors[poll_key] = (
+            poll_key,
+            last_match_id,
+            None if last_played_at is None else int(last_played_at),
+            misses,
+            None if last_polled_at is None else int(last_polled_at),
+            None if next_due_at is None else int(next_due_at),
+        )
+        self._arm_timer(self.flush_delay)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def mark_checked(self, owner_key: str, at: Optional[float] = None) -> None:
+        """Record that everything upstream had for ``owner_key`` is stored."""
+        at = time.monotonic() if at is None else at
+        if at > self._checked.get(owner_key, 0.0):
+            self._checked[owner_key] = at
+
+    def checked_within(self, owner_key: str, seconds: float) -> bool:
+        checked_at = self._checked.get(owner_key)
+        return checked_at is not None and time.monotonic() - checked_at < seconds
+
+    def _resolve(self, submission: _Submission, count: int) -> None:
+        if submission.checked_owner is not None:
+            self.mark_checked(submission.checked_owner, submission.submitted_at)
+        submission.future.set_result(count)
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.ensure_future(self._drain())
+
+    def _arm_timer(self, delay: float) -> None:
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._schedule_flush)
+
+    async def _drain(self) -> None:
+        # rows and cursors queued while a flush is running are written by the
+        # next pass instead of waiting for an unrelated submit
+        while self._pending or self._cursors:
+            if not await self.flush():
+                return  # flush() armed the retry
+
+    async def flush(self) -> bool:
+        """Write everything pending now; returns ``False`` if the write failed."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending and not self._cursors:
+                return True
+
+            pending, self._pending = self._pending, {}
+            payloads, self._payloads = self._payloads, {}
+            cursors, self._cursors = self._cursors, {}
+            first_claim, self._first_claim = self._first_claim, {}
+            submissions, self._submissions = self._submissions, []
+
+            batches = [(owner_key, puuid, [match]) for (_, owner_key), (puuid, match) in pending.items()]
+            failed: Dict[_Key, BaseException] = {}
+            try:
+                new_keys = await db.run_write(
+                    store.ingest_match_batches, batches, list(cursors.values()), payloads
+                )
+            except sqlite3.OperationalError as exc:
+                # the database itself is unavailable (locked, disk I/O): try everything again later
+                logger.exception(
+                    "Failed to flush %s queued match rows and %s poller cursors; keeping them queued",
+                    len(pending),
+                    len(cursors),
+                )
+                self._requeue(pending, payloads, cursors)
+                for submission in submissions:
+                    if not submission.future.done():
+                        submission.future.set_exception(exc)
+                self._arm_timer(max(1.0, self.flush_delay))
+                return False
+            except Exception:
+                # most likely one bad row; write them one at a time so it can't hold up the rest
+                logger.exception("Failed to flush %s queued match rows; retrying them one by one", len(pending))
+                new_keys, failed = await self._flush_each(pending, payloads, cursors)
+
+            logger.debug("Flushed %s match rows (%s new)", len(pending) - len(failed), len(new_keys))
+            for submission in submissions:
+                if submission.future.done():
+                    continue
+                error = next((failed[key] for key in submission.keys if key in failed), None)
+                if error is not None:
+                    submission.future.set_exception(error)
+                    continue
+                count = sum(
+                    1 for key in set(submission.keys) if key in new_keys and first_claim.get(key) is submission
+                )
+                self._resolve(submission, count)
+            if failed and (self._pending or self._cursors):
+                self._arm_timer(max(1.0, self.flush_delay))
+                return False
+            return True
+
+    async def _flush_each(
+        self,
+        pending: Dict[_Key, Tuple[str, Match]],
+        payloads: store.MatchPayloads,
+        cursors: Dict[str, store.PollCursor],
+    ) -> Tuple[Set[_Key], Dict[_Key, BaseException]]:
+        """Write ``pending`` one row per transaction; returns the new keys and the rows that failed.
+
+        A row that fails on its own is dropped, unless the database was
+        unavailable, in which case it stays queued like a failed flush.
+        """
+        new_keys: Set[_Key] = set()
+        failed: Dict[_Key, BaseException] = {}
+        for key, (puuid, match) in pending.items():
+            match_id, owner_key = key
+            row_payloads = {match_id: payloads[match_id]} if match_id in payloads else {}
+            try:
+                new_keys |= await db.run_write(
+                    store.ingest_match_batches, [(owner_key, puuid, [match])], (), row_payloads
+                )
+            except sqlite3.OperationalError as exc:
+                failed[key] = exc
+                self._requeue({key: (puuid, match)}, row_payloads, {})
+            except Exception as exc:
+                failed[key] = exc
+                logger.error("Dropping match row %s for %s that can't be stored: %s", match_id, owner_key, exc)
+        if cursors:
+            try:
+                await db.run_write(store.ingest_match_batches, [], list(cursors.values()))
+            except Exception:
+                logger.exception("Failed to save %s poller cursors; keeping them queued", len(cursors))
+                self._requeue({}, {}, cursors)
+        return new_keys, failed
+
+    def _requeue(
+        self,
+        pending: Dict[_Key, Tuple[str, Match]],
+        payloads: store.MatchPayloads,
+        cursors: Dict[str, store.PollCursor],
+    ) -> None:
+        # anything queued meanwhile is newer and wins
+        for key, row in pending.items():
+            self._pending.setdefault(key, row)
+        for match_id, payload in payloads.items():
+            self._payloads.setdefault(match_id, payload)
+        for poll_key, cursor in cursors.items():
+            self._cursors.setdefault(poll_key, cursor)
+
+    async def close(self) -> None:
+        """Flush-on-shutdown hook."""
+        if self._flushing is not None:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+        await self.flush()
+
+
+match_ingest = MatchIngestQueue(INGEST_MAX_BATCH, INGEST_FLUSH_DELAY)
@@ -0,0 +1,149 @@
+"""Compact match model parsed once from a HenrikDev v3 match payload."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .utils import as_int, clean_text, metadata_label, team_entries, team_outcome_from_entry
+
+
+def match_id_of(payload: Mapping[str, Any] | None) -> Optional[str]:
+    if not isinstance(payload, Mapping):
+        return None
+    metadata = payload.get("metadata") or {}
+    return (
+        metadata.get("matchid")
+        or metadata.get("matchId")
+        or metadata.get("matchID")
+        or payload.get("match_id")
+    )
+
+
+class PlayerLine:
+    __slots__ = (
+        "puuid",
+        "name",
+        "tag",
+        "team",
+        "agent",
+        "kills",
+        "deaths",
+        "assists",
+        "score",
+        "headshots",
+        "bodyshots",
+        "legshots",
+        "damage",
+    )
+
+    def __init__(self, raw: Mapping[str, Any]):
+        stats = raw.get("stats") or {}
+        character = raw.get("character")
+        if isinstance(character, Mapping):
+            character = character.get("name")
+        self.puuid = clean_text(raw.get("puuid")) or None
+        self.name = clean_text(raw.get("game_name") or raw.get("gameName") or raw.get("name"))
+        self.tag = clean_text(raw.get("tag_line") or raw.get("tagLine") or raw.get("tag"))
+        team = clean_text(raw.get("team"))
+        self.team = team or None
+        self.agent = clean_text(character) or None
+        self.kills = as_int(stats.get("kills")) or 0
+        self.deaths = as_int(stats.get("deaths")) or 0
+        self.assists = as_int(stats.get("assists")) or 0
+        self.score = as_int(stats.get("score")) or 0
+        self.headshots = as_int(stats.get("headshots")) or 0
+        self.bodyshots = as_int(stats.get("bodyshots")) or 0
+        self.legshots = as_int(stats.get("legshots")) or 0
+        self.damage = as_int(raw.get("damage_made")) or 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"kills": self.kills, "deaths": self.deaths, "assists": self.assists}
+
+
+class TeamLine:
+    __slots__ = ("name", "won", "rounds_won", "rounds_lost")
+
+    def __init__(self, name: str, raw: Mapping[str, Any]):
+        self.name = name
+        self.won = team_outcome_from_entry(raw)
+        self.rounds_won = as_int(raw.get("rounds_won"))
+        self.rounds_lost = as_int(raw.get("rounds_lost"))
+
+
+class Match:
+    """Fields every consumer needs, with the player list indexed by PUUID.
+
+    The source payload isn't kept; code that stores it passes it alongside.
+    """
+
+    __slots__ = (
+        "match_id",
+        "map",
+        "mode",
+        "started_label",
+        "game_start",
+        "rounds_played",
+        "season_id",
+        "players",
+        "teams",
+        "_by_puuid",
+    )
+
+    def __init__(self, payload: Mapping[str, Any]):
+        metadata = payload.get("metadata") or {}
+        self.match_id = match_id_of(payload)
+        self.map = metadata_label(metadata, "map", default=None)
+        self.mode = metadata_label(metadata, "mode", default=None)
+        self.started_label = metadata.get("game_start_patched") or metadata.get("game_start")
+        self.game_start = as_int(metadata.get("game_start"))
+        self.rounds_played = as_int(metadata.get("rounds_played"))
+        self.season_id = clean_text(metadata.get("season_id")) or None
+
+        players = (payload.get("players") or {}).get("all_players") or []
+        self.players: Tuple[PlayerLine, ...] = tuple(
+            PlayerLine(p) for p in players if isinstance(p, Mapping)
+        )
+        self._by_puuid = {p.puuid.lower(): p for p in self.players if p.puuid}
+        self.teams: Dict[str, TeamLine] = {
+            key.lower(): TeamLine(key, entry) for key, entry in team_entries(payload.get("teams")).items()
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Mapping[str, Any] | "Match") -> "Match":
+        return payload if isinstance(payload, cls) else cls(payload)
+
+    def player(self, puuid: Optional[str]) -> Optional[PlayerLine]:
+        if not puuid:
+            return None
+        return self._by_puuid.get(clean_text(puuid).lower())
+
+    def find_player(
+        self, *, puuid: Optional[str], name: Optional[str] = None, tag: Optional[str] = None
+    ) -> Optional[PlayerLine]:
+        """Look up by PUUID, falling back to the Riot ID."""
+        found = self.player(puuid)
+        if found is not None:
+            return found
+        name_norm = clean_text(name).lower()
+        tag_norm = clean_text(tag).upper()
+        if not (name_norm and tag_norm):
+            return None
+        for player in self.players:
+            if player.name.lower() == name_norm and player.tag.upper() == tag_norm:
+                return player
+        return None
+
+    def team_won(self, team: Optional[str]) -> Optional[bool]:
+        if not team:
+            return None
+        line = self.teams.get(clean_text(team).lower())
+        return line.won if line else None
+
+    def outcome(self, player: Optional[PlayerLine]) -> Optional[str]:
+        """``"win"``/``"loss"`` for ``player``'s team, ``None`` when unknown."""
+        won = self.team_won(player.team) if player else None
+        return "win" if won is True else "loss" if won is False else None
+
+
+def parse_matches(payloads: Iterable[Any] | None) -> List[Match]:
+    return [Match.from_payload(p) for p in payloads or () if isinstance(p, (Mapping, Match))]
@@ -0,0 +1,173 @@
+"""Activity-driven schedule for the match alert poller.
+
+Every alias gets its own next-poll time, kept in a heap. Players whose last
+match started recently are treated as mid-session and polled at the floor
+interval; once they go quiet each empty poll doubles the interval up to the
+ceiling, and idle polls falling in the local small hours are stretched
+further. Aliases with no known match sit at the ceiling.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import random
+import time
+from itertools import count
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+# a player whose last match started within this many seconds is mid-session
+SESSION_GAP = 2 * 3600
+# local hours in which idle players are polled half as often
+QUIET_HOURS = range(3, 9)
+# 2 ** 32 * floor is past any sensible ceiling
+_MAX_MISSES = 32
+
+
+def poll_key(entry: Mapping[str, Any]) -> str:
+    """Aliases sharing a PUUID are polled as one player."""
+    puuid = (entry.get("puuid") or "").strip().lower()
+    return f"puuid:{puuid}" if puuid else f"alias:{entry['alias_norm']}"
+
+
+class _Slot:
+    __slots__ = ("last_played", "misses")
+
+    def __init__(self, last_played: Optional[float], misses: int):
+        self.last_played = last_played
+        self.misses = misses
+
+
+class PollSchedule:
+    """Min-heap of ``(due_at, key)`` with per-key activity state.
+
+    Superseded heap entries are skipped lazily, so rescheduling a key is a
+    single push. :meth:`pop_due` hands out keys whose time has come and stops
+    tracking their due time until :meth:`record` or :meth:`defer` puts them
+    back; a key that is popped is never returned twice.
+    """
+
+    def __init__(self, floor: float, ceiling: float, *, utc_offset_hours: int = 0):
+        self.floor = max(1.0, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self._utc_offset = utc_offset_hours * 3600
+        self._heap: List[Tuple[float, int, str]] = []
+        self._due: Dict[str, float] = {}
+        self._slots: Dict[str, _Slot] = {}
+        self._seq = count()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._slots
+
+    def keys(self) -> Iterable[str]:
+        return self._slots.keys()
+
+    def add(
+        self,
+        key: str,
+        last_played: Optional[float] = None,
+        *,
+        misses: Optional[int] = None,
+        due: Optional[float] = None,
+        now: Optional[float] = None,
+        stagger: bool = False,
+    ) -> None:
+        """Start tracking ``key``; its first poll is due now.
+
+        ``misses``/``due`` restore a saved cursor. With ``stagger`` a key
+        without a future due time gets its first poll at a random point within
+        its interval instead, so a restart doesn't poll everyone at once.
+        """
+        now = time.time() if now is None else now
+        if misses is None:
+            misses = self._seed_misses(last_played, now)
+        self._slots[key] = _Slot(last_played, min(max(0, misses), _MAX_MISSES))
+        interval = self.interval(key, now)
+        if due is None or due <= now:
+            due = now + (random.uniform(0, interval) if stagger else 0.0)
+        else:
+            # a cursor saved under a longer interval setting
+            due = min(due, now + interval)
+        self._push(key, due)
+
+    def discard(self, key: str) -> None:
+        self._slots.pop(key, None)
+        self._due.pop(key, None)
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            at, _, key = heapq.heappop(self._heap)
+            if self._due.get(key) == at:
+                del self._due[key]
+                due.append(key)
+        return due
+
+    def next_due(self) -> Optional[float]:
+        while self._heap:
+            at, _, key = self._heap[0]
+            if self._due.get(key) == at:
+                return at
+            heapq.heappop(self._heap)
+        return None
+
+    def record(self, key: str, *, last_played: Optional[float] = None, now: Optional[float] = None) -> Optional[float]:
+        """Reschedule ``key`` after a poll and return its next due time.
+
+        ``last_played`` is the start of a newly seen match, or ``None`` when
+        the poll found nothing new.
+        """
+        slot = self._slots.get(key)
+        if slot is None:
+            return None
+        now = time.time() if now is None else now
+        if last_played is not None:
+            slot.last_played = max(slot.last_played or 0.0, last_played)
+            slot.misses = 0
+        elif slot.last_played is not None and now - slot.last_played >= SESSION_GAP:
+            slot.misses = min(slot.misses + 1, _MAX_MISSES)
+        due = now + self.interval(key, now)
+        self._push(key, due)
+        return due
+
+    def last_played(self, key: str) -> Optional[float]:
+        slot = self._slots.get(key)
+        return slot.last_played if slot is not None else None
+
+    def state(self, key: str) -> Tuple[Optional[float], int, Optional[float]]:
+        """``(last_played, misses, due)`` for persisting ``key``'s cursor."""
+        slot = self._slots[key]
+        return slot.last_played, slot.misses, self._due.get(key)
+
+    def defer(self, key: str, at: float) -> None:
+        """Put ``key`` back at ``at`` without counting a poll."""
+        if key in self._slots:
+            self._push(key, at)
+
+    def interval(self, key: str, now: Optional[float] = None) -> float:
+        slot = self._slots[key]
+        if slot.last_played is None:
+            return self.ceiling
+        now = time.time() if now is None else now
+        if now - slot.last_played < SESSION_GAP:
+            return self.floor
+        interval = self.floor * 2 ** slot.misses
+        if self._local_hour(now) in QUIET_HOURS:
+            interval *= 2
+        return min(interval, self.ceiling)
+
+    def _seed_misses(self, last_played: Optional[float], now: float) -> int:
+        # as if the key had been backing off since its session ended
+        if last_played is None or now - last_played < SESSION_GAP:
+            return 0
+        return min(int(math.log2((now - last_played) / SESSION_GAP)), _MAX_MISSES)
+
+    def _local_hour(self, now: float) -> int:
+        return int((now + self._utc_offset) // 3600) % 24
+
+    def _push(self, key: str, at: float) -> None:
+        self._due[key] = at
+        heapq.heappush(self._heap, (at, next(self._seq), key))
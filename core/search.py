@@ -0,0 +1,197 @@
+"""In-memory alias search for slash-command autocomplete.
+
+Lookups never touch SQLite: exact and prefix matches come from a sorted key
+list (a flattened prefix trie searched with :mod:`bisect`), substring matches
+from a character n-gram index. Korean names are also indexed by their initial
+consonants (초성), so typing ``ㅈㅌ`` finds ``제트``.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from itertools import islice
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+_HANGUL_FIRST = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_SYLLABLES_PER_INITIAL = 21 * 28
+_INITIALS = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+
+# match quality, best first
+EXACT, PREFIX, SUBSTRING = 0, 1, 2
+# fields in the order they break ties
+_FIELDS = ("alias_norm", "name", "tag")
+# one- and two-character prefixes match too many keys to scan per keystroke,
+# so their best ``_TOP_K`` prefix hits are precomputed
+_SHORT_PREFIX = 2
+_TOP_K = 25
+
+
+def choseong(text: str) -> str:
+    """Replace each Hangul syllable with its initial consonant; other characters are kept."""
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_FIRST <= code <= _HANGUL_LAST:
+            out.append(_INITIALS[(code - _HANGUL_FIRST) // _SYLLABLES_PER_INITIAL])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def display_key(record: Mapping[str, Any]) -> Tuple[str, str]:
+    """Sort key for the order records are listed in (``ORDER BY alias COLLATE NOCASE``)."""
+    alias = str(record.get("alias") or "")
+    return alias.lower(), alias
+
+
+def _record_keys(record: Mapping[str, Any]) -> Dict[str, int]:
+    # searchable key -> rank of the best field it came from
+    keys: Dict[str, int] = {}
+    for rank, field in enumerate(_FIELDS):
+        value = str(record.get(field) or "").strip().lower()
+        if not value:
+            continue
+        for key in (value, choseong(value)):
+            if key not in keys:
+                keys[key] = rank
+    return keys
+
+
+def _score(keys: Mapping[str, int], q: str) -> Optional[Tuple[int, int]]:
+    best: Optional[Tuple[int, int]] = None
+    for key, rank in keys.items():
+        if key == q:
+            score = (EXACT, rank)
+        elif key.startswith(q):
+            score = (PREFIX, rank)
+        elif q in key:
+            score = (SUBSTRING, rank)
+        else:
+            continue
+        if best is None or score < best:
+            best = score
+    return best
+
+
+def _grams(text: str) -> Set[str]:
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+class AliasSearchIndex:
+    """Immutable index over alias records; rebuild it when the alias set changes.
+
+    ``records`` must already be in display order (see :func:`display_key`);
+    results keep that order within the same match quality. Changes made since
+    the build can be laid over it with :meth:`search_with` until the next one.
+    """
+
+    def __init__(self, records: Sequence[Dict[str, Any]]):
+        self._records = list(records)
+        self._keys: List[Tuple[str, int, int]] = []
+        self._record_keys: List[Tuple[Tuple[str, int], ...]] = []
+        self._postings: Dict[str, Set[int]] = {}
+        self._singles: Dict[str, Set[int]] = {}
+        short: Dict[str, Dict[int, int]] = {}
+
+        for idx, record in enumerate(self._records):
+            keys = _record_keys(record)
+            self._record_keys.append(tuple(keys.items()))
+            for key, rank in keys.items():
+                self._keys.append((key, rank, idx))
+                for gram in _grams(key):
+                    self._postings.setdefault(gram, set()).add(idx)
+                for ch in key:
+                    self._singles.setdefault(ch, set()).add(idx)
+                for n in range(1, min(_SHORT_PREFIX, len(key)) + 1):
+                    hits = short.setdefault(key[:n], {})
+                    if rank < hits.get(idx, len(_FIELDS)):
+                        hits[idx] = rank
+        self._keys.sort()
+        self._short: Dict[str, Tuple[Tuple[int, int], ...]] = {
+            prefix: tuple(sorted((rank, idx) for idx, rank in hits.items())[:_TOP_K])
+            for prefix, hits in short.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def search(self, query: str | None, limit: int = 25) -> List[Dict[str, Any]]:
+        q = (query or "").strip().lower()
+        return [self._records[idx] for _, idx in self._ranked(q, limit)]
+
+    def search_with(
+        self, query: str | None, limit: int, overrides: Mapping[str, Optional[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """:meth:`search` as if ``overrides`` had been indexed too.
+
+        ``overrides`` maps ``alias_norm`` to the record's current version, or
+        to ``None`` once it was removed. It is meant to stay small: each entry
+        is scored directly rather than through the index.
+        """
+        if not overrides:
+            return self.search(query, limit)
+        q = (query or "").strip().lower()
+        # enough base hits that dropping every overridden one still leaves ``limit``
+        hits = [
+            (score, display_key(self._records[idx]), self._records[idx])
+            for score, idx in self._ranked(q, limit + len(overrides))
+            if self._records[idx].get("alias_norm") not in overrides
+        ]
+        for record in overrides.values():
+            if record is None:
+                continue
+            score = _score(_record_keys(record), q) if q else (EXACT, 0)
+            if score is not None:
+                hits.append((score, display_key(record), record))
+        hits.sort(key=lambda hit: hit[:2])
+        return [record for _, _, record in hits[:limit]]
+
+    def _ranked(self, q: str, limit: int) -> List[Tuple[Tuple[int, int], int]]:
+        # ``(score, idx)`` of the best ``limit`` records, best first
+        if not q:
+            return [((EXACT, 0), idx) for idx in range(min(limit, len(self._records)))]
+
+        best: Dict[int, Tuple[int, int]] = {}
+        start = bisect_left(self._keys, (q,))
+        if len(q) <= _SHORT_PREFIX and limit <= _TOP_K:
+            for key, rank, idx in islice(self._keys, start, None):
+                if key != q:
+                    break
+                if (EXACT, rank) < best.get(idx, (PREFIX, 0)):
+                    best[idx] = (EXACT, rank)
+            for rank, idx in self._short.get(q, ()):
+                best.setdefault(idx, (PREFIX, rank))
+        else:
+            for key, rank, idx in islice(self._keys, start, None):
+                if not key.startswith(q):
+                    break
+                score = (EXACT if key == q else PREFIX, rank)
+                if score < best.get(idx, (SUBSTRING + 1, 0)):
+                    best[idx] = score
+
+        # substring hits rank below every prefix hit, so skip them once enough prefixes matched
+        if len(best) < limit:
+            for idx in self._substring_candidates(q):
+                if idx in best:
+                    continue
+                ranks = [rank for key, rank in self._record_keys[idx] if q in key]
+                if ranks:
+                    best[idx] = (SUBSTRING, min(ranks))
+
+        ordered = sorted(best, key=lambda idx: (best[idx], idx))
+        return [(best[idx], idx) for idx in ordered[:limit]]
+
+    def _substring_candidates(self, q: str) -> Set[int]:
+        if len(q) == 1:
+            return self._singles.get(q, set())
+        candidates: Set[int] | None = None
+        for gram in sorted(_grams(q), key=lambda g: len(self._postings.get(g, ()))):
+            posting = self._postings.get(gram)
+            if not posting:
+                return set()
+            candidates = set(posting) if candidates is None else candidates & posting
+            if not candidates:
+                return set()
+        return candidates or set()
@@ -1,100 +1,665 @@
 import json
+import logging
+from contextlib import contextmanager
 import sqlite3
+import tempfile
+import threading
 import time
-from typing import Any, Dict, Iterable, List, Tuple, Optional
+import zlib
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Optional
 
-from .config import DB_FILE
-from .utils import metadata_label, team_result
+from .config import (
+    ALIAS_REFRESH_INTERVAL,
+    DB_CACHE_KB,
+    DB_FILE,
+    DB_MMAP_BYTES,
+    SUMMARY_UTC_OFFSET_HOURS,
+)
+from .models import Match, match_id_of, parse_matches
+from .search import AliasSearchIndex, display_key
 
+logger = logging.getLogger(__name__)
 
-def _connect() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_FILE)
+_local = threading.local()
+_open_conns: List[sqlite3.Connection] = []
+_conn_lock = threading.Lock()
+_generation = 0
+
+
+def _open_connection(path: Path) -> sqlite3.Connection:
+    # check_same_thread is off only so close_db() can close every thread's
+    # connection at shutdown; each connection is otherwise used by one thread.
+    conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA busy_timeout = 5000")
+    conn.execute(f"PRAGMA cache_size = -{int(DB_CACHE_KB)}")
+    conn.execute(f"PRAGMA mmap_size = {int(DB_MMAP_BYTES)}")
     return conn
 
 
-def _ensure_schema() -> None:
-    with _connect() as conn:
-        conn.executescript(
-            """
-            PRAGMA foreign_keys = ON;
-
-            CREATE TABLE IF NOT EXISTS aliases (
-                alias       TEXT NOT NULL,
-                alias_norm  TEXT NOT NULL UNIQUE,
-                name        TEXT NOT NULL,
-                tag         TEXT NOT NULL,
-                region      TEXT NOT NULL,
-                puuid       TEXT NOT NULL,
-                ts          INTEGER NOT NULL,
-                PRIMARY KEY(alias)
-            );
-
-            CREATE TABLE IF NOT EXISTS match_cache (
-                match_id   TEXT NOT NULL,
-                owner_key  TEXT NOT NULL,
-                puuid      TEXT NOT NULL,
-                map        TEXT,
-                mode       TEXT,
-                team       TEXT,
-                result     TEXT,
-                kills      INTEGER,
-                deaths     INTEGER,
-                assists    INTEGER,
-                played_at  TEXT,
-                raw_json   TEXT,
-                ts         INTEGER NOT NULL,
-                PRIMARY KEY (match_id, owner_key)
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_match_cache_owner
-            ON match_cache (owner_key, played_at DESC, ts DESC);
-
-            CREATE TABLE IF NOT EXISTS daily_summary (
-                summary_date TEXT NOT NULL,
-                owner_key    TEXT NOT NULL,
-                alias_norm   TEXT NOT NULL,
-                puuid        TEXT NOT NULL,
-                matches      INTEGER NOT NULL,
-                wins         INTEGER NOT NULL,
-                losses       INTEGER NOT NULL,
-                rr_delta     INTEGER NOT NULL,
-                kills        INTEGER NOT NULL,
-                deaths       INTEGER NOT NULL,
-                assists      INTEGER NOT NULL,
-                ts           INTEGER NOT NULL,
-                PRIMARY KEY (summary_date, owner_key)
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_daily_summary_alias
-            ON daily_summary (summary_date, alias_norm);
-
-            CREATE TABLE IF NOT EXISTS act_summary (
-                act_id    TEXT NOT NULL,
-                owner_key TEXT NOT NULL,
-                alias_norm TEXT NOT NULL,
-                puuid      TEXT NOT NULL,
-                matches    INTEGER NOT NULL,
-                wins       INTEGER NOT NULL,
-                losses     INTEGER NOT NULL,
-                rr_delta   INTEGER NOT NULL,
-                kills      INTEGER NOT NULL,
-                deaths     INTEGER NOT NULL,
-                assists    INTEGER NOT NULL,
-                ts         INTEGER NOT NULL,
-                PRIMARY KEY (act_id, owner_key)
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_act_summary_alias
-            ON act_summary (act_id, alias_norm);
-
-            CREATE TABLE IF NOT EXISTS alert_channels (
-                guild_id   INTEGER PRIMARY KEY,
-                channel_id INTEGER NOT NULL,
-                ts         INTEGER NOT NULL
-            );
-            """
+def _open_readonly(path: Path) -> Optional[sqlite3.Connection]:
+    # no pragmas: reading must neither create the file nor change its journal mode
+    if not path.exists():
+        return None
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _connect() -> sqlite3.Connection:
+    """Return this thread's long-lived connection for ``DB_FILE``.
+
+    Each thread (the database threads in :mod:`core.db`, or the caller's own
+    thread for direct use) keeps one connection, reopened when ``DB_FILE``
+    changes (tests point it at a temporary file). Use it as
+    ``with _connect() as conn:`` so each block runs in its own transaction.
+    """
+    path = Path(DB_FILE)
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.generation != _generation:
+        conn = None  # already closed by close_db()
+    if conn is None or _local.path != path:
+        if conn is not None:
+            _close(conn)
+        conn = _open_connection(path)
+        _local.conn = conn
+        _local.path = path
+        _local.generation = _generation
+        with _conn_lock:
+            _open_conns.append(conn)
+    return conn
+
+
+def _close(conn: sqlite3.Connection) -> None:
+    with _conn_lock:
+        if conn in _open_conns:
+            _open_conns.remove(conn)
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass
+    conn.close()
+
+
+def close_db() -> None:
+    """Close every thread's connection. Only call once no queries are running."""
+    global _generation
+    with _conn_lock:
+        conns = list(_open_conns)
+        _generation += 1
+    for conn in conns:
+        _close(conn)
+
+
+# --- schema migrations -------------------------------------------------------
+#
+# ``PRAGMA user_version`` records the last applied step. Each step's DDL must be
+# idempotent (databases created before the runner existed start at version 0
+# with most tables already present). A step's ``backfill`` processes one chunk
+# per call and returns how many rows it touched; it is called in its own
+# transaction until it returns 0, so large tables never hold a long write lock
+# and an interrupted backfill resumes where it stopped. The version is only
+# bumped once the backfill has finished.
+
+
+class Migration:
+    __slots__ = ("version", "name", "apply", "backfill", "report")
+
+    def __init__(
+        self,
+        version: int,
+        name: str,
+        apply: Callable[[sqlite3.Connection], None],
+        backfill: Optional[Callable[[sqlite3.Connection, int], int]] = None,
+        report: Optional[Callable[[sqlite3.Connection], Dict[str, Any]]] = None,
+    ):
+        self.version = version
+        self.name = name
+        self.apply = apply
+        self.backfill = backfill
+        self.report = report
+
+
+def _schema_v1(conn: sqlite3.Connection) -> None:
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS aliases (
+            alias       TEXT NOT NULL,
+            alias_norm  TEXT NOT NULL UNIQUE,
+            name        TEXT NOT NULL,
+            tag         TEXT NOT NULL,
+            region      TEXT NOT NULL,
+            puuid       TEXT NOT NULL,
+            ts          INTEGER NOT NULL,
+            PRIMARY KEY(alias)
+        );
+
+        CREATE TABLE IF NOT EXISTS match_cache (
+            match_id   TEXT NOT NULL,
+            owner_key  TEXT NOT NULL,
+            puuid      TEXT NOT NULL,
+            map        TEXT,
+            mode       TEXT,
+            team       TEXT,
+            result     TEXT,
+            kills      INTEGER,
+            deaths     INTEGER,
+            assists    INTEGER,
+            played_at  TEXT,
+            raw_json   TEXT,
+            ts         INTEGER NOT NULL,
+            PRIMARY KEY (match_id, owner_key)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_match_cache_owner
+        ON match_cache (owner_key, played_at DESC, ts DESC);
+
+        CREATE TABLE IF NOT EXISTS daily_summary (
+            summary_date TEXT NOT NULL,
+            owner_key    TEXT NOT NULL,
+            alias_norm   TEXT NOT NULL,
+            puuid        TEXT NOT NULL,
+            matches      INTEGER NOT NULL,
+            wins         INTEGER NOT NULL,
+            losses       INTEGER NOT NULL,
+            rr_delta     INTEGER NOT NULL,
+            kills        INTEGER NOT NULL,
+            deaths       INTEGER NOT NULL,
+            assists      INTEGER NOT NULL,
+            ts           INTEGER NOT NULL,
+            PRIMARY KEY (summary_date, owner_key)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_daily_summary_alias
+        ON daily_summary (summary_date, alias_norm);
+
+        CREATE TABLE IF NOT EXISTS act_summary (
+            act_id    TEXT NOT NULL,
+            owner_key TEXT NOT NULL,
+            alias_norm TEXT NOT NULL,
+            puuid      TEXT NOT NULL,
+            matches    INTEGER NOT NULL,
+            wins       INTEGER NOT NULL,
+            losses     INTEGER NOT NULL,
+            rr_delta   INTEGER NOT NULL,
+            kills      INTEGER NOT NULL,
+            deaths     INTEGER NOT NULL,
+            assists    INTEGER NOT NULL,
+            ts         INTEGER NOT NULL,
+            PRIMARY KEY (act_id, owner_key)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_act_summary_alias
+        ON act_summary (act_id, alias_norm);
+
+        CREATE TABLE IF NOT EXISTS alert_channels (
+            guild_id   INTEGER PRIMARY KEY,
+            channel_id INTEGER NOT NULL,
+            ts         INTEGER NOT NULL
+        );
+        """
+    )
+
+
+def _schema_v2_http_cache(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS http_cache (
+            cache_key  TEXT PRIMARY KEY,
+            body       TEXT NOT NULL,
+            expires_at INTEGER NOT NULL,
+            ts         INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def _schema_v3_match_blobs(conn: sqlite3.Connection) -> None:
+    # one compressed payload per match, shared by every owner's match_cache row
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS match_blobs (
+            match_id  TEXT PRIMARY KEY,
+            codec     TEXT NOT NULL,
+            body      BLOB NOT NULL,
+            raw_size  INTEGER NOT NULL,
+            ts        INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def _backfill_v3_match_blobs(conn: sqlite3.Connection, chunk_size: int) -> int:
+    """Move one chunk of legacy ``match_cache.raw_json`` payloads into ``match_blobs``."""
+    rows = conn.execute(
+        "SELECT rowid, match_id, raw_json FROM match_cache WHERE raw_json IS NOT NULL LIMIT ?",
+        (chunk_size,),
+    ).fetchall()
+    now = int(time.time())
+    blobs: Dict[str, Tuple[Any, ...]] = {}
+    for row in rows:
+        if row["match_id"] in blobs:
+            continue
+        try:
+            payload = json.loads(row["raw_json"])
+        except (TypeError, json.JSONDecodeError):
+            continue  # unreadable payloads were already skipped on read
+        body, raw_size = _pack_payload(payload)
+        blobs[row["match_id"]] = (row["match_id"], _BLOB_CODEC, body, raw_size, now)
+    conn.executemany(
+        """
+        INSERT INTO match_blobs (match_id, codec, body, raw_size, ts)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(match_id) DO NOTHING
+        """,
+        list(blobs.values()),
+    )
+    conn.executemany(
+        "UPDATE match_cache SET raw_json = NULL WHERE rowid = ?", [(row["rowid"],) for row in rows]
+    )
+    return len(rows)
+
+
+def _report_v3_match_blobs(conn: sqlite3.Connection) -> Dict[str, Any]:
+    stats = _match_storage_stats(conn)
+    return {"stored_bytes": stats["stored_bytes"], "saved_bytes": stats["saved_bytes"]}
+
+
+def _schema_v4_normalized(conn: sqlite3.Connection) -> None:
+    # normalized per-match data for SQL-side stats (one row per match/team/player)
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS matches (
+            match_id      TEXT PRIMARY KEY,
+            map           TEXT,
+            mode          TEXT,
+            played_at     TEXT,
+            game_start    INTEGER,
+            rounds_played INTEGER,
+            ts            INTEGER NOT NULL,
+            season_id     TEXT
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_matches_map ON matches (map);
+        CREATE INDEX IF NOT EXISTS idx_matches_game_start ON matches (game_start);
+
+        CREATE TABLE IF NOT EXISTS match_teams (
+            match_id    TEXT NOT NULL REFERENCES matches(match_id) ON DELETE CASCADE,
+            team        TEXT NOT NULL,
+            won         INTEGER,
+            rounds_won  INTEGER,
+            rounds_lost INTEGER,
+            PRIMARY KEY (match_id, team)
+        );
+
+        CREATE TABLE IF NOT EXISTS match_players (
+            match_id  TEXT NOT NULL REFERENCES matches(match_id) ON DELETE CASCADE,
+            puuid     TEXT NOT NULL,
+            name      TEXT,
+            tag       TEXT,
+            team      TEXT,
+            agent     TEXT,
+            kills     INTEGER NOT NULL,
+            deaths    INTEGER NOT NULL,
+            assists   INTEGER NOT NULL,
+            score     INTEGER NOT NULL,
+            headshots INTEGER NOT NULL,
+            bodyshots INTEGER NOT NULL,
+            legshots  INTEGER NOT NULL,
+            damage    INTEGER NOT NULL,
+            PRIMARY KEY (match_id, puuid)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_match_players_puuid ON match_players (puuid);
+        CREATE INDEX IF NOT EXISTS idx_match_players_agent ON match_players (agent);
+        """
+    )
+
+
+def _backfill_v4_normalized(conn: sqlite3.Connection, chunk_size: int) -> int:
+    """Populate the normalized tables for one chunk of blobs that predate them."""
+    rows = conn.execute(
+        """
+        SELECT b.match_id, b.codec, b.body
+        FROM match_blobs b
+        LEFT JOIN matches m ON m.match_id = b.match_id
+        WHERE m.match_id IS NULL
+        LIMIT ?
+        """,
+        (chunk_size,),
+    ).fetchall()
+    now = int(time.time())
+    parsed = []
+    for row in rows:
+        try:
+            payload = _unpack_payload(row["codec"], row["body"])
+        except (ValueError, zlib.error):
+            payload = None
+        match = Match(payload) if isinstance(payload, dict) else None
+        if match is None or match.match_id != row["match_id"]:
+            # a bare row keeps the next chunk from selecting it again
+            conn.execute(
+                "INSERT INTO matches (match_id, ts) VALUES (?, ?) ON CONFLICT(match_id) DO NOTHING",
+                (row["match_id"], now),
+            )
+            continue
+        parsed.append(match)
+    _insert_normalized(conn, parsed, now)
+    return len(rows)
+
+
+def _schema_v5_played_at_epoch(conn: sqlite3.Connection) -> None:
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(match_cache)")}
+    if "played_at_epoch" not in columns:
+        conn.execute("ALTER TABLE match_cache ADD COLUMN played_at_epoch INTEGER")
+    # played_at is a display string and doesn't sort by time
+    conn.execute("DROP INDEX IF EXISTS idx_match_cache_owner")
+    conn.execute("DROP INDEX IF EXISTS idx_matches_played_at")
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_match_cache_owner_epoch
+        ON match_cache (owner_key, played_at_epoch DESC, ts DESC)
+        """
+    )
+
+
+def _backfill_v5_played_at_epoch(conn: sqlite3.Connection, chunk_size: int) -> int:
+    """Fill ``match_cache.played_at_epoch`` from ``matches.game_start`` for one chunk."""
+    cur = conn.execute(
+        """
+        UPDATE match_cache
+        SET played_at_epoch = (
+            SELECT m.game_start FROM matches m WHERE m.match_id = match_cache.match_id
         )
+        WHERE rowid IN (
+            SELECT c.rowid
+            FROM match_cache c
+            JOIN matches m ON m.match_id = c.match_id
+            WHERE c.played_at_epoch IS NULL AND m.game_start IS NOT NULL
+            LIMIT ?
+        )
+        """,
+        (chunk_size,),
+    )
+    return max(cur.rowcount, 0)
+
+
+# a full VACUUM rewrites the whole file under an exclusive lock; at startup it
+# only runs below this size; larger files are switched offline with
+# ``migrate.py --enable-incremental-vacuum``
+_STARTUP_VACUUM_MAX_BYTES = 32 * 1024 * 1024
+
+
+def _schema_v6_auto_vacuum(conn: sqlite3.Connection) -> None:
+    # switching an existing file's auto_vacuum mode only takes effect after a full VACUUM
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    if page_size * page_count <= _STARTUP_VACUUM_MAX_BYTES:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.commit()
+        conn.execute("VACUUM")
+
+
+def _schema_v7_alias_version(conn: sqlite3.Connection) -> None:
+    # bumped on every alias change so in-memory alias registries (ours or
+    # another process's) can tell when to reload
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+
+        INSERT INTO meta (key, value) VALUES ('alias_version', 0)
+        ON CONFLICT(key) DO NOTHING;
+
+        CREATE TRIGGER IF NOT EXISTS trg_aliases_insert AFTER INSERT ON aliases
+        BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = 'alias_version';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_aliases_update AFTER UPDATE ON aliases
+        BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = 'alias_version';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_aliases_delete AFTER DELETE ON aliases
+        BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = 'alias_version';
+        END;
+        """
+    )
+
+
+def _schema_v8_season_id(conn: sqlite3.Connection) -> None:
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(matches)")}
+    if "season_id" not in columns:
+        conn.execute("ALTER TABLE matches ADD COLUMN season_id TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_season ON matches (season_id)")
+
+
+def _backfill_v8_season_id(conn: sqlite3.Connection, chunk_size: int) -> int:
+    """Read ``season_id`` out of stored payloads; ``''`` marks matches whose payload is gone."""
+    rows = conn.execute(
+        """
+        SELECT m.match_id, b.codec, b.body
+        FROM matches m
+        LEFT JOIN match_blobs b ON b.match_id = m.match_id
+        WHERE m.season_id IS NULL
+        LIMIT ?
+        """,
+        (chunk_size,),
+    ).fetchall()
+    updates = []
+    for row in rows:
+        season_id = None
+        if row["body"] is not None:
+            try:
+                payload = _unpack_payload(row["codec"], row["body"])
+            except (ValueError, zlib.error):
+                payload = None
+            if isinstance(payload, dict):
+                season_id = Match(payload).season_id
+        updates.append((season_id or "", row["match_id"]))
+    conn.executemany("UPDATE matches SET season_id = ? WHERE match_id = ?", updates)
+    return len(rows)
+
+
+# the alert poller's unit: aliases sharing a PUUID are one player (see core.poll.poll_key)
+_POLL_KEY_SQL = """
+    CASE WHEN trim(COALESCE(a.puuid, '')) <> '' THEN 'puuid:' || lower(trim(a.puuid))
+         ELSE 'alias:' || a.alias_norm END
+"""
+
+
+def _schema_v10_poll_state(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS poll_state (
+            poll_key       TEXT PRIMARY KEY,
+            last_match_id  TEXT,
+            last_played_at INTEGER,
+            misses         INTEGER NOT NULL DEFAULT 0,
+            last_polled_at INTEGER,
+            next_due_at    INTEGER
+        )
+        """
+    )
+    # seed each player's cursor from the newest match already stored for any of their aliases
+    conn.execute(
+        f"""
+        INSERT INTO poll_state (poll_key, last_match_id, last_played_at)
+        SELECT poll_key, match_id, played_at_epoch
+        FROM (
+            SELECT {_POLL_KEY_SQL} AS poll_key, c.match_id, c.played_at_epoch,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY {_POLL_KEY_SQL}
+                       ORDER BY c.played_at_epoch DESC, c.ts DESC
+                   ) AS rn
+            FROM aliases a
+            JOIN match_cache c ON c.owner_key = 'alias:' || a.alias_norm
+        )
+        WHERE rn = 1
+        ON CONFLICT(poll_key) DO NOTHING
+        """
+    )
+
+
+_SUMMARY_BACKFILL_KEY = "summary_backfill_rowid"
+
+
+def _schema_v9_summaries(conn: sqlite3.Connection) -> None:
+    # the baseline tables carry an rr_delta column; match payloads have no RR change to fill it
+    for table in ("daily_summary", "act_summary"):
+        columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if "rr_delta" in columns:
+            conn.execute(f"ALTER TABLE {table} DROP COLUMN rr_delta")
+    # start over unless an interrupted backfill left its cursor behind
+    started = conn.execute("SELECT 1 FROM meta WHERE key = ?", (_SUMMARY_BACKFILL_KEY,)).fetchone()
+    if started is None:
+        conn.execute("DELETE FROM daily_summary")
+        conn.execute("DELETE FROM act_summary")
+        conn.execute("INSERT INTO meta (key, value) VALUES (?, 0)", (_SUMMARY_BACKFILL_KEY,))
+
+
+def _backfill_v9_summaries(conn: sqlite3.Connection, chunk_size: int) -> int:
+    after = conn.execute("SELECT value FROM meta WHERE key = ?", (_SUMMARY_BACKFILL_KEY,)).fetchone()[0]
+    last, rows = _refresh_summaries_after(conn, after, chunk_size)
+    if not rows:
+        conn.execute("DELETE FROM meta WHERE key = ?", (_SUMMARY_BACKFILL_KEY,))
+        return 0
+    conn.execute("UPDATE meta SET value = ? WHERE key = ?", (last, _SUMMARY_BACKFILL_KEY))
+    return rows
+
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, "baseline schema", _schema_v1),
+    Migration(2, "http_cache table", _schema_v2_http_cache),
+    Migration(
+        3,
+        "shared compressed match_blobs",
+        _schema_v3_match_blobs,
+        _backfill_v3_match_blobs,
+        _report_v3_match_blobs,
+    ),
+    Migration(4, "normalized matches/match_teams/match_players", _schema_v4_normalized, _backfill_v4_normalized),
+    Migration(5, "match_cache.played_at_epoch", _schema_v5_played_at_epoch, _backfill_v5_played_at_epoch),
+    Migration(6, "auto_vacuum incremental", _schema_v6_auto_vacuum),
+    Migration(7, "alias version counter", _schema_v7_alias_version),
+    Migration(8, "matches.season_id", _schema_v8_season_id, _backfill_v8_season_id),
+    Migration(9, "materialize daily/act summaries", _schema_v9_summaries, _backfill_v9_summaries),
+    Migration(10, "poll_state cursors", _schema_v10_poll_state),
+)
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(conn: Optional[sqlite3.Connection] = None) -> int:
+    conn = conn or _connect()
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def stored_schema_version() -> int:
+    """``schema_version`` of ``DB_FILE`` read without creating or reconfiguring it (0 if missing)."""
+    conn = _open_readonly(Path(DB_FILE))
+    if conn is None:
+        return 0
+    try:
+        return schema_version(conn)
+    finally:
+        conn.close()
+
+
+def _run_migrations(conn: sqlite3.Connection, chunk_size: int) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    current = schema_version(conn)
+    for step in MIGRATIONS:
+        if step.version <= current:
+            continue
+        started = time.perf_counter()
+        with conn:
+            step.apply(conn)
+        rows = chunks = 0
+        if step.backfill is not None:
+            while True:
+                with conn:
+                    done = step.backfill(conn, chunk_size)
+                if not done:
+                    break
+                rows += done
+                chunks += 1
+        with conn:
+            conn.execute(f"PRAGMA user_version = {int(step.version)}")
+        result: Dict[str, Any] = {
+            "version": step.version,
+            "name": step.name,
+            "rows": rows,
+            "chunks": chunks,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        if step.report is not None:
+            result.update(step.report(conn))
+        results.append(result)
+        current = step.version
+    return results
+
+
+def migrate(*, dry_run: bool = False, chunk_size: int = 500) -> List[Dict[str, Any]]:
+    """Apply pending schema migrations to ``DB_FILE`` and report each step.
+
+    With ``dry_run`` the steps run against a throwaway copy of the database,
+    so the report shows what would change and how long it takes without
+    touching the live file: it is only opened read-only to be copied, and a
+    missing file is previewed as a new, empty database.
+    """
+    if not dry_run:
+        results = _run_migrations(_connect(), chunk_size)
+        for result in results:
+            logger.info("Applied schema migration %s", result)
+        return results
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = sqlite3.connect(Path(tmp) / "dry-run.sqlite3")
+        copy.row_factory = sqlite3.Row
+        try:
+            live = _open_readonly(Path(DB_FILE))
+            if live is not None:
+                try:
+                    live.backup(copy)
+                finally:
+                    live.close()
+            return _run_migrations(copy, chunk_size)
+        finally:
+            copy.close()
+
+
+def _ensure_schema() -> None:
+    migrate()
+
+
+_BLOB_CODEC = "zlib"
+
+
+def _pack_payload(payload: Any) -> Tuple[bytes, int]:
+    """Return the compressed body and the uncompressed JSON size in bytes."""
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, 6), len(raw)
+
+
+def _unpack_payload(codec: str, body: bytes) -> Any:
+    if codec == "zlib":
+        body = zlib.decompress(body)
+    elif codec != "json":
+        raise ValueError(f"unknown match blob codec: {codec}")
+    return json.loads(body)
 
 
 def _row_to_dict(row: sqlite3.Row | None) -> Dict[str, Any] | None:
@@ -107,6 +672,214 @@ def _norm_alias(alias: str) -> str:
     return alias.strip().lower()
 
 
+_ALIAS_COLUMNS = "alias, alias_norm, name, tag, region, puuid, ts"
+
+
+def _alias_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT value FROM meta WHERE key = 'alias_version'").fetchone()
+    return row[0] if row else 0
+
+
+class AliasRegistry:
+    """In-memory copy of the ``aliases`` table, keyed by ``alias_norm`` and ``puuid``.
+
+    ``upsert_alias``/``remove_alias`` update it write-through. The
+    ``meta.alias_version`` counter (bumped by triggers on every alias change)
+    is re-read at most every ``refresh_interval`` seconds so writes from other
+    processes sharing the database are picked up too.
+
+    A write only patches the lookups in place; the search index is rebuilt on
+    a background thread, and until it catches up the changed records are laid
+    over the previous index (see :meth:`AliasSearchIndex.search_with`).
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._path: Optional[Path] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._by_norm: Dict[str, Dict[str, Any]] = {}
+        self._by_puuid: Dict[str, Tuple[str, ...]] = {}
+        self._ordered: List[Dict[str, Any]] = []
+        self._order_keys: List[Tuple[str, str]] = []
+        self._search = AliasSearchIndex(())
+        # alias_norm -> record (None once removed) written since ``_search`` was built
+        self._unindexed: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._reindexing = False
+        self._loads = 0
+        self._pinned = False
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def needs_refresh(self) -> bool:
+        """Whether the next lookup has to touch the database."""
+        return (
+            self._path != Path(DB_FILE)
+            or self._version is None
+            or time.monotonic() - self._checked_at >= self.refresh_interval
+        )
+
+    @contextmanager
+    def cached(self) -> Iterator[bool]:
+        """Yield whether lookups can be served from memory right now.
+
+        While it yields ``True`` the copy is held as it is: lookups made in the
+        block by this thread don't refresh it even if ``refresh_interval``
+        runs out meanwhile, and other threads can't reload it. Yields ``False``
+        without waiting when another thread is reloading it.
+        """
+        if not self._lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            fresh = not self.needs_refresh()
+            pinned, self._pinned = self._pinned, fresh
+            try:
+                yield fresh
+            finally:
+                self._pinned = pinned
+        finally:
+            self._lock.release()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version = None
+
+    def refresh(self) -> None:
+        """Load (or reload) the registry now, e.g. once at startup."""
+        self.invalidate()
+        self._ensure_fresh()
+
+    def _ensure_fresh(self) -> None:
+        if not self.needs_refresh():
+            return
+        with self._lock:
+            if self._pinned or not self.needs_refresh():
+                return
+            conn = _connect()
+            version = _alias_version(conn)
+            if self._path != Path(DB_FILE) or version != self._version:
+                rows = conn.execute(f"SELECT {_ALIAS_COLUMNS} FROM aliases").fetchall()
+                self._load([_row_to_dict(r) for r in rows], version)
+            self._checked_at = time.monotonic()
+
+    def _load(self, records: List[Dict[str, Any]], version: int) -> None:
+        self._by_norm = {r["alias_norm"]: r for r in records}
+        by_puuid: Dict[str, List[str]] = {}
+        for record in records:
+            by_puuid.setdefault(record["puuid"].lower(), []).append(record["alias_norm"])
+        self._by_puuid = {k: tuple(v) for k, v in by_puuid.items()}
+        # matches ORDER BY alias COLLATE NOCASE
+        self._ordered = sorted(records, key=display_key)
+        self._order_keys = [display_key(r) for r in self._ordered]
+        self._search = AliasSearchIndex(self._ordered)
+        self._unindexed = {}
+        self._loads += 1  # an index still being built from the old records is dropped
+        self._path = Path(DB_FILE)
+        self._version = version
+
+    def _unlink(self, record: Dict[str, Any]) -> None:
+        norm = record["alias_norm"]
+        puuid = record["puuid"].lower()
+        norms = tuple(n for n in self._by_puuid.get(puuid, ()) if n != norm)
+        if norms:
+            self._by_puuid[puuid] = norms
+        else:
+            self._by_puuid.pop(puuid, None)
+        key = display_key(record)
+        idx = bisect_left(self._order_keys, key)
+        while idx < len(self._order_keys) and self._order_keys[idx] == key:
+            if self._ordered[idx]["alias_norm"] == norm:
+                del self._order_keys[idx]
+                del self._ordered[idx]
+                break
+            idx += 1
+
+    def _link(self, record: Dict[str, Any]) -> None:
+        puuid = record["puuid"].lower()
+        self._by_puuid[puuid] = self._by_puuid.get(puuid, ()) + (record["alias_norm"],)
+        key = display_key(record)
+        idx = bisect_right(self._order_keys, key)
+        self._order_keys.insert(idx, key)
+        self._ordered.insert(idx, record)
+
+    def _written(self, version: int, upsert: Optional[Dict[str, Any]] = None, removed: Optional[str] = None) -> None:
+        """Apply one committed write; falls back to a reload if another writer got in between."""
+        with self._lock:
+            if self._path != Path(DB_FILE) or self._version is None or version != self._version + 1:
+                self._version = None
+                return
+            norm = upsert["alias_norm"] if upsert is not None else removed
+            previous = self._by_norm.pop(norm, None) if norm is not None else None
+            if previous is not None:
+                self._unlink(previous)
+            if upsert is not None:
+                self._by_norm[norm] = upsert
+                self._link(upsert)
+            if norm is not None:
+                self._unindexed[norm] = upsert
+                self._reindex_later()
+            self._version = version
+
+    def _reindex_later(self) -> None:
+        # caller holds the lock
+        if self._reindexing:
+            return
+        self._reindexing = True
+        threading.Thread(target=self._reindex, name="alias-search-index", daemon=True).start()
+
+    def _reindex(self) -> None:
+        try:
+            while True:
+                with self._lock:
+                    loads = self._loads
+                    records = list(self._ordered)
+                    covered = dict(self._unindexed)
+                index = AliasSearchIndex(records)
+                with self._lock:
+                    if loads == self._loads:
+                        self._search = index
+                        for norm, record in covered.items():
+                            if norm in self._unindexed and self._unindexed[norm] is record:
+                                del self._unindexed[norm]
+                    if not self._unindexed:
+                        self._reindexing = False
+                        return
+        except Exception:
+            logger.exception("Failed to rebuild the alias search index")
+            with self._lock:
+                self._reindexing = False
+
+    def get(self, alias: str) -> Optional[Dict[str, Any]]:
+        self._ensure_fresh()
+        record = self._by_norm.get(_norm_alias(alias))
+        return dict(record) if record else None
+
+    def by_puuid(self, puuid: str) -> List[Dict[str, Any]]:
+        self._ensure_fresh()
+        by_norm = self._by_norm
+        return [dict(by_norm[n]) for n in self._by_puuid.get(puuid.strip().lower(), ()) if n in by_norm]
+
+    def all(self) -> List[Dict[str, Any]]:
+        self._ensure_fresh()
+        with self._lock:
+            ordered = list(self._ordered)
+        return [dict(r) for r in ordered]
+
+    def search(self, query: str | None, limit: int) -> List[Dict[str, Any]]:
+        """Exact, then prefix, then substring matches on alias, name or tag (초성 too)."""
+        self._ensure_fresh()
+        with self._lock:
+            index, unindexed = self._search, dict(self._unindexed)
+        return [dict(r) for r in index.search_with(query, limit, unindexed)]
+
+
+alias_registry = AliasRegistry(ALIAS_REFRESH_INTERVAL)
+
+
 def upsert_alias(alias: str, name: str, tag: str, region: str, puuid: str) -> None:
     alias_norm = _norm_alias(alias)
     now = int(time.time())
@@ -125,129 +898,135 @@ def upsert_alias(alias: str, name: str, tag: str, region: str, puuid: str) -> No
             """,
             (alias, alias_norm, name, tag, region, puuid, now),
         )
+        version = _alias_version(conn)
+        _prune_poll_state(conn)
+    record = {
+        "alias": alias,
+        "alias_norm": alias_norm,
+        "name": name,
+        "tag": tag,
+        "region": region,
+        "puuid": puuid,
+        "ts": now,
+    }
+    alias_registry._written(version, upsert=record)
 
 
 def remove_alias(alias: str) -> bool:
     alias_norm = _norm_alias(alias)
     with _connect() as conn:
         cur = conn.execute("DELETE FROM aliases WHERE alias_norm = ?", (alias_norm,))
-        return cur.rowcount > 0
+        version = _alias_version(conn)
+        _prune_poll_state(conn)
+    if cur.rowcount > 0:
+        alias_registry._written(version, removed=alias_norm)
+    return cur.rowcount > 0
 
 
 def get_alias(alias: str) -> dict | None:
-    alias_norm = _norm_alias(alias)
-    with _connect() as conn:
-        row = conn.execute(
-            """
-            SELECT alias, alias_norm, name, tag, region, puuid, ts
-            FROM aliases
-            WHERE alias_norm = ?
-            """,
-            (alias_norm,),
-        ).fetchone()
-    return _row_to_dict(row)
+    return alias_registry.get(alias)
+
+
+def aliases_for_puuid(puuid: str) -> List[Dict[str, Any]]:
+    return alias_registry.by_puuid(puuid)
 
 
 def list_aliases() -> List[Dict[str, Any]]:
-    with _connect() as conn:
-        rows = conn.execute(
-            "SELECT alias, alias_norm, name, tag, region, puuid, ts FROM aliases ORDER BY alias COLLATE NOCASE"
-        ).fetchall()
-    return [_row_to_dict(r) for r in rows]
+    return alias_registry.all()
 
 
 def search_aliases(query: str | None = None, limit: int = 25) -> List[Dict[str, Any]]:
-    q = (query or "").strip().lower()
     limit = max(1, min(25, limit or 25))
-    with _connect() as conn:
-        if q:
-            like = f"%{q}%"
-            rows = conn.execute(
-                """
-                SELECT alias, alias_norm, name, tag, region, puuid, ts
-                FROM aliases
-                WHERE alias_norm LIKE ?
-                   OR LOWER(name) LIKE ?
-                   OR LOWER(tag) LIKE ?
-                ORDER BY alias COLLATE NOCASE
-                LIMIT ?
-                """,
-                (like, like, like, limit),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                """
-                SELECT alias, alias_norm, name, tag, region, puuid, ts
-                FROM aliases
-                ORDER BY alias COLLATE NOCASE
-                LIMIT ?
-                """,
-                (limit,),
-            ).fetchall()
-    return [_row_to_dict(r) for r in rows]
+    return alias_registry.search(query, limit)
 
 
-def store_match_batch(owner_key: str, puuid: str, matches: Iterable[Dict[str, Any]]) -> int:
-    now = int(time.time())
-    rows: List[Tuple[Any, ...]] = []
-    match_ids: List[str] = []
-    for match in matches:
-        metadata = (match.get("metadata") or {}) if isinstance(match, dict) else {}
-        match_id = (
-            metadata.get("matchid")
-            or metadata.get("matchId")
-            or metadata.get("matchID")
-            or match.get("match_id")
-        )
-        if not match_id:
-            continue
+MatchBatch = Tuple[str, str, Iterable[Dict[str, Any] | Match]]
+MatchPayloads = Dict[str, Dict[str, Any]]
+# (poll_key, last_match_id, last_played_at, misses, last_polled_at, next_due_at)
+PollCursor = Tuple[str, Optional[str], Optional[int], int, Optional[int], Optional[int]]
 
-        players = ((match.get("players") or {}).get("all_players") or []) if isinstance(match, dict) else []
-        me = next((p for p in players if p.get("puuid") == puuid), None)
-        stats = (me or {}).get("stats") or {}
-        kills = stats.get("kills")
-        deaths = stats.get("deaths")
-        assists = stats.get("assists")
 
-        team = me.get("team") if me else None
-        outcome = team_result(match.get("teams"), team)
-        result = "win" if outcome is True else "loss" if outcome is False else None
+def store_match_batch(
+    owner_key: str, puuid: str, matches: Iterable[Dict[str, Any] | Match]
+) -> int:
+    matches = list(matches)
+    return len(ingest_match_batches([(owner_key, puuid, matches)], payloads=payloads_by_id(matches)))
 
-        played_at = metadata.get("game_start_patched") or metadata.get("game_start")
-        map_name = metadata_label(metadata, "map", default=None)
-        mode_name = metadata_label(metadata, "mode", default=None)
 
-        raw_json = json.dumps(match, ensure_ascii=False)
-        rows.append(
-            (
+def payloads_by_id(payloads: Iterable[Any] | None) -> MatchPayloads:
+    """Index raw match payloads by match id; anything that isn't one is skipped."""
+    indexed: MatchPayloads = {}
+    for payload in payloads or ():
+        match_id = match_id_of(payload) if isinstance(payload, dict) else None
+        if match_id:
+            indexed[match_id] = payload
+    return indexed
+
+
+def ingest_match_batches(
+    batches: Iterable[MatchBatch],
+    cursors: Iterable[PollCursor] = (),
+    payloads: Optional[MatchPayloads] = None,
+) -> set[Tuple[str, str]]:
+    """Upsert several ``(owner_key, puuid, matches)`` batches in one transaction.
+
+    ``payloads`` holds the source payload per match id for ``match_blobs``; a
+    match without one only gets its rows. ``cursors`` are alert poller
+    positions written in the same transaction, so a cursor never points past a
+    match that wasn't stored. Returns the ``(match_id, owner_key)`` keys that
+    were not stored before.
+    """
+    cursors = list(cursors)
+    payloads = payloads or {}
+    now = int(time.time())
+    rows: Dict[Tuple[str, str], Tuple[Any, ...]] = {}
+    parsed: Dict[str, Match] = {}
+    for owner_key, puuid, matches in batches:
+        for match in parse_matches(matches):
+            match_id = match.match_id
+            if not match_id:
+                continue
+
+            me = match.player(puuid)
+            kills = me.kills if me else None
+            deaths = me.deaths if me else None
+            assists = me.assists if me else None
+            team = me.team if me else None
+            result = match.outcome(me)
+
+            parsed[match_id] = match
+            rows[(match_id, owner_key)] = (
                 match_id,
                 owner_key,
                 puuid,
-                map_name,
-                mode_name,
+                match.map,
+                match.mode,
                 team,
                 result,
                 kills,
                 deaths,
                 assists,
-                played_at,
-                raw_json,
+                match.started_label,
+                match.game_start,
                 now,
             )
-        )
-        match_ids.append(match_id)
 
     if not rows:
-        return 0
+        if cursors:
+            with _connect() as conn:
+                _write_poll_state(conn, cursors)
+        return set()
 
-    unique_match_ids = list(dict.fromkeys(match_ids))
+    ids_by_owner: Dict[str, List[str]] = {}
+    for match_id, owner_key in rows:
+        ids_by_owner.setdefault(owner_key, []).append(match_id)
 
     with _connect() as conn:
-        existing_ids: set[str] = set()
-        if unique_match_ids:
-            chunk_size = 500
-            for i in range(0, len(unique_match_ids), chunk_size):
-                chunk = unique_match_ids[i : i + chunk_size]
+        existing: set[Tuple[str, str]] = set()
+        chunk_size = 500
+        for owner_key, match_ids in ids_by_owner.items():
+            for i in range(0, len(match_ids), chunk_size):
+                chunk = match_ids[i : i + chunk_size]
                 placeholders = ",".join("?" for _ in chunk)
                 query = (
                     f"SELECT match_id FROM match_cache "
@@ -255,13 +1034,37 @@ def store_match_batch(owner_key: str, puuid: str, matches: Iterable[Dict[str, An
                 )
                 params: List[Any] = [owner_key, *chunk]
                 rows_existing = conn.execute(query, params).fetchall()
-                existing_ids.update(row["match_id"] for row in rows_existing)
+                existing.update((row["match_id"], owner_key) for row in rows_existing)
+
+        # match payloads don't change once a match is over, so existing
+        # blobs and normalized rows are kept as they are
+        known_blobs = _existing_match_ids(conn, "match_blobs", parsed)
+        blob_rows = []
+        for match_id in parsed:
+            payload = payloads.get(match_id)
+            if payload is None or match_id in known_blobs:
+                continue
+            body, raw_size = _pack_payload(payload)
+            blob_rows.append((match_id, _BLOB_CODEC, body, raw_size, now))
+        conn.executemany(
+            """
+            INSERT INTO match_blobs (match_id, codec, body, raw_size, ts)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(match_id) DO NOTHING
+            """,
+            blob_rows,
+        )
+
+        known_matches = _existing_match_ids(conn, "matches", parsed)
+        _insert_normalized(
+            conn, [m for match_id, m in parsed.items() if match_id not in known_matches], now
+        )
 
         conn.executemany(
             """
             INSERT INTO match_cache (
                 match_id, owner_key, puuid, map, mode, team, result,
-                kills, deaths, assists, played_at, raw_json, ts
+                kills, deaths, assists, played_at, played_at_epoch, ts
             )
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ON CONFLICT(match_id, owner_key) DO UPDATE SET
@@ -274,13 +1077,141 @@ def store_match_batch(owner_key: str, puuid: str, matches: Iterable[Dict[str, An
                 deaths=excluded.deaths,
                 assists=excluded.assists,
                 played_at=excluded.played_at,
-                raw_json=excluded.raw_json,
+                played_at_epoch=excluded.played_at_epoch,
                 ts=excluded.ts
             """,
-            rows,
+            list(rows.values()),
+        )
+
+        new_keys = set(rows) - existing
+        _refresh_summaries(
+            conn,
+            daily={(owner_key, _summary_date(parsed[match_id].game_start)) for match_id, owner_key in new_keys},
+            acts={(owner_key, parsed[match_id].season_id) for match_id, owner_key in new_keys},
         )
-    new_rows = [mid for mid in unique_match_ids if mid not in existing_ids]
-    return len(new_rows)
+        _write_poll_state(conn, cursors)
+    return new_keys
+
+
+def _write_poll_state(conn: sqlite3.Connection, cursors: List[PollCursor]) -> None:
+    conn.executemany(
+        """
+        INSERT INTO poll_state (poll_key, last_match_id, last_played_at, misses, last_polled_at, next_due_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(poll_key) DO UPDATE SET
+            last_match_id=COALESCE(excluded.last_match_id, poll_state.last_match_id),
+            last_played_at=COALESCE(excluded.last_played_at, poll_state.last_played_at),
+            misses=excluded.misses,
+            last_polled_at=COALESCE(excluded.last_polled_at, poll_state.last_polled_at),
+            next_due_at=excluded.next_due_at
+        """,
+        cursors,
+    )
+
+
+def _prune_poll_state(conn: sqlite3.Connection) -> None:
+    """Drop cursors of players that no longer have an alias."""
+    conn.execute(
+        f"DELETE FROM poll_state WHERE poll_key NOT IN (SELECT {_POLL_KEY_SQL} FROM aliases a)"
+    )
+
+
+def load_poll_state() -> Dict[str, Dict[str, Any]]:
+    """Every stored alert poller cursor, keyed by poll key."""
+    with _connect() as conn:
+        rows = conn.execute(
+            """
+            SELECT poll_key, last_match_id, last_played_at, misses, last_polled_at, next_due_at
+            FROM poll_state
+            """
+        ).fetchall()
+    return {row["poll_key"]: _row_to_dict(row) for row in rows}
+
+
+def _existing_match_ids(
+    conn: sqlite3.Connection, table: str, match_ids: Iterable[str], chunk_size: int = 500
+) -> set[str]:
+    ids = list(match_ids)
+    found: set[str] = set()
+    for i in range(0, len(ids), chunk_size):
+        chunk = ids[i : i + chunk_size]
+        placeholders = ",".join("?" for _ in chunk)
+        found.update(
+            row["match_id"]
+            for row in conn.execute(f"SELECT match_id FROM {table} WHERE match_id IN ({placeholders})", chunk)
+        )
+    return found
+
+
+def _insert_normalized(conn: sqlite3.Connection, matches: Iterable[Match], now: int) -> None:
+    """Write the ``matches``/``match_teams``/``match_players`` rows for ``matches``."""
+    match_rows = []
+    team_rows = []
+    player_rows = []
+    for match in matches:
+        match_rows.append(
+            (
+                match.match_id,
+                match.map,
+                match.mode,
+                match.started_label,
+                match.game_start,
+                match.rounds_played,
+                match.season_id,
+                now,
+            )
+        )
+        for key, team in match.teams.items():
+            won = None if team.won is None else int(team.won)
+            team_rows.append((match.match_id, key, won, team.rounds_won, team.rounds_lost))
+        for player in match.players:
+            if not player.puuid:
+                continue
+            player_rows.append(
+                (
+                    match.match_id,
+                    player.puuid,
+                    player.name,
+                    player.tag,
+                    player.team.lower() if player.team else None,
+                    player.agent,
+                    player.kills,
+                    player.deaths,
+                    player.assists,
+                    player.score,
+                    player.headshots,
+                    player.bodyshots,
+                    player.legshots,
+                    player.damage,
+                )
+            )
+    conn.executemany(
+        """
+        INSERT INTO matches (match_id, map, mode, played_at, game_start, rounds_played, season_id, ts)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(match_id) DO NOTHING
+        """,
+        match_rows,
+    )
+    conn.executemany(
+        """
+        INSERT INTO match_teams (match_id, team, won, rounds_won, rounds_lost)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(match_id, team) DO NOTHING
+        """,
+        team_rows,
+    )
+    conn.executemany(
+        """
+        INSERT INTO match_players (
+            match_id, puuid, name, tag, team, agent, kills, deaths, assists,
+            score, headshots, bodyshots, legshots, damage
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(match_id, puuid) DO NOTHING
+        """,
+        player_rows,
+    )
 
 
 def latest_match(owner_key: str) -> Dict[str, Any] | None:
@@ -288,10 +1219,10 @@ def latest_match(owner_key: str) -> Dict[str, Any] | None:
         row = conn.execute(
             """
             SELECT match_id, owner_key, puuid, map, mode, team, result, kills, deaths,
-                   assists, played_at, raw_json, ts
+                   assists, played_at, played_at_epoch, ts
             FROM match_cache
             WHERE owner_key = ?
-            ORDER BY played_at DESC, ts DESC
+            ORDER BY played_at_epoch DESC, ts DESC
             LIMIT 1
             """,
             (owner_key,),
@@ -299,134 +1230,335 @@ def latest_match(owner_key: str) -> Dict[str, Any] | None:
     return _row_to_dict(row)
 
 
-def upsert_daily_summary(
-    summary_date: str,
+def recent_matches(
     owner_key: str,
-    alias_norm: str,
-    puuid: str,
+    limit: int = 10,
     *,
-    matches: int,
-    wins: int,
-    losses: int,
-    rr_delta: int,
-    kills: int,
-    deaths: int,
-    assists: int,
-) -> None:
-    now = int(time.time())
-    with _connect() as conn:
-        conn.execute(
-            """
-            INSERT INTO daily_summary (
-                summary_date, owner_key, alias_norm, puuid,
-                matches, wins, losses, rr_delta, kills, deaths, assists, ts
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(summary_date, owner_key) DO UPDATE SET
-                matches=excluded.matches,
-                wins=excluded.wins,
-                losses=excluded.losses,
-                rr_delta=excluded.rr_delta,
-                kills=excluded.kills,
-                deaths=excluded.deaths,
-                assists=excluded.assists,
-                ts=excluded.ts
-            """,
-            (
-                summary_date,
-                owner_key,
-                alias_norm,
-                puuid,
-                matches,
-                wins,
-                losses,
-                rr_delta,
-                kills,
-                deaths,
-                assists,
-                now,
-            ),
-        )
+    mode: str | None = None,
+    map_name: str | None = None,
+    since: int | None = None,
+) -> List[Dict[str, Any]]:
+    """Return the stored raw match payloads for ``owner_key``, newest first.
 
-
-def fetch_daily_summary(summary_date: str) -> List[Dict[str, Any]]:
+    ``since`` keeps only matches that started at or after that epoch second.
+    """
+    clauses = ["c.owner_key = ?"]
+    params: List[Any] = [owner_key]
+    if since is not None:
+        clauses.append("c.played_at_epoch >= ?")
+        params.append(since)
+    if mode:
+        clauses.append("LOWER(c.mode) = LOWER(?)")
+        params.append(mode)
+    if map_name:
+        clauses.append("LOWER(c.map) = LOWER(?)")
+        params.append(map_name)
+    params.append(max(1, limit))
     with _connect() as conn:
         rows = conn.execute(
-            """
-            SELECT summary_date, owner_key, alias_norm, puuid,
-                   matches, wins, losses, rr_delta, kills, deaths, assists, ts
-            FROM daily_summary
-            WHERE summary_date = ?
-            ORDER BY wins DESC, matches DESC, alias_norm ASC
+            f"""
+            SELECT b.codec, b.body
+            FROM match_cache c
+            JOIN match_blobs b ON b.match_id = c.match_id
+            WHERE {" AND ".join(clauses)}
+            ORDER BY c.played_at_epoch DESC, c.ts DESC
+            LIMIT ?
             """,
-            (summary_date,),
+            params,
         ).fetchall()
-    return [_row_to_dict(r) for r in rows]
+    matches: List[Dict[str, Any]] = []
+    for row in rows:
+        try:
+            matches.append(_unpack_payload(row["codec"], row["body"]))
+        except (ValueError, zlib.error):
+            continue
+    return matches
 
 
-def upsert_act_summary(
-    act_id: str,
-    owner_key: str,
-    alias_norm: str,
-    puuid: str,
+def match_storage_stats() -> Dict[str, int]:
+    """Compare stored blob bytes with one uncompressed payload per owner row."""
+    with _connect() as conn:
+        return _match_storage_stats(conn)
+
+
+def _match_storage_stats(conn: sqlite3.Connection) -> Dict[str, int]:
+    row = conn.execute(
+        """
+        SELECT
+            (SELECT COUNT(*) FROM match_cache) AS rows,
+            (SELECT COUNT(*) FROM match_blobs) AS blobs,
+            (SELECT COALESCE(SUM(b.raw_size), 0)
+               FROM match_cache c JOIN match_blobs b ON b.match_id = c.match_id) AS raw_bytes,
+            (SELECT COALESCE(SUM(length(body)), 0) FROM match_blobs) AS stored_bytes
+        """
+    ).fetchone()
+    stats = _row_to_dict(row)
+    stats["saved_bytes"] = stats["raw_bytes"] - stats["stored_bytes"]
+    return stats
+
+
+# summary rollups
+#
+# daily_summary / act_summary hold competitive totals per owner and local day
+# or act. They are recomputed from match_cache for exactly the (owner, day) and
+# (owner, act) pairs that gain new matches, inside the ingesting transaction,
+# and read back by /최근전적요약 through fetch_summary_totals.
+# Local days are cut at one offset, used both here and as the SQL date()
+# modifier of the full rebuild, so the two paths can't disagree.
+
+_SUMMARY_MODE = "competitive"
+_SUMMARY_OFFSET_MINUTES = round(SUMMARY_UTC_OFFSET_HOURS * 60)
+_SUMMARY_TZ = timezone(timedelta(minutes=_SUMMARY_OFFSET_MINUTES))
+_SUMMARY_SQL_OFFSET = f"{_SUMMARY_OFFSET_MINUTES:+d} minutes"
+
+
+def _summary_date(epoch: Optional[int]) -> Optional[str]:
+    if epoch is None:
+        return None
+    try:
+        return datetime.fromtimestamp(epoch, _SUMMARY_TZ).date().isoformat()
+    except (OverflowError, OSError, ValueError):
+        return None  # not a seconds epoch (e.g. milliseconds); left out of the daily rollup
+
+
+def _day_bounds(summary_date: str) -> Tuple[int, int]:
+    start = datetime.fromisoformat(summary_date).replace(tzinfo=_SUMMARY_TZ)
+    return int(start.timestamp()), int((start + timedelta(days=1)).timestamp())
+
+
+def _alias_norm_of(owner_key: str) -> str:
+    return owner_key.split(":", 1)[1] if owner_key.startswith("alias:") else owner_key
+
+
+_SUMMARY_COLUMNS = """
+    MAX(c.puuid)                      AS puuid,
+    COUNT(*)                          AS matches,
+    COALESCE(SUM(c.result = 'win'), 0)  AS wins,
+    COALESCE(SUM(c.result = 'loss'), 0) AS losses,
+    COALESCE(SUM(c.kills), 0)         AS kills,
+    COALESCE(SUM(c.deaths), 0)        AS deaths,
+    COALESCE(SUM(c.assists), 0)       AS assists
+"""
+
+
+def _refresh_summaries(
+    conn: sqlite3.Connection,
     *,
-    matches: int,
-    wins: int,
-    losses: int,
-    rr_delta: int,
-    kills: int,
-    deaths: int,
-    assists: int,
+    daily: Iterable[Tuple[str, Optional[str]]] = (),
+    acts: Iterable[Tuple[str, Optional[str]]] = (),
 ) -> None:
     now = int(time.time())
-    with _connect() as conn:
-        conn.execute(
-            """
-            INSERT INTO act_summary (
-                act_id, owner_key, alias_norm, puuid,
-                matches, wins, losses, rr_delta, kills, deaths, assists, ts
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(act_id, owner_key) DO UPDATE SET
-                matches=excluded.matches,
-                wins=excluded.wins,
-                losses=excluded.losses,
-                rr_delta=excluded.rr_delta,
-                kills=excluded.kills,
-                deaths=excluded.deaths,
-                assists=excluded.assists,
-                ts=excluded.ts
+    for owner_key, summary_date in daily:
+        if not summary_date:
+            continue
+        start, end = _day_bounds(summary_date)
+        row = conn.execute(
+            f"""
+            SELECT {_SUMMARY_COLUMNS}
+            FROM match_cache c
+            WHERE c.owner_key = ? AND c.played_at_epoch >= ? AND c.played_at_epoch < ?
+              AND LOWER(c.mode) = ?
             """,
-            (
-                act_id,
-                owner_key,
-                alias_norm,
-                puuid,
-                matches,
-                wins,
-                losses,
-                rr_delta,
-                kills,
-                deaths,
-                assists,
-                now,
-            ),
+            (owner_key, start, end, _SUMMARY_MODE),
+        ).fetchone()
+        _write_summary(conn, "daily_summary", "summary_date", summary_date, owner_key, row, now)
+    for owner_key, act_id in acts:
+        if not act_id:
+            continue
+        row = conn.execute(
+            f"""
+            SELECT {_SUMMARY_COLUMNS}
+            FROM match_cache c
+            JOIN matches m ON m.match_id = c.match_id
+            WHERE c.owner_key = ? AND m.season_id = ? AND LOWER(c.mode) = ?
+            """,
+            (owner_key, act_id, _SUMMARY_MODE),
+        ).fetchone()
+        _write_summary(conn, "act_summary", "act_id", act_id, owner_key, row, now)
+
+
+def _write_summary(
+    conn: sqlite3.Connection,
+    table: str,
+    key_column: str,
+    key: str,
+    owner_key: str,
+    row: sqlite3.Row,
+    now: int,
+) -> None:
+    if not row or not row["matches"]:
+        conn.execute(f"DELETE FROM {table} WHERE {key_column} = ? AND owner_key = ?", (key, owner_key))
+        return
+    conn.execute(
+        f"""
+        INSERT INTO {table} (
+            {key_column}, owner_key, alias_norm, puuid,
+            matches, wins, losses, kills, deaths, assists, ts
         )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT({key_column}, owner_key) DO UPDATE SET
+            puuid=excluded.puuid,
+            matches=excluded.matches,
+            wins=excluded.wins,
+            losses=excluded.losses,
+            kills=excluded.kills,
+            deaths=excluded.deaths,
+            assists=excluded.assists,
+            ts=excluded.ts
+        """,
+        (
+            key,
+            owner_key,
+            _alias_norm_of(owner_key),
+            row["puuid"],
+            row["matches"],
+            row["wins"],
+            row["losses"],
+            row["kills"],
+            row["deaths"],
+            row["assists"],
+            now,
+        ),
+    )
 
 
-def fetch_act_summary(act_id: str) -> List[Dict[str, Any]]:
+def _refresh_summaries_after(
+    conn: sqlite3.Connection, after_rowid: int, limit: int, owner_key: Optional[str] = None
+) -> Tuple[int, int]:
+    """Recompute the rollups the next ``limit`` match_cache rows (by rowid) fall into.
+
+    Returns the last rowid seen and how many rows were read; a pair spanning
+    several chunks is simply recomputed again.
+    """
+    where, params = ("AND c.owner_key = ?", [owner_key]) if owner_key else ("", [])
+    rows = conn.execute(
+        f"""
+        SELECT c.rowid AS rid, c.owner_key,
+               date(c.played_at_epoch, 'unixepoch', ?) AS summary_date, m.season_id
+        FROM match_cache c
+        LEFT JOIN matches m ON m.match_id = c.match_id
+        WHERE c.rowid > ? {where}
+        ORDER BY c.rowid
+        LIMIT ?
+        """,
+        [_SUMMARY_SQL_OFFSET, after_rowid, *params, max(1, limit)],
+    ).fetchall()
+    _refresh_summaries(
+        conn,
+        daily={(r["owner_key"], r["summary_date"]) for r in rows},
+        acts={(r["owner_key"], r["season_id"]) for r in rows},
+    )
+    return (rows[-1]["rid"] if rows else after_rowid), len(rows)
+
+
+def rebuild_summaries(owner_key: Optional[str] = None, chunk_size: int = 500) -> Dict[str, int]:
+    """Recompute every daily/act rollup (optionally for one owner) from match_cache.
+
+    Runs in ``chunk_size``-row transactions so a full rebuild never holds the
+    write lock for long.
+    """
+    where, params = ("WHERE owner_key = ?", [owner_key]) if owner_key else ("", [])
+    conn = _connect()
+    with conn:
+        conn.execute(f"DELETE FROM daily_summary {where}", params)
+        conn.execute(f"DELETE FROM act_summary {where}", params)
+    after = 0
+    while True:
+        with conn:
+            after, rows = _refresh_summaries_after(conn, after, chunk_size, owner_key)
+        if not rows:
+            break
+    return {
+        "daily": conn.execute(f"SELECT COUNT(*) FROM daily_summary {where}", params).fetchone()[0],
+        "acts": conn.execute(f"SELECT COUNT(*) FROM act_summary {where}", params).fetchone()[0],
+    }
+
+
+def fetch_summary_totals(owner_key: str, act_id: Optional[str] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Today's and ``act_id``'s competitive rollups for ``owner_key``; ``None`` where nothing is stored."""
+    columns = "matches, wins, losses, kills, deaths, assists"
     with _connect() as conn:
-        rows = conn.execute(
-            """
-            SELECT act_id, owner_key, alias_norm, puuid,
-                   matches, wins, losses, rr_delta, kills, deaths, assists, ts
-            FROM act_summary
-            WHERE act_id = ?
-            ORDER BY rr_delta DESC, wins DESC, alias_norm ASC
-            """,
-            (act_id,),
-        ).fetchall()
-    return [_row_to_dict(r) for r in rows]
+        today = conn.execute(
+            f"SELECT {columns} FROM daily_summary WHERE summary_date = ? AND owner_key = ?",
+            (_summary_date(int(time.time())), owner_key),
+        ).fetchone()
+        act = None
+        if act_id:
+            act = conn.execute(
+                f"SELECT {columns} FROM act_summary WHERE act_id = ? AND owner_key = ?",
+                (act_id, owner_key),
+            ).fetchone()
+    return {"today": _row_to_dict(today), "act": _row_to_dict(act)}
+
+
+class AlertRouteTable:
+    """In-memory copy of ``alert_channels`` used to route every match alert.
+
+    Loaded on first use and kept current write-through by
+    ``set_alert_channel``/``remove_alert_channel``, so delivering an alert
+    never queries SQLite. Writes swap in a new mapping instead of mutating the
+    current one, so readers iterate whatever snapshot they picked up without
+    taking the lock.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._path: Optional[Path] = None
+        self._routes: Dict[int, Dict[str, Any]] = {}
+        self._pinned = False
+
+    def needs_load(self) -> bool:
+        return self._path != Path(DB_FILE)
+
+    @contextmanager
+    def cached(self) -> Iterator[bool]:
+        """Like :meth:`AliasRegistry.cached`: whether lookups can skip the database now."""
+        if not self._lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            loaded = not self.needs_load()
+            pinned, self._pinned = self._pinned, loaded
+            try:
+                yield loaded
+            finally:
+                self._pinned = pinned
+        finally:
+            self._lock.release()
+
+    def _ensure_loaded(self) -> None:
+        if not self.needs_load():
+            return
+        with self._lock:
+            if self._pinned or not self.needs_load():
+                return
+            rows = _connect().execute("SELECT guild_id, channel_id, ts FROM alert_channels").fetchall()
+            self._routes = {row["guild_id"]: _row_to_dict(row) for row in rows}
+            self._path = Path(DB_FILE)
+
+    def _written(self, guild_id: int, record: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            if self.needs_load():
+                return  # loads the committed state on first use
+            routes = dict(self._routes)
+            if record is None:
+                routes.pop(guild_id, None)
+            else:
+                routes[guild_id] = record
+            self._routes = routes
+
+    def get(self, guild_id: int) -> Optional[int]:
+        self._ensure_loaded()
+        record = self._routes.get(guild_id)
+        return record["channel_id"] if record else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        routes = self._routes
+        return [dict(routes[guild_id]) for guild_id in sorted(routes)]
+
+
+alert_routes = AlertRouteTable()
 
 
 def set_alert_channel(guild_id: int, channel_id: int) -> None:
@@ -442,27 +1574,191 @@ def set_alert_channel(guild_id: int, channel_id: int) -> None:
             """,
             (guild_id, channel_id, now),
         )
+    alert_routes._written(guild_id, {"guild_id": guild_id, "channel_id": channel_id, "ts": now})
 
 
 def remove_alert_channel(guild_id: int) -> None:
     with _connect() as conn:
         conn.execute("DELETE FROM alert_channels WHERE guild_id = ?", (guild_id,))
+    alert_routes._written(guild_id)
 
 
 def get_alert_channel(guild_id: int) -> Optional[int]:
-    with _connect() as conn:
-        row = conn.execute(
-            "SELECT channel_id FROM alert_channels WHERE guild_id = ?", (guild_id,)
-        ).fetchone()
-    return row[0] if row else None
+    return alert_routes.get(guild_id)
 
 
 def list_alert_channels() -> List[Dict[str, Any]]:
+    return alert_routes.all()
+
+
+# retention / maintenance; each call handles at most ``limit`` rows so the
+# background task can interleave with regular writes
+
+
+def prune_match_payloads(before: int, limit: int = 500) -> int:
+    """Drop stored payloads of matches that started before ``before`` (epoch seconds).
+
+    The slim ``match_cache`` and normalized rows are kept; blobs no owner row
+    references any more are dropped regardless of age.
+    """
     with _connect() as conn:
-        rows = conn.execute(
-            "SELECT guild_id, channel_id, ts FROM alert_channels ORDER BY guild_id"
-        ).fetchall()
-    return [_row_to_dict(r) for r in rows]
+        cur = conn.execute(
+            """
+            DELETE FROM match_blobs
+            WHERE match_id IN (
+                SELECT b.match_id
+                FROM match_blobs b
+                LEFT JOIN matches m ON m.match_id = b.match_id
+                WHERE COALESCE(m.game_start, b.ts) < ?
+                   OR NOT EXISTS (SELECT 1 FROM match_cache c WHERE c.match_id = b.match_id)
+                LIMIT ?
+            )
+            """,
+            (before, max(1, limit)),
+        )
+    return max(cur.rowcount, 0)
+
+
+def prune_match_rows(before: int, limit: int = 500) -> int:
+    """Drop per-owner and normalized rows of matches that started before ``before``."""
+    with _connect() as conn:
+        cur = conn.execute(
+            """
+            DELETE FROM match_cache
+            WHERE rowid IN (
+                SELECT rowid FROM match_cache WHERE COALESCE(played_at_epoch, ts) < ? LIMIT ?
+            )
+            """,
+            (before, max(1, limit)),
+        )
+        deleted = max(cur.rowcount, 0)
+        # match_teams / match_players follow through ON DELETE CASCADE
+        cur = conn.execute(
+            """
+            DELETE FROM matches
+            WHERE match_id IN (
+                SELECT match_id FROM matches WHERE COALESCE(game_start, ts) < ? LIMIT ?
+            )
+            """,
+            (before, max(1, limit)),
+        )
+        deleted += max(cur.rowcount, 0)
+    return deleted
 
 
-_ensure_schema()
+def prune_oldest_matches(limit: int = 500) -> int:
+    """Size-cap fallback: drop the oldest payloads, then the oldest match rows."""
+    with _connect() as conn:
+        cur = conn.execute(
+            """
+            DELETE FROM match_blobs
+            WHERE match_id IN (
+                SELECT b.match_id
+                FROM match_blobs b
+                LEFT JOIN matches m ON m.match_id = b.match_id
+                ORDER BY COALESCE(m.game_start, b.ts)
+                LIMIT ?
+            )
+            """,
+            (max(1, limit),),
+        )
+        if cur.rowcount > 0:
+            return cur.rowcount
+        cur = conn.execute(
+            """
+            DELETE FROM match_cache
+            WHERE rowid IN (
+                SELECT rowid FROM match_cache ORDER BY COALESCE(played_at_epoch, ts) LIMIT ?
+            )
+            """,
+            (max(1, limit),),
+        )
+        deleted = max(cur.rowcount, 0)
+        cur = conn.execute(
+            """
+            DELETE FROM matches
+            WHERE match_id IN (
+                SELECT m.match_id FROM matches m
+                WHERE NOT EXISTS (SELECT 1 FROM match_cache c WHERE c.match_id = m.match_id)
+                LIMIT ?
+            )
+            """,
+            (max(1, limit),),
+        )
+    return deleted + max(cur.rowcount, 0)
+
+
+def prune_http_cache(before: int, limit: int = 500) -> int:
+    """Drop cached responses written before ``before`` (kept past expiry for stale fallback)."""
+    with _connect() as conn:
+        cur = conn.execute(
+            "DELETE FROM http_cache WHERE rowid IN (SELECT rowid FROM http_cache WHERE ts < ? LIMIT ?)",
+            (before, max(1, limit)),
+        )
+    return max(cur.rowcount, 0)
+
+
+def database_size() -> Dict[str, int]:
+    """Page usage of ``DB_FILE``; ``used_bytes`` excludes free pages awaiting vacuum."""
+    conn = _connect()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {
+        "auto_vacuum": conn.execute("PRAGMA auto_vacuum").fetchone()[0],
+        "page_size": page_size,
+        "pages": page_count,
+        "free_pages": free_pages,
+        "file_bytes": page_count * page_size,
+        "used_bytes": (page_count - free_pages) * page_size,
+    }
+
+
+def enable_incremental_vacuum() -> bool:
+    """Switch a database the migration left in full auto_vacuum mode; returns whether it ran.
+
+    This is the one-off full VACUUM the v6 migration skips for large files.
+    It rewrites the whole file under an exclusive lock, so it only runs from
+    ``migrate.py --enable-incremental-vacuum`` while the bot is stopped.
+    """
+    conn = _connect()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def incremental_vacuum(pages: int) -> int:
+    """Return up to ``pages`` free pages to the filesystem; returns how many were freed."""
+    conn = _connect()
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if before:
+        # executescript steps the pragma to completion; execute() frees a single page
+        conn.executescript(f"PRAGMA incremental_vacuum({max(1, int(pages))})")
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def get_cached_response(cache_key: str) -> Dict[str, Any] | None:
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT cache_key, body, expires_at, ts FROM http_cache WHERE cache_key = ?",
+            (cache_key,),
+        ).fetchone()
+    return _row_to_dict(row)
+
+
+def put_cached_response(cache_key: str, body: str, expires_at: int) -> None:
+    now = int(time.time())
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO http_cache (cache_key, body, expires_at, ts)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                body=excluded.body,
+                expires_at=excluded.expires_at,
+                ts=excluded.ts
+            """,
+            (cache_key, body, expires_at, now),
+        )
@@ -6,6 +6,8 @@ from typing import Any, Dict, Optional
 ALIAS_REGISTRATION_PROMPT = (
     "별명을 입력해 주세요. 먼저 `/별명등록` 명령으로 Riot ID를 등록할 수 있습니다."
 )
+STALE_DATA_NOTICE = "⚠️ Valorant API 응답이 없어 저장된 기록을 표시합니다."
+CACHED_DATA_NOTICE = "저장된 기록 기준입니다."
 
 REGIONS = {"ap","kr","eu","na","br","latam"}
 _COOLDOWN_SEC = 5
@@ -78,7 +80,7 @@ def metadata_label(
     return candidate or default
 
 
-def _as_int(value: Any) -> Optional[int]:
+def as_int(value: Any) -> Optional[int]:
     if isinstance(value, bool):
         return int(value)
     if isinstance(value, (int, float)):
@@ -122,8 +124,8 @@ def team_outcome_from_entry(entry: Mapping[str, Any] | None) -> Optional[bool]:
         result = _coerce_boolish(entry.get("won"))
 
     if result is None:
-        rounds_won = _as_int(entry.get("rounds_won"))
-        rounds_lost = _as_int(entry.get("rounds_lost"))
+        rounds_won = as_int(entry.get("rounds_won"))
+        rounds_lost = as_int(entry.get("rounds_lost"))
         if rounds_won is not None and rounds_lost is not None:
             if rounds_won > rounds_lost:
                 result = True
@@ -133,40 +135,15 @@ def team_outcome_from_entry(entry: Mapping[str, Any] | None) -> Optional[bool]:
     return result
 
 
-def _register_team_entry(
-    registry: Dict[str, Mapping[str, Any]], key: Any, entry: Mapping[str, Any]
-) -> None:
-    if key is None:
-        return
-
-    key_str = str(key)
-    if not key_str:
-        return
-
-    base = clean_text(key_str)
-    if not base:
-        return
-
-    variants = {key_str, base, base.lower(), base.upper(), base.capitalize()}
-    for variant in variants:
-        if variant:
-            registry[variant] = entry
-
-
-def team_result(teams: Mapping[str, Any] | None, team_name: Optional[str]) -> Optional[bool]:
-    if not team_name:
-        return None
-
-    team_clean = clean_text(team_name)
-    if not team_clean:
-        return None
-
+def team_entries(teams: Mapping[str, Any] | Sequence[Any] | None) -> Dict[str, Mapping[str, Any]]:
+    """Map each team's cleaned name to its entry for dict- or list-shaped ``teams``."""
     entries: Dict[str, Mapping[str, Any]] = {}
 
     if isinstance(teams, Mapping):
         for key, value in teams.items():
-            if isinstance(value, Mapping):
-                _register_team_entry(entries, key, value)
+            name = clean_text(str(key)) if key is not None else ""
+            if name and isinstance(value, Mapping):
+                entries[name] = value
     elif isinstance(teams, Sequence) and not isinstance(teams, (str, bytes, bytearray)):
         for value in teams:
             if not isinstance(value, Mapping):
@@ -181,35 +158,22 @@ def team_result(teams: Mapping[str, Any] | None, team_name: Optional[str]) -> Op
             )
             for candidate in key_candidates:
                 if candidate:
-                    _register_team_entry(entries, candidate, value)
+                    name = clean_text(str(candidate))
+                    if name:
+                        entries[name] = value
                     break
-    else:
-        return None
 
-    if not entries:
-        return None
+    return entries
+
 
-    candidates = (
-        team_name,
-        team_clean,
-        team_clean.lower(),
-        team_clean.upper(),
-        team_clean.capitalize(),
-    )
-
-    for key in candidates:
-        if not key:
-            continue
-        entry = entries.get(key)
-        if not entry:
-            continue
-        result = team_outcome_from_entry(entry)
-        if result is not None:
-            return result
+def team_result(teams: Mapping[str, Any] | None, team_name: Optional[str]) -> Optional[bool]:
+    team_clean = clean_text(team_name)
+    if not team_clean:
+        return None
 
     target = team_clean.lower()
-    for key, value in entries.items():
-        if clean_text(str(key)).lower() == target:
+    for key, value in team_entries(teams).items():
+        if key.lower() == target:
             result = team_outcome_from_entry(value)
             if result is not None:
                 return result
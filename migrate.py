@@ -0,0 +1,47 @@
+"""Apply (or preview) pending SQLite schema migrations.
+
+Usage: python migrate.py [--dry-run] [--chunk-size N] [--enable-incremental-vacuum]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+from core import store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="run against a temporary copy of the database")
+    parser.add_argument("--chunk-size", type=int, default=500, help="rows per backfill transaction")
+    parser.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="switch a large database to incremental auto_vacuum (a full VACUUM; stop the bot first)",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-8s %(name)s %(message)s")
+
+    print(f"{store.DB_FILE}: schema version {store.stored_schema_version()} (latest {store.SCHEMA_VERSION})")
+    report = store.migrate(dry_run=args.dry_run, chunk_size=max(1, args.chunk_size))
+    if not report:
+        print("Nothing to migrate.")
+    for step in report:
+        extra = {k: v for k, v in step.items() if k not in ("version", "name", "rows", "chunks", "seconds")}
+        print(
+            f"{'would apply' if args.dry_run else 'applied'} v{step['version']} {step['name']}: "
+            f"{step['rows']} rows in {step['chunks']} chunks, {step['seconds']:.3f}s"
+            + (f" {extra}" if extra else "")
+        )
+    if args.enable_incremental_vacuum and not args.dry_run:
+        started = time.perf_counter()
+        if store.enable_incremental_vacuum():
+            print(f"switched to incremental auto_vacuum in {time.perf_counter() - started:.1f}s")
+        else:
+            print("incremental auto_vacuum is already enabled.")
+    store.close_db()
+
+
+if __name__ == "__main__":
+    main()
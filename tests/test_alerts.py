@@ -0,0 +1,335 @@
+import asyncio
+import sqlite3
+import time
+import unittest
+from unittest import mock
+
+import discord
+
+from cogs import alerts
+from cogs.alerts import AlertCog
+from core import api
+from core.models import Match
+
+
+def _payload(match_id: str, *puuids: str) -> dict:
+    return {
+        "metadata": {"matchid": match_id, "map": "Ascent", "mode": "Competitive", "game_start": 1700000000},
+        "players": {
+            "all_players": [
+                {"puuid": puuid, "name": puuid, "tag": "KR1", "team": "Red", "stats": {"kills": 1}}
+                for puuid in puuids
+            ]
+        },
+        "teams": [{"team": "red", "has_won": True, "rounds_won": 13, "rounds_lost": 5}],
+    }
+
+
+def _fetched(match_id: str, *puuids: str) -> tuple:
+    payload = _payload(match_id, *puuids)
+    return Match.from_payload(payload), payload
+
+
+class _IdleBot:
+    async def wait_until_ready(self) -> None:
+        await asyncio.Event().wait()
+
+
+class AlertSweepTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.cog = AlertCog(_IdleBot())
+        self.cog._bootstrapped = True
+        self.addCleanup(self.cog.cog_unload)
+        patcher = mock.patch.object(alerts, "match_ingest")
+        self.ingest = patcher.start()
+        self.ingest.flush = mock.AsyncMock(return_value=True)
+        self.addCleanup(patcher.stop)
+
+    async def test_sweep_bounds_concurrency_and_records_metrics(self) -> None:
+        aliases = [{"alias_norm": f"a{i}", "name": "n", "tag": "t"} for i in range(10)]
+        active = peak = 0
+
+        async def process(key, entries, found):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            if key == "alias:a3":
+                raise RuntimeError("boom")
+            return None
+
+        with mock.patch.object(alerts, "ALERT_POLL_CONCURRENCY", 3), mock.patch.object(
+            alerts, "list_aliases", mock.AsyncMock(return_value=aliases)
+        ), mock.patch.object(self.cog, "_poll_player", process):
+            await self.cog._sweep()
+
+        self.assertEqual(peak, 3)
+        metrics = self.cog.metrics
+        self.assertEqual(metrics["sweeps"], 1)
+        self.assertEqual(metrics["last_polled"], 10)
+        self.assertEqual(metrics["last_errors"], 1)
+        # every alias went back into the schedule, none of them due yet
+        self.assertEqual(len(self.cog.schedule), 10)
+        self.assertEqual(self.cog.schedule.pop_due(), [])
+
+    async def test_shared_match_is_polled_per_puuid_and_announced_once(self) -> None:
+        aliases = [
+            {"alias": "a", "alias_norm": "a", "name": "A", "tag": "KR1", "puuid": "P1"},
+            {"alias": "a2", "alias_norm": "a2", "name": "A", "tag": "KR1", "puuid": "p1"},
+            {"alias": "b", "alias_norm": "b", "name": "B", "tag": "KR1", "puuid": "p2"},
+            {"alias": "c", "alias_norm": "c", "name": "C", "tag": "KR1", "puuid": "p3"},
+        ]
+        shared = _fetched("m-1", "p1", "p2", "p3")
+        self.cog.schedule.add("puuid:p3", 1700000000 - 60, now=1700000000 + 10**6, stagger=False)
+        self.cog.schedule.pop_due(10**10)  # p3 isn't due this sweep
+        probe = mock.AsyncMock(return_value="m-1")
+        fetch = mock.AsyncMock(return_value=shared)
+        self.ingest.submit = mock.AsyncMock(return_value=1)
+        dispatch = mock.AsyncMock()
+
+        with mock.patch.object(alerts, "list_aliases", mock.AsyncMock(return_value=aliases)), mock.patch.object(
+            alerts, "latest_match_id", probe
+        ), mock.patch.object(alerts, "fetch_match", fetch), mock.patch.object(self.cog, "_dispatch_alert", dispatch):
+            await self.cog._sweep()
+
+        self.assertEqual(probe.await_count, 2)  # p1 (two aliases) and p2; p3 wasn't due
+        self.assertEqual(fetch.await_count, 1)  # the shared match is downloaded once
+        self.assertEqual(
+            sorted(call.args[0] for call in self.ingest.submit.call_args_list),
+            ["alias:a", "alias:a2", "alias:b", "alias:c"],
+        )
+        cursors = {call.args[0]: call.args for call in self.ingest.save_cursor.call_args_list}
+        self.assertEqual(set(cursors), {"puuid:p1", "puuid:p2", "puuid:p3"})
+        self.assertEqual(cursors["puuid:p3"][1], "m-1")
+        self.assertIsNone(cursors["puuid:p3"][4])  # p3 wasn't polled
+        dispatch.assert_awaited_once()
+        embed = dispatch.await_args.args[0]
+        self.assertEqual(embed.title, "a / a2, b, c 최신 경기")
+        self.assertEqual(self.cog._last_seen["puuid:p3"], "m-1")
+        self.assertEqual(self.cog.metrics["last_alerts"], 1)
+
+    async def test_new_matches_are_stored_in_one_flush_and_announced_together(self) -> None:
+        aliases = [
+            {"alias": f"a{i}", "alias_norm": f"a{i}", "name": "A", "tag": "KR1", "puuid": f"p{i}"} for i in range(3)
+        ]
+        queued = []
+
+        def submit(*args, **kwargs):
+            future = asyncio.get_running_loop().create_future()
+            queued.append(future)
+            return future
+
+        async def flush():
+            # nothing resolves on a timer; the sweep has to flush itself
+            for future in queued:
+                future.set_result(1)
+            return True
+
+        self.ingest.submit = mock.Mock(side_effect=submit)
+        self.ingest.flush = mock.AsyncMock(side_effect=flush)
+        probe = mock.AsyncMock(side_effect=lambda region, puuid, name, tag: f"m-{puuid}")
+        fetch = mock.AsyncMock(side_effect=lambda match_id: _fetched(match_id, match_id[2:]))
+        dispatch = mock.AsyncMock()
+
+        with mock.patch.object(alerts, "list_aliases", mock.AsyncMock(return_value=aliases)), mock.patch.object(
+            alerts, "latest_match_id", probe
+        ), mock.patch.object(alerts, "fetch_match", fetch), mock.patch.object(self.cog, "_dispatch_alert", dispatch):
+            await asyncio.wait_for(self.cog._sweep(), timeout=5)
+
+        self.ingest.flush.assert_awaited_once()
+        self.assertEqual(dispatch.await_count, 3)
+        self.assertEqual(self.cog._last_seen, {f"puuid:p{i}": f"m-p{i}" for i in range(3)})
+
+    async def test_full_match_is_downloaded_only_when_the_probe_finds_a_new_id(self) -> None:
+        entries = [{"alias": "a", "alias_norm": "a", "name": "A", "tag": "KR1", "puuid": "p1"}]
+        self.cog._last_seen["puuid:p1"] = "m-1"
+        fetch = mock.AsyncMock(return_value=_fetched("m-2", "p1"))
+
+        probe = mock.AsyncMock(side_effect=["m-1", "m-2"])
+        with mock.patch.object(alerts, "latest_match_id", probe), mock.patch.object(alerts, "fetch_match", fetch):
+            self.assertIsNone(await self.cog._poll_player("puuid:p1", entries, {}))
+            fetch.assert_not_awaited()
+            self.ingest.mark_checked.assert_called_once_with("alias:a")
+
+            seen = await self.cog._poll_player("puuid:p1", entries, {})
+
+        self.assertEqual(seen.match_id, "m-2")
+        fetch.assert_awaited_once_with("m-2")
+        # marked seen by _announce once stored, not by the poll
+        self.assertEqual(self.cog._last_seen["puuid:p1"], "m-1")
+
+    async def test_falls_back_to_the_full_fetch_when_the_probe_fails(self) -> None:
+        entries = [{"alias": "a", "alias_norm": "a", "name": "A", "tag": "KR1", "puuid": "p1"}]
+        probe = mock.AsyncMock(side_effect=alerts.HTTPStatusError("not found", 404))
+
+        with mock.patch.object(alerts, "latest_match_id", probe), mock.patch.object(
+            self.cog, "_fetch_latest", mock.AsyncMock(return_value=_fetched("m-3", "p1"))
+        ), mock.patch.object(alerts, "fetch_match", mock.AsyncMock()) as fetch:
+            seen = await self.cog._poll_player("puuid:p1", entries, {})
+
+        self.assertEqual(seen.match_id, "m-3")
+        fetch.assert_not_awaited()
+
+    async def test_falls_back_to_the_full_fetch_when_the_probe_lists_nothing(self) -> None:
+        entries = [{"alias": "a", "alias_norm": "a", "name": "A", "tag": "KR1", "puuid": "p1"}]
+        self.cog._last_seen["puuid:p1"] = "m-3"
+        latest = mock.AsyncMock(return_value=_fetched("m-4", "p1"))
+
+        with mock.patch.object(api, "http_get", mock.AsyncMock(return_value={"data": []})), mock.patch.object(
+            self.cog, "_fetch_latest", latest
+        ):
+            seen = await self.cog._poll_player("puuid:p1", entries, {})
+            self.assertEqual(seen.match_id, "m-4")
+
+            # nothing new either way
+            latest.return_value = _fetched("m-3", "p1")
+            self.assertIsNone(await self.cog._poll_player("puuid:p1", entries, {}))
+
+        self.assertEqual(latest.await_count, 2)
+
+    async def test_stalled_ingest_times_out_and_the_retry_still_alerts(self) -> None:
+        players = {"puuid:p1": [{"alias": "a", "alias_norm": "a", "name": "A", "tag": "KR1", "puuid": "p1"}]}
+        self.cog.schedule.add("puuid:p1")
+        match, payload = _fetched("m-1", "p1")
+        dispatch = mock.AsyncMock()
+        self.ingest.submit = mock.Mock(side_effect=lambda *args, **kwargs: asyncio.Event().wait())
+
+        with mock.patch.object(alerts, "ALERT_INGEST_TIMEOUT", 0.01), mock.patch.object(
+            self.cog, "_dispatch_alert", dispatch
+        ):
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.cog._announce(match, payload, {"puuid:p1"}, players)
+            dispatch.assert_not_awaited()
+
+            # the queued rows landed meanwhile, so the retry stores nothing new
+            self.ingest.submit = mock.AsyncMock(return_value=0)
+            await self.cog._announce(match, payload, {"puuid:p1"}, players)
+
+        dispatch.assert_awaited_once()
+        self.assertEqual(self.cog._unannounced, set())
+
+    async def test_failed_announce_leaves_the_match_unseen_for_the_next_poll(self) -> None:
+        entries = [{"alias": "a", "alias_norm": "a", "name": "A", "tag": "KR1", "puuid": "p1"}]
+        self.cog._last_seen["puuid:p1"] = "m-1"
+        failed = asyncio.get_running_loop().create_future()
+        failed.set_exception(sqlite3.OperationalError("database is locked"))
+        self.ingest.submit = mock.Mock(return_value=failed)
+        dispatch = mock.AsyncMock()
+
+        fetch = mock.AsyncMock(return_value=_fetched("m-2", "p1"))
+
+        with mock.patch.object(alerts, "list_aliases", mock.AsyncMock(return_value=entries)), mock.patch.object(
+            alerts, "latest_match_id", mock.AsyncMock(return_value="m-2")
+        ), mock.patch.object(alerts, "fetch_match", fetch), mock.patch.object(self.cog, "_dispatch_alert", dispatch):
+            await self.cog._sweep()
+            self.assertEqual(self.cog.metrics["last_errors"], 1)
+            self.assertEqual(self.cog._last_seen["puuid:p1"], "m-1")
+
+            self.ingest.submit = mock.AsyncMock(return_value=1)
+            self.cog.schedule.defer("puuid:p1", 0)
+            await self.cog._sweep()
+
+        dispatch.assert_awaited_once()
+        self.assertEqual(self.cog._last_seen["puuid:p1"], "m-2")
+
+    async def test_restores_cursors_from_one_query(self) -> None:
+        self.cog._bootstrapped = False
+        aliases = [
+            {"alias_norm": "a", "puuid": "p1"},
+            {"alias_norm": "a2", "puuid": "P1"},
+            {"alias_norm": "new", "puuid": "p9"},
+        ]
+        due = time.time() + 30
+        state = {
+            "puuid:p1": {
+                "last_match_id": "m-7",
+                "last_played_at": int(time.time()) - 60,
+                "misses": 0,
+                "last_polled_at": None,
+                "next_due_at": due,
+            }
+        }
+        with mock.patch.object(alerts, "list_aliases", mock.AsyncMock(return_value=aliases)), mock.patch.object(
+            alerts, "load_poll_state", mock.AsyncMock(return_value=state)
+        ) as load:
+            await self.cog._restore_cursors()
+
+        load.assert_awaited_once()
+        self.assertTrue(self.cog._bootstrapped)
+        self.assertEqual(self.cog._last_seen, {"puuid:p1": "m-7"})
+        self.assertEqual(self.cog.schedule.state("puuid:p1"), (state["puuid:p1"]["last_played_at"], 0, due))
+        self.assertIn("puuid:p9", self.cog.schedule)
+
+    async def test_tick_skips_while_previous_sweep_runs(self) -> None:
+        release = asyncio.Event()
+        self.cog._sweep_task = asyncio.create_task(release.wait())
+        self.cog.bot.wait_until_ready = mock.AsyncMock()
+
+        await self.cog.poll_matches.coro(self.cog)
+
+        self.assertEqual(self.cog.metrics["overlaps"], 1)
+        release.set()
+        await self.cog._sweep_task
+
+
+class AlertDispatchTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.cog = AlertCog(_IdleBot())
+        self.addCleanup(self.cog.cog_unload)
+        self.guilds = {}
+        self.cog.bot.get_guild = self.guilds.get
+
+    def _guild(self, guild_id: int, channel=None) -> mock.Mock:
+        guild = mock.Mock()
+        guild.get_channel.return_value = channel
+        guild.fetch_channel = mock.AsyncMock(return_value=channel)
+        self.guilds[guild_id] = guild
+        return guild
+
+    async def test_channels_are_sent_to_concurrently_and_in_order_per_channel(self) -> None:
+        active = peak = 0
+        sent = []
+
+        def channel(name: str) -> mock.Mock:
+            async def send(embed):
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                sent.append((name, embed.title))
+                active -= 1
+
+            return mock.Mock(spec=discord.TextChannel, send=send)
+
+        self._guild(1, channel("one"))
+        self._guild(2, channel("two"))
+        routes = [{"guild_id": 1, "channel_id": 10, "ts": 0}, {"guild_id": 2, "channel_id": 20, "ts": 0}]
+
+        with mock.patch.object(alerts, "list_alert_channels", mock.AsyncMock(return_value=routes)):
+            await asyncio.gather(
+                self.cog._dispatch_alert(discord.Embed(title="a")),
+                self.cog._dispatch_alert(discord.Embed(title="b")),
+            )
+
+        self.assertEqual(peak, 2)  # one send per channel at a time
+        self.assertEqual([title for name, title in sent if name == "one"], ["a", "b"])
+        self.assertEqual(len(sent), 4)
+
+    async def test_forbidden_channels_are_negatively_cached_until_the_route_changes(self) -> None:
+        guild = self._guild(1)
+        guild.fetch_channel.side_effect = discord.Forbidden(mock.Mock(status=403, reason="Forbidden"), "no access")
+        route = {"guild_id": 1, "channel_id": 10, "ts": 5}
+
+        with mock.patch.object(alerts, "list_alert_channels", mock.AsyncMock(return_value=[route])) as routes:
+            await self.cog._dispatch_alert(discord.Embed(title="a"))
+            await self.cog._dispatch_alert(discord.Embed(title="b"))
+            self.assertEqual(guild.fetch_channel.await_count, 1)
+
+            routes.return_value = [dict(route, ts=6)]
+            await self.cog._dispatch_alert(discord.Embed(title="c"))
+            self.assertEqual(guild.fetch_channel.await_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from core import api, db, store
+from core.cache import ResponseCache
+from core.config import HENRIK_BASE
+from core.http import HTTPStatusError
+
+
+class FetchPlayerInfoTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self._original_db_file = store.DB_FILE
+        store.DB_FILE = Path(self._tmpdir.name) / "bot.sqlite3"
+        store._ensure_schema()
+
+    async def asyncTearDown(self) -> None:
+        await db.run_write(lambda: None)
+        store.DB_FILE = self._original_db_file
+
+    async def test_uses_puuid_endpoints_when_known(self) -> None:
+        calls = []
+
+        async def fake_get(url, **kwargs):
+            calls.append(url)
+            if "/account/" in url:
+                return {"data": {"puuid": "p-1"}}
+            return {"data": {"current_data": {"currenttierpatched": "Gold 1"}}}
+
+        with mock.patch.object(api, "http_get", fake_get):
+            info = await api.fetch_player_info("name", "tag", region="ap", puuid="p-1")
+
+        self.assertEqual(info["puuid"], "p-1")
+        self.assertEqual(info["current_mmr"]["currenttierpatched"], "Gold 1")
+        self.assertTrue(all("/by-puuid/" in url for url in calls))
+
+    async def test_falls_back_to_riot_id_when_puuid_unknown(self) -> None:
+        calls = []
+
+        async def fake_get(url, **kwargs):
+            calls.append(url)
+            if "/by-puuid/" in url:
+                raise HTTPStatusError("not found", 404)
+            if "/account/" in url:
+                return {"data": {"puuid": "p-2"}}
+            return {"data": {}}
+
+        with mock.patch.object(api, "http_get", fake_get):
+            info = await api.fetch_player_info("name", "tag", region="ap", puuid="old")
+
+        self.assertEqual(info["puuid"], "p-2")
+        self.assertIn(f"{HENRIK_BASE}/v1/account/name/tag", calls)
+
+    async def test_cached_player_info_reads_response_cache_only(self) -> None:
+        cache = ResponseCache(max_entries=10, max_bytes=4096)
+        cache.put(f"{HENRIK_BASE}/v1/by-puuid/account/p-3", {"data": {"puuid": "p-3"}}, "{}", 60)
+
+        with mock.patch.object(api, "response_cache", cache), mock.patch.object(
+            api, "http_get", side_effect=AssertionError("no requests")
+        ):
+            self.assertIsNone(await api.cached_player_info("p-3", region="ap"))
+            cache.put(f"{HENRIK_BASE}/v2/by-puuid/mmr/ap/p-3", {"data": {}}, "{}", -1)
+            info = await api.cached_player_info("p-3", region="ap")
+
+        self.assertEqual(info["puuid"], "p-3")
+        self.assertTrue(info["cached"])
+        self.assertTrue(info["cache_expired"])
+        # expiry alone isn't an outage
+        self.assertFalse(info["stale"])
+
+    async def test_latest_match_id_uses_the_stored_matches_list(self) -> None:
+        calls = []
+
+        async def fake_get(url, **kwargs):
+            calls.append((url, kwargs.get("params")))
+            if "/stored-matches/" in url:
+                return {"data": [{"meta": {"id": "m-9", "map": {"name": "Ascent"}}, "stats": {}}]}
+            return {"data": {"metadata": {"matchid": "m-9"}, "players": {"all_players": []}}}
+
+        with mock.patch.object(api, "http_get", fake_get):
+            self.assertEqual(await api.latest_match_id("ap", puuid="p-1"), "m-9")
+            self.assertEqual(await api.latest_match_id("ap", name="name", tag="tag"), "m-9")
+            match, payload = await api.fetch_match("m-9")
+
+        self.assertEqual(calls[0], (f"{HENRIK_BASE}/v1/by-puuid/stored-matches/ap/p-1", {"size": "1"}))
+        self.assertEqual(calls[1][0], f"{HENRIK_BASE}/v1/stored-matches/ap/name/tag")
+        self.assertEqual(calls[2][0], f"{HENRIK_BASE}/v2/match/m-9")
+        self.assertEqual(match.match_id, "m-9")
+        self.assertEqual(payload["metadata"]["matchid"], "m-9")
+
+
+if __name__ == "__main__":
+    unittest.main()
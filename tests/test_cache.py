@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from core import db, store
+from core.cache import ResponseCache, cache_key, ttl_for
+from core.config import HENRIK_BASE
+
+
+class ResponseCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self._original_db_file = store.DB_FILE
+        store.DB_FILE = Path(self._tmpdir.name) / "bot.sqlite3"
+        store._ensure_schema()
+
+    async def asyncTearDown(self) -> None:
+        await db.run_write(lambda: None)
+        store.DB_FILE = self._original_db_file
+
+    async def test_entries_survive_memory_eviction(self) -> None:
+        cache = ResponseCache(max_entries=1, max_bytes=1024)
+        cache.put("a", {"v": 1}, '{"v": 1}', 60)
+        cache.put("b", {"v": 2}, '{"v": 2}', 60)
+        await db.run_write(lambda: None)  # wait for the queued disk writes
+
+        self.assertIsNone(cache.get("a"))
+        entry = await cache.lookup("a")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.payload, {"v": 1})
+        self.assertEqual(cache.stats()["disk_hits"], 1)
+        self.assertEqual(cache.stats()["evictions"], 2)
+
+    async def test_short_lived_entries_stay_in_memory(self) -> None:
+        cache = ResponseCache(max_entries=1, max_bytes=1024, persist_min_ttl=300)
+        cache.put("matches", {"v": 1}, '{"v": 1}', 30)
+        cache.put("account", {"v": 2}, '{"v": 2}', 3600)
+        await db.run_write(lambda: None)
+
+        self.assertIsNone(await db.get_cached_response("matches"))
+        self.assertIsNotNone(await db.get_cached_response("account"))
+
+    async def test_expired_entries_only_returned_when_stale_allowed(self) -> None:
+        cache = ResponseCache(max_entries=10, max_bytes=1024)
+        cache.put("a", {"v": 1}, '{"v": 1}', -1)
+
+        self.assertIsNone(await cache.lookup("a"))
+        self.assertIsNotNone(await cache.lookup("a", allow_stale=True))
+
+    def test_ttl_policy_and_key(self) -> None:
+        self.assertGreater(ttl_for(f"{HENRIK_BASE}/v1/account/a/b"), ttl_for(f"{HENRIK_BASE}/v3/matches/ap/a/b"))
+        self.assertEqual(ttl_for("https://example.test/"), 0)
+        self.assertEqual(cache_key("u", {"size": 1, "mode": "x"}), "u?mode=x&size=1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from core import db, store
+
+
+class AsyncStoreTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self._original_db_file = store.DB_FILE
+        store.DB_FILE = Path(self._tmpdir.name) / "bot.sqlite3"
+        store._ensure_schema()
+
+    async def asyncTearDown(self) -> None:
+        await db.shutdown()
+        store.DB_FILE = self._original_db_file
+
+    async def test_round_trip_runs_on_database_threads(self) -> None:
+        await db.upsert_alias("Friend", "name", "tag", "ap", "puuid-1")
+
+        record = await db.get_alias("friend")
+        self.assertEqual(record["puuid"], "puuid-1")
+
+        thread_name = await db.run_read(lambda: threading.current_thread().name)
+        self.assertNotEqual(thread_name, threading.current_thread().name)
+        writer_name = await db.run_write(lambda: threading.current_thread().name)
+        self.assertTrue(writer_name.startswith("db-writer"))
+
+    async def test_expired_alias_registry_reloads_off_the_event_loop(self) -> None:
+        await db.upsert_alias("Friend", "name", "tag", "ap", "puuid-1")
+        await db.get_alias("friend")
+        connect = store._connect
+        threads = []
+
+        def recording_connect():
+            threads.append(threading.current_thread().name)
+            return connect()
+
+        with mock.patch.object(store, "_connect", recording_connect), mock.patch.object(
+            store.alias_registry, "_checked_at", 0.0
+        ):
+            record = await db.get_alias("friend")
+
+        self.assertEqual(record["puuid"], "puuid-1")
+        self.assertTrue(threads)
+        self.assertNotIn(threading.current_thread().name, threads)
+
+    async def test_held_alias_registry_does_not_reload_midway(self) -> None:
+        await db.upsert_alias("Friend", "name", "tag", "ap", "puuid-1")
+        await db.get_alias("friend")
+
+        with store.alias_registry.cached() as fresh, mock.patch.object(store, "_connect") as connect:
+            store.alias_registry._checked_at = 0.0
+            self.assertTrue(fresh)
+            self.assertEqual(store.get_alias("friend")["puuid"], "puuid-1")
+        connect.assert_not_called()
+        self.assertTrue(store.alias_registry.needs_refresh())
+
+
+if __name__ == "__main__":
+    unittest.main()
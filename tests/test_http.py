@@ -0,0 +1,194 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from core import http
+from core.cache import CacheEntry, ResponseCache
+from core.config import HENRIK_BASE
+from core.http import (
+    CircuitBreaker,
+    Priority,
+    RateLimiter,
+    RequestScheduler,
+    UpstreamError,
+    _retry_after,
+    _Ticket,
+)
+
+
+class RateLimiterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_tokens_are_consumed_until_empty(self) -> None:
+        limiter = RateLimiter(2, 60)
+
+        self.assertEqual(limiter.delay(), 0)
+        limiter.take()
+        limiter.take()
+        self.assertGreater(limiter.delay(), 25)
+
+    def test_reserve_holds_back_tokens(self) -> None:
+        limiter = RateLimiter(10, 60)
+        for _ in range(7):
+            limiter.take()
+
+        self.assertEqual(limiter.delay(), 0)
+        self.assertGreater(limiter.delay(reserve=3), 0)
+
+    async def test_exhausted_headers_pause_bucket(self) -> None:
+        limiter = RateLimiter(30, 60)
+        limiter.observe({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "12"})
+
+        self.assertGreater(limiter.delay(), 11)
+
+    def test_retry_after_prefers_header(self) -> None:
+        self.assertEqual(_retry_after({"Retry-After": "7"}, 1.0), 7.0)
+        self.assertEqual(_retry_after({}, 3.0), 3.0)
+
+
+class RequestSchedulerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_interactive_jumps_ahead_of_background(self) -> None:
+        limiter = RateLimiter(20, 1)
+        for _ in range(20):
+            limiter.take()
+        scheduler = RequestScheduler(limiter, {})
+        order = []
+
+        async def request(priority: Priority) -> None:
+            await scheduler.acquire(_Ticket(priority))
+            order.append(priority)
+
+        background = [asyncio.create_task(request(Priority.BACKGROUND)) for _ in range(3)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(request(Priority.INTERACTIVE))
+        await asyncio.gather(interactive, *background)
+
+        self.assertEqual(order[0], Priority.INTERACTIVE)
+        stats = scheduler.stats()
+        self.assertEqual(stats["background"]["granted"], 3)
+        self.assertEqual(stats["interactive"]["depth"], 0)
+
+    async def test_retried_ticket_keeps_its_place(self) -> None:
+        limiter = RateLimiter(20, 1)
+        scheduler = RequestScheduler(limiter, {})
+        retried = _Ticket(Priority.BACKGROUND)
+        await scheduler.acquire(retried)
+        for _ in range(int(limiter.tokens)):
+            limiter.take()
+        order = []
+
+        async def request(ticket: _Ticket) -> None:
+            await scheduler.acquire(ticket)
+            order.append(ticket)
+
+        later = [_Ticket(Priority.BACKGROUND) for _ in range(2)]
+        tasks = [asyncio.create_task(request(ticket)) for ticket in later]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request(retried)))
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(order, [retried, *later])
+
+    async def test_promoted_ticket_is_served_first(self) -> None:
+        limiter = RateLimiter(20, 1)
+        for _ in range(20):
+            limiter.take()
+        scheduler = RequestScheduler(limiter, {})
+        order = []
+
+        async def request(ticket: _Ticket) -> None:
+            await scheduler.acquire(ticket)
+            order.append(ticket)
+
+        tickets = [_Ticket(Priority.BACKGROUND) for _ in range(3)]
+        tasks = [asyncio.create_task(request(ticket)) for ticket in tickets]
+        await asyncio.sleep(0)
+        scheduler.promote(tickets[2], Priority.INTERACTIVE)
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(order, [tickets[2], tickets[0], tickets[1]])
+        self.assertEqual(scheduler.stats()["background"]["depth"], 0)
+
+
+class SingleFlightTests(unittest.IsolatedAsyncioTestCase):
+    async def test_identical_requests_share_one_fetch(self) -> None:
+        calls = []
+
+        async def fake_fetch(url, *, params=None, headers=None, ticket=None):
+            calls.append((url, params))
+            await asyncio.sleep(0.01)
+            return {"data": url}, "{}"
+
+        with mock.patch.object(http, "_fetch", fake_fetch):
+            results = await asyncio.gather(
+                http.http_get("https://example.test/a", params={"size": "1"}),
+                http.http_get("https://example.test/a", params={"size": "1"}),
+                http.http_get("https://example.test/b"),
+            )
+
+        self.assertEqual(len(calls), 2)
+        self.assertIs(results[0], results[1])
+        self.assertEqual(http._inflight, {})
+
+    async def test_uncached_request_does_not_join_a_cached_one(self) -> None:
+        url = f"{HENRIK_BASE}/v2/mmr/ap/name/tag"
+        cache = ResponseCache(max_entries=10, max_bytes=1024)
+
+        async def disk_hit(key, *, allow_stale=False):
+            await asyncio.sleep(0.01)  # still in flight when the uncached call arrives
+            return CacheEntry({"data": "cached"}, float("inf"), 10)
+
+        async def fake_fetch(url, *, params=None, headers=None, ticket=None):
+            return {"data": "fresh"}, "{}"
+
+        with mock.patch.object(http, "response_cache", cache), mock.patch.object(
+            cache, "lookup", disk_hit
+        ), mock.patch.object(cache, "put"), mock.patch.object(http, "_fetch", fake_fetch):
+            cached, forced = await asyncio.gather(http.http_get(url), http.http_get(url, cache=False))
+
+        self.assertEqual((cached["data"], forced["data"]), ("cached", "fresh"))
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def test_opens_after_threshold_and_probes_once(self) -> None:
+        breaker = CircuitBreaker(2, 0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, "half_open")
+        self.assertFalse(breaker.allow())
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+    def test_open_circuit_rejects_until_timeout(self) -> None:
+        breaker = CircuitBreaker(1, 60)
+        breaker.record_failure()
+
+        self.assertTrue(breaker.is_open())
+        self.assertFalse(breaker.allow())
+        self.assertGreater(breaker.retry_in(), 50)
+
+
+class StaleFallbackTests(unittest.IsolatedAsyncioTestCase):
+    async def test_expired_entry_served_when_upstream_fails(self) -> None:
+        url = f"{HENRIK_BASE}/v2/mmr/ap/name/tag"
+        cache = ResponseCache(max_entries=10, max_bytes=1024)
+        cache._remember(url, CacheEntry({"data": {"rr": 1}}, 0, 10))
+
+        async def failing_fetch(url, *, params=None, headers=None, ticket=None):
+            raise UpstreamError("down")
+
+        with mock.patch.object(http, "response_cache", cache), mock.patch.object(http, "_fetch", failing_fetch):
+            payload = await http.http_get(url, allow_stale=True)
+            with self.assertRaises(UpstreamError):
+                await http.http_get(url)
+
+        self.assertTrue(http.is_stale(payload))
+        self.assertEqual(payload["data"], {"rr": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
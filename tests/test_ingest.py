@@ -0,0 +1,152 @@
+import asyncio
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from core import db, store
+from core.ingest import MatchIngestQueue
+from core.models import Match
+
+
+def _match(match_id: str) -> dict:
+    return {"metadata": {"matchid": match_id, "game_start": 1}, "players": {"all_players": []}}
+
+
+class MatchIngestQueueTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self._original_db_file = store.DB_FILE
+        store.DB_FILE = Path(self._tmpdir.name) / "bot.sqlite3"
+        store._ensure_schema()
+
+    async def asyncTearDown(self) -> None:
+        await db.shutdown()
+        store.DB_FILE = self._original_db_file
+
+    async def test_coalesced_rows_count_as_new_once(self) -> None:
+        queue = MatchIngestQueue(max_batch=100, flush_delay=60)
+        first = queue.submit("friend", "puuid-1", [_match("m1"), _match("m2")])
+        second = queue.submit("friend", "puuid-1", [_match("m2"), _match("m3")])
+        self.assertEqual(queue.pending(), 3)
+
+        await queue.close()
+
+        self.assertEqual(await first, 2)
+        self.assertEqual(await second, 1)
+        self.assertEqual(len(await db.recent_matches("friend", 10)), 3)
+
+    async def test_size_threshold_flushes_without_waiting(self) -> None:
+        await db.store_match_batch("friend", "puuid-1", [_match("m1")])
+        queue = MatchIngestQueue(max_batch=2, flush_delay=60)
+        pending = queue.submit("friend", "puuid-1", [_match("m1"), _match("m2")])
+
+        self.assertEqual(await pending, 1)
+        self.assertEqual(queue.pending(), 0)
+
+    async def test_checked_owner_is_fresh_only_after_flush(self) -> None:
+        queue = MatchIngestQueue(max_batch=100, flush_delay=60)
+        pending = queue.submit("friend", "puuid-1", [_match("m1")], checked=True)
+        self.assertFalse(queue.checked_within("friend", 60))
+
+        await queue.flush()
+
+        self.assertEqual(await pending, 1)
+        self.assertTrue(queue.checked_within("friend", 60))
+        self.assertFalse(queue.checked_within("other", 60))
+
+    async def test_cursors_flush_with_pending_rows(self) -> None:
+        await db.upsert_alias("Friend", "name", "tag", "ap", "puuid-1")
+        queue = MatchIngestQueue(max_batch=100, flush_delay=60)
+        pending = queue.submit("alias:friend", "puuid-1", [_match("m1")])
+        queue.save_cursor("puuid:puuid-1", "m1", 1.5, 0, 10.0, 130.0)
+        queue.save_cursor("puuid:puuid-1", "m1", 1.5, 1, 10.0, 250.0)
+
+        await queue.flush()
+
+        self.assertEqual(await pending, 1)
+        cursor = (await db.load_poll_state())["puuid:puuid-1"]
+        self.assertEqual((cursor["last_match_id"], cursor["misses"], cursor["next_due_at"]), ("m1", 1, 250))
+
+    async def test_payloads_passed_alongside_parsed_matches_are_stored(self) -> None:
+        queue = MatchIngestQueue(max_batch=100, flush_delay=60)
+        payload = _match("m1")
+        with_payload = queue.submit("friend", "puuid-1", [Match.from_payload(payload)], payloads=[payload])
+        without = queue.submit("friend", "puuid-1", [Match.from_payload(_match("m2"))])
+
+        await queue.flush()
+
+        self.assertEqual((await with_payload, await without), (1, 1))
+        with store._connect() as conn:
+            blobs = {row["match_id"] for row in conn.execute("SELECT match_id FROM match_blobs")}
+        self.assertEqual(blobs, {"m1"})
+
+    async def test_rows_submitted_during_a_flush_are_flushed_by_the_next_pass(self) -> None:
+        started, release = threading.Event(), threading.Event()
+        ingest = store.ingest_match_batches
+
+        def gated(*args):
+            started.set()
+            release.wait(5)
+            return ingest(*args)
+
+        queue = MatchIngestQueue(max_batch=100, flush_delay=0)
+        with mock.patch.object(store, "ingest_match_batches", gated):
+            first = queue.submit("friend", "puuid-1", [_match("m1")])
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            # the timer armed here fires while the first flush is still writing
+            second = queue.submit("friend", "puuid-1", [_match("m2")])
+            queue.save_cursor("puuid:puuid-1", "m2", None, 0, None, None)
+            await asyncio.sleep(0.05)
+            release.set()
+
+            self.assertEqual(await asyncio.wait_for(first, 5), 1)
+            self.assertEqual(await asyncio.wait_for(second, 5), 1)
+            await asyncio.wait_for(queue._flushing, 5)
+        self.assertEqual((queue.pending(), queue._cursors), (0, {}))
+
+    async def test_failed_flush_keeps_rows_and_cursors_queued(self) -> None:
+        queue = MatchIngestQueue(max_batch=100, flush_delay=60)
+        pending = queue.submit("friend", "puuid-1", [_match("m1")])
+        queue.save_cursor("puuid:puuid-1", "m1", None, 0, None, None)
+
+        with mock.patch.object(store, "ingest_match_batches", side_effect=sqlite3.OperationalError("locked")):
+            self.assertFalse(await queue.flush())
+        with self.assertRaises(sqlite3.OperationalError):
+            await pending
+        self.assertEqual((queue.pending(), list(queue._cursors)), (1, ["puuid:puuid-1"]))
+        self.assertIsNotNone(queue._timer)
+
+        self.assertTrue(await queue.flush())
+        self.assertEqual(len(await db.recent_matches("friend", 10)), 1)
+
+
+    async def test_bad_row_is_dropped_without_holding_up_the_rest(self) -> None:
+        queue = MatchIngestQueue(max_batch=100, flush_delay=60)
+        ingest = store.ingest_match_batches
+
+        def picky(batches, cursors=(), payloads=None):
+            batches = list(batches)
+            if any(match.match_id == "bad" for _, _, matches in batches for match in matches):
+                raise ValueError("year 55840 is out of range")
+            return ingest(batches, cursors, payloads)
+
+        good = queue.submit("friend", "puuid-1", [_match("m1"), _match("m2")])
+        bad = queue.submit("friend", "puuid-1", [_match("bad")])
+        queue.save_cursor("puuid:puuid-1", "m2", None, 0, None, None)
+        with mock.patch.object(store, "ingest_match_batches", picky):
+            self.assertTrue(await queue.flush())
+
+        self.assertEqual(await good, 2)
+        with self.assertRaises(ValueError):
+            await bad
+        self.assertEqual((queue.pending(), queue._cursors), (0, {}))
+        self.assertEqual(len(await db.recent_matches("friend", 10)), 2)
+        self.assertEqual((await db.load_poll_state())["puuid:puuid-1"]["last_match_id"], "m2")
+
+
+if __name__ == "__main__":
+    unittest.main()
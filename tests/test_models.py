@@ -0,0 +1,51 @@
+import unittest
+
+from core.models import Match
+
+
+def _payload() -> dict:
+    return {
+        "metadata": {"matchid": "m-1", "map": "Ascent", "mode": "Competitive", "game_start": 1700000000},
+        "players": {
+            "all_players": [
+                {
+                    "puuid": "ABC",
+                    "name": "Player",
+                    "tag": "KR1",
+                    "team": "Red",
+                    "character": "Jett",
+                    "stats": {"kills": 20, "deaths": 10, "assists": "4", "headshots": 12},
+                },
+                {"puuid": "def", "name": "Other", "tag": "KR2", "team": "Blue", "stats": {}},
+            ]
+        },
+        "teams": [
+            {"team": "red", "has_won": True, "rounds_won": 13, "rounds_lost": 9},
+            {"team": "blue", "has_won": False, "rounds_won": 9, "rounds_lost": 13},
+        ],
+    }
+
+
+class MatchModelTests(unittest.TestCase):
+    def test_indexes_players_and_resolves_outcome(self) -> None:
+        match = Match.from_payload(_payload())
+
+        self.assertEqual(match.match_id, "m-1")
+        self.assertEqual(match.game_start, 1700000000)
+        me = match.player("abc")
+        self.assertIsNotNone(me)
+        self.assertEqual((me.kills, me.deaths, me.assists, me.agent), (20, 10, 4, "Jett"))
+        self.assertEqual(match.outcome(me), "win")
+        self.assertEqual(match.outcome(match.player("def")), "loss")
+
+    def test_find_player_falls_back_to_riot_id(self) -> None:
+        match = Match.from_payload(_payload())
+
+        found = match.find_player(puuid="missing", name="other", tag="kr2")
+        self.assertIsNotNone(found)
+        self.assertEqual(found.puuid, "def")
+        self.assertIs(Match.from_payload(match), match)
+
+
+if __name__ == "__main__":
+    unittest.main()
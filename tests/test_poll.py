@@ -0,0 +1,58 @@
+import unittest
+
+from core.poll import SESSION_GAP, PollSchedule
+
+# 12:00 UTC, outside the quiet hours for offset 0
+NOON = 1_700_006_400.0 - (1_700_006_400 % 86400) + 12 * 3600
+
+
+class PollScheduleTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.schedule = PollSchedule(60, 3600)
+
+    def test_active_players_poll_at_floor_and_idle_ones_back_off(self) -> None:
+        self.schedule.add("active", NOON - 600, now=NOON)
+        self.schedule.add("idle", NOON - SESSION_GAP, now=NOON)
+        self.schedule.add("gone", NOON - 90 * 86400, now=NOON)
+        self.schedule.add("unknown", None, now=NOON)
+
+        self.assertEqual(self.schedule.interval("active", NOON), 60)
+        self.assertEqual(self.schedule.interval("idle", NOON), 60)
+        self.assertEqual(self.schedule.interval("gone", NOON), 3600)
+        self.assertEqual(self.schedule.interval("unknown", NOON), 3600)
+
+        self.assertEqual(self.schedule.record("idle", now=NOON), NOON + 120)
+        self.assertEqual(self.schedule.record("idle", last_played=NOON, now=NOON), NOON + 60)
+
+    def test_empty_polls_mid_session_do_not_back_off(self) -> None:
+        self.schedule.add("a", NOON - 600, now=NOON)
+        for _ in range(10):
+            self.schedule.record("a", now=NOON)
+        self.assertEqual(self.schedule.interval("a", NOON + SESSION_GAP), 60)
+
+    def test_quiet_hours_stretch_idle_intervals(self) -> None:
+        night = NOON - 7 * 3600  # 05:00
+        self.schedule.add("a", night - SESSION_GAP, now=night)
+        self.assertEqual(self.schedule.interval("a", night), 120)
+
+        shifted = PollSchedule(60, 3600, utc_offset_hours=9)  # 14:00 local
+        shifted.add("a", night - SESSION_GAP, now=night)
+        self.assertEqual(shifted.interval("a", night), 60)
+
+    def test_pop_due_orders_keys_and_skips_superseded_entries(self) -> None:
+        self.schedule.add("a", NOON, now=NOON)
+        self.schedule.add("b", NOON, now=NOON - 10)
+        self.schedule.defer("a", NOON + 5)
+
+        self.assertEqual(self.schedule.pop_due(NOON), ["b"])
+        self.assertEqual(self.schedule.pop_due(NOON), [])
+        self.assertEqual(self.schedule.next_due(), NOON + 5)
+
+        self.schedule.discard("a")
+        self.assertEqual(self.schedule.pop_due(NOON + 10), [])
+        self.assertIsNone(self.schedule.next_due())
+        self.assertEqual(len(self.schedule), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from core.search import AliasSearchIndex, choseong
+
+
+def _record(alias: str, name: str, tag: str) -> dict:
+    return {"alias": alias, "alias_norm": alias.lower(), "name": name, "tag": tag}
+
+
+class AliasSearchIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        records = [
+            _record("jet", "Sova Main", "KR1"),
+            _record("jetpack", "Pack", "0001"),
+            _record("pajet", "Someone", "AP"),
+            _record("제트장인", "제트", "KR2"),
+            _record("친구", "Friend", "JET"),
+        ]
+        self.index = AliasSearchIndex(sorted(records, key=lambda r: r["alias"].lower()))
+
+    def _aliases(self, query: str) -> list:
+        return [r["alias"] for r in self.index.search(query, limit=25)]
+
+    def test_ranks_exact_then_prefix_then_substring(self) -> None:
+        self.assertEqual(self._aliases("JET"), ["jet", "친구", "jetpack", "pajet"])
+
+    def test_choseong_query_matches_hangul(self) -> None:
+        self.assertEqual(choseong("제트 Main"), "ㅈㅌ Main")
+        self.assertEqual(self._aliases("ㅈㅌ"), ["제트장인"])
+        self.assertEqual(self._aliases("ㅊㄱ"), ["친구"])
+
+    def test_single_character_and_empty_queries(self) -> None:
+        self.assertEqual(self._aliases("k"), ["jet", "제트장인", "jetpack"])
+        self.assertEqual(len(self.index.search("", limit=2)), 2)
+        self.assertEqual(self._aliases("zzz"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
+import json
+import sqlite3
 import tempfile
+import time
 import unittest
+from contextlib import closing
 from pathlib import Path
+from unittest import mock
 
 from core import store
 
@@ -29,6 +34,172 @@ def _sample_match(match_id: str, puuid: str) -> dict:
     }
 
 
+class MigrationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self._original_db_file = store.DB_FILE
+        store.DB_FILE = Path(self._tmpdir.name) / "bot.sqlite3"
+
+    def tearDown(self) -> None:
+        store.DB_FILE = self._original_db_file
+
+    def test_fresh_database_reaches_latest_version(self) -> None:
+        report = store.migrate()
+
+        self.assertEqual([step["version"] for step in report], [m.version for m in store.MIGRATIONS])
+        self.assertEqual(store.schema_version(), store.SCHEMA_VERSION)
+
+    def test_dry_run_leaves_live_database_untouched(self) -> None:
+        with closing(sqlite3.connect(store.DB_FILE)) as conn:
+            store._schema_v1(conn)
+            conn.commit()
+
+        report = store.migrate(dry_run=True)
+
+        self.assertEqual(report[-1]["version"], store.SCHEMA_VERSION)
+        self.assertEqual(store.stored_schema_version(), 0)
+        with closing(sqlite3.connect(store.DB_FILE)) as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+
+    def test_dry_run_does_not_create_a_missing_database(self) -> None:
+        report = store.migrate(dry_run=True)
+
+        self.assertEqual([step["version"] for step in report], [m.version for m in store.MIGRATIONS])
+        self.assertFalse(store.DB_FILE.exists())
+
+    def test_pre_versioned_database_is_upgraded_in_place(self) -> None:
+        with store._connect() as conn:
+            store._schema_v1(conn)
+            conn.execute(
+                "INSERT INTO aliases (alias, alias_norm, name, tag, region, puuid, ts) "
+                "VALUES ('Friend', 'friend', 'name', 'tag', 'ap', 'puuid-1', 0)"
+            )
+
+        store.migrate()
+
+        self.assertEqual(store.get_alias("friend")["puuid"], "puuid-1")
+        self.assertEqual(store.schema_version(), store.SCHEMA_VERSION)
+
+    def test_large_database_leaves_the_full_vacuum_to_an_offline_run(self) -> None:
+        with store._connect() as conn:
+            store._schema_v1(conn)
+
+        with mock.patch.object(store, "_STARTUP_VACUUM_MAX_BYTES", 0):
+            store.migrate()
+        self.assertEqual(store.database_size()["auto_vacuum"], 0)
+
+        self.assertTrue(store.enable_incremental_vacuum())
+        self.assertFalse(store.enable_incremental_vacuum())
+        with store._connect() as conn:
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+    def test_summary_migration_backfills_in_chunks(self) -> None:
+        store.migrate()
+        matches = [_sample_match(f"c{i}", "test-puuid") for i in range(5)]
+        for i, match in enumerate(matches):
+            match["metadata"].update({"mode": "Competitive", "game_start": 1_700_000_000 + i * 86400})
+        store.store_match_batch("alias:test", "test-puuid", matches)
+        with store._connect() as conn:
+            conn.execute("DELETE FROM daily_summary")
+            conn.execute("PRAGMA user_version = 8")
+
+        report = store.migrate(chunk_size=2)
+
+        step = next(r for r in report if r["version"] == 9)
+        self.assertEqual((step["rows"], step["chunks"]), (5, 3))
+        with store._connect() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM daily_summary").fetchone()[0], 5)
+            self.assertIsNone(conn.execute("SELECT 1 FROM meta WHERE key = 'summary_backfill_rowid'").fetchone())
+
+
+class AliasRegistryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self._original_db_file = store.DB_FILE
+        store.DB_FILE = Path(self._tmpdir.name) / "bot.sqlite3"
+        store._ensure_schema()
+        store.alias_registry.refresh()
+
+    def tearDown(self) -> None:
+        store.DB_FILE = self._original_db_file
+
+    def test_writes_go_through_to_memory(self) -> None:
+        store.upsert_alias("Bravo", "b", "KR1", "ap", "P-1")
+        store.upsert_alias("alpha", "a", "KR2", "ap", "p-1")
+        version = store.alias_registry.version
+
+        self.assertFalse(store.alias_registry.needs_refresh())
+        self.assertEqual(store.get_alias(" BRAVO ")["tag"], "KR1")
+        self.assertEqual([r["alias"] for r in store.list_aliases()], ["alpha", "Bravo"])
+        self.assertEqual(len(store.aliases_for_puuid("p-1")), 2)
+        self.assertEqual([r["alias"] for r in store.search_aliases("kr2")], ["alpha"])
+
+        self.assertTrue(store.remove_alias("alpha"))
+        self.assertIsNone(store.get_alias("alpha"))
+        self.assertEqual(store.alias_registry.version, version + 1)
+
+    def test_search_sees_writes_before_the_index_is_rebuilt(self) -> None:
+        registry = store.alias_registry
+        store.upsert_alias("jet", "Sova", "KR1", "ap", "p-1")
+        with registry._lock:
+            # hold the background rebuild off so the overlay answers
+            store.upsert_alias("jetpack", "Pack", "KR2", "ap", "p-2")
+            store.upsert_alias("jet", "Sova", "AP", "ap", "p-1")
+            self.assertEqual([r["alias"] for r in store.search_aliases("jet")], ["jet", "jetpack"])
+            self.assertEqual([r["alias"] for r in store.search_aliases("kr")], ["jetpack"])
+            store.remove_alias("jetpack")
+            self.assertEqual([r["alias"] for r in store.search_aliases("jet")], ["jet"])
+
+        for _ in range(200):
+            if not registry._reindexing:
+                break
+            time.sleep(0.01)
+        self.assertEqual(registry._unindexed, {})
+        self.assertEqual([r["alias"] for r in registry._search.search("", 25)], ["jet"])
+        self.assertEqual([r["tag"] for r in store.search_aliases("jet")], ["AP"])
+
+    def test_reloads_after_another_writer(self) -> None:
+        store.upsert_alias("Bravo", "b", "KR1", "ap", "p-1")
+        other = sqlite3.connect(store.DB_FILE)
+        with other:
+            other.execute("UPDATE aliases SET tag = 'NEW' WHERE alias_norm = 'bravo'")
+        other.close()
+
+        self.assertEqual(store.get_alias("bravo")["tag"], "KR1")  # within the refresh interval
+        store.alias_registry._checked_at = 0.0
+        self.assertEqual(store.get_alias("bravo")["tag"], "NEW")
+
+
+class AlertRouteTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self._original_db_file = store.DB_FILE
+        store.DB_FILE = Path(self._tmpdir.name) / "bot.sqlite3"
+        store._ensure_schema()
+
+    def tearDown(self) -> None:
+        store.DB_FILE = self._original_db_file
+
+    def test_routes_are_served_from_memory_and_written_through(self) -> None:
+        store.set_alert_channel(2, 20)
+        self.assertEqual([r["channel_id"] for r in store.list_alert_channels()], [20])
+        self.assertFalse(store.alert_routes.needs_load())
+
+        with store._connect() as conn:
+            conn.execute("INSERT INTO alert_channels (guild_id, channel_id, ts) VALUES (9, 90, 0)")
+        store.set_alert_channel(1, 10)
+        store.set_alert_channel(2, 21)
+        store.remove_alert_channel(1)
+
+        # the out-of-band row isn't seen; everything written through the store is
+        self.assertEqual([(r["guild_id"], r["channel_id"]) for r in store.list_alert_channels()], [(2, 21)])
+        self.assertIsNone(store.get_alert_channel(1))
+        self.assertEqual(store.get_alert_channel(2), 21)
+
+
 class StoreMatchBatchTests(unittest.TestCase):
     def setUp(self) -> None:
         self._tmpdir = tempfile.TemporaryDirectory()
@@ -88,6 +259,190 @@ class StoreMatchBatchTests(unittest.TestCase):
         self.assertIsNotNone(latest)
         self.assertEqual(latest["result"], "win")
 
+    def test_owners_share_one_compressed_payload(self) -> None:
+        match = _sample_match("match-4", "test-puuid")
+        store.store_match_batch("alias:a", "test-puuid", [match])
+        store.store_match_batch("alias:b", "test-puuid", [match])
+
+        stats = store.match_storage_stats()
+        self.assertEqual((stats["rows"], stats["blobs"]), (2, 1))
+        self.assertEqual(store.recent_matches("alias:b", 5), [match])
+
+    def test_migrates_legacy_raw_json(self) -> None:
+        match = _sample_match("match-5", "test-puuid")
+        with store._connect() as conn:
+            conn.execute("PRAGMA user_version = 2")
+            for owner in ("alias:a", "alias:b"):
+                conn.execute(
+                    "INSERT INTO match_cache (match_id, owner_key, puuid, raw_json, ts) VALUES (?, ?, ?, ?, 0)",
+                    ("match-5", owner, "test-puuid", json.dumps(match)),
+                )
+
+        report = {step["version"]: step for step in store.migrate(chunk_size=1)}
+
+        self.assertEqual((report[3]["rows"], report[3]["chunks"]), (2, 2))
+        self.assertGreater(report[3]["saved_bytes"], 0)
+        self.assertEqual(report[4]["rows"], 1)
+        self.assertEqual(store.recent_matches("alias:a", 5), [match])
+        self.assertEqual(store.migrate(), [])
+
+    def test_normalizes_players_for_sql_aggregates(self) -> None:
+        match = _sample_match("match-6", "test-puuid")
+        match["players"]["all_players"][0]["character"] = "Jett"
+        match["players"]["all_players"].append(
+            {"puuid": "other-puuid", "team": "Blue", "character": "Sage", "stats": {"kills": 3}}
+        )
+        store.store_match_batch("alias:test", "test-puuid", [match])
+
+        with store._connect() as conn:
+            players = conn.execute(
+                """
+                SELECT p.puuid, p.agent, p.kills, t.won
+                FROM match_players p
+                LEFT JOIN match_teams t ON t.match_id = p.match_id AND t.team = p.team
+                WHERE p.match_id = 'match-6'
+                ORDER BY p.puuid
+                """
+            ).fetchall()
+        self.assertEqual(
+            [tuple(row) for row in players],
+            [("other-puuid", "Sage", 3, 0), ("test-puuid", "Jett", 10, 1)],
+        )
+
+    def test_millisecond_game_start_is_stored_without_a_daily_rollup(self) -> None:
+        match = _sample_match("match-ms", "test-puuid")
+        match["metadata"].update({"game_start": 1_700_000_000_000, "mode": "Competitive"})
+
+        self.assertEqual(store.store_match_batch("alias:test", "test-puuid", [match]), 1)
+        with store._connect() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM daily_summary").fetchone()[0], 0)
+
+    def test_latest_and_since_use_game_start_epoch(self) -> None:
+        older = _sample_match("match-old", "test-puuid")
+        older["metadata"].update({"game_start": 1_700_000_000, "game_start_patched": "Tuesday, January 9"})
+        newer = _sample_match("match-new", "test-puuid")
+        newer["metadata"].update({"game_start": 1_700_090_000, "game_start_patched": "Monday, January 10"})
+        store.store_match_batch("alias:test", "test-puuid", [older, newer])
+
+        self.assertEqual(store.latest_match("alias:test")["match_id"], "match-new")
+        recent = store.recent_matches("alias:test", 5, since=1_700_050_000)
+        self.assertEqual([m["metadata"]["matchid"] for m in recent], ["match-new"])
+
+        with store._connect() as conn:
+            conn.execute("UPDATE match_cache SET played_at_epoch = NULL")
+            plan = " ".join(
+                row["detail"]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT match_id FROM match_cache "
+                    "WHERE owner_key = ? ORDER BY played_at_epoch DESC, ts DESC LIMIT 1",
+                    ("alias:test",),
+                )
+            )
+            conn.execute("PRAGMA user_version = 4")
+        self.assertIn("idx_match_cache_owner_epoch", plan)
+        self.assertEqual(store.migrate()[0]["rows"], 2)
+        self.assertEqual(store.latest_match("alias:test")["played_at_epoch"], 1_700_090_000)
+
+    def test_retention_prunes_payloads_before_stat_rows(self) -> None:
+        old = _sample_match("match-old", "test-puuid")
+        old["metadata"]["game_start"] = 1_000
+        new = _sample_match("match-new", "test-puuid")
+        new["metadata"]["game_start"] = 5_000
+        store.store_match_batch("alias:test", "test-puuid", [old, new])
+
+        self.assertEqual(store.prune_match_payloads(2_000, limit=10), 1)
+        self.assertEqual(store.prune_match_payloads(2_000, limit=10), 0)
+        self.assertEqual(len(store.recent_matches("alias:test", 10)), 1)
+        self.assertEqual(store.latest_match("alias:test")["match_id"], "match-new")
+
+        self.assertEqual(store.prune_match_rows(2_000, limit=10), 2)  # match_cache + matches
+        with store._connect() as conn:
+            players = conn.execute("SELECT COUNT(*) FROM match_players WHERE match_id = 'match-old'").fetchone()[0]
+        self.assertEqual(players, 0)
+
+    def test_database_uses_incremental_vacuum(self) -> None:
+        with store._connect() as conn:
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        store.store_match_batch(
+            "alias:test", "test-puuid", [_sample_match(f"m{i}", "test-puuid") for i in range(200)]
+        )
+        while store.prune_oldest_matches(limit=100):
+            pass
+
+        self.assertGreater(store.database_size()["free_pages"], 0)
+        self.assertGreater(store.incremental_vacuum(1000), 0)
+        self.assertEqual(store.database_size()["free_pages"], 0)
+
+    def test_ingest_updates_only_affected_summaries(self) -> None:
+        def competitive(match_id: str, game_start: int) -> dict:
+            match = _sample_match(match_id, "test-puuid")
+            match["metadata"].update({"mode": "Competitive", "game_start": game_start, "season_id": "act-1"})
+            return match
+
+        day_one = 1_700_000_000  # 2023-11-15 07:13 KST
+        store.store_match_batch("alias:test", "test-puuid", [competitive("c1", day_one)])
+        store.store_match_batch(
+            "alias:test", "test-puuid", [competitive("c2", day_one + 60), competitive("c3", day_one + 86400)]
+        )
+        store.store_match_batch("alias:test", "test-puuid", [_sample_match("u1", "test-puuid")])
+
+        def daily_rows() -> dict:
+            with store._connect() as conn:
+                rows = conn.execute("SELECT * FROM daily_summary WHERE owner_key = 'alias:test'").fetchall()
+            return {r["summary_date"]: dict(r) for r in rows}
+
+        daily = daily_rows()
+        self.assertEqual(sorted(daily), ["2023-11-15", "2023-11-16"])
+        self.assertEqual((daily["2023-11-15"]["matches"], daily["2023-11-15"]["wins"]), (2, 2))
+        self.assertEqual(daily["2023-11-15"]["alias_norm"], "test")
+        self.assertNotIn("rr_delta", daily["2023-11-15"])
+        with store._connect() as conn:
+            act = conn.execute("SELECT matches, kills FROM act_summary WHERE act_id = 'act-1'").fetchone()
+        self.assertEqual(tuple(act), (3, 30))
+
+        with mock.patch.object(store.time, "time", return_value=day_one + 3600):
+            totals = store.fetch_summary_totals("alias:test", "act-1")
+        self.assertEqual((totals["today"]["matches"], totals["today"]["wins"]), (2, 2))
+        self.assertEqual(totals["act"]["matches"], 3)
+        self.assertEqual(store.fetch_summary_totals("alias:test"), {"today": None, "act": None})
+
+        with store._connect() as conn:
+            conn.execute("DELETE FROM daily_summary")
+        # the SQL rebuild cuts days at the same offset as ingestion
+        self.assertEqual(store.rebuild_summaries(), {"daily": 2, "acts": 1})
+        self.assertEqual(daily_rows(), {date: dict(row, ts=mock.ANY) for date, row in daily.items()})
+
+    def test_poll_cursors_are_written_with_matches_and_pruned_with_aliases(self) -> None:
+        store.upsert_alias("Friend", "name", "tag", "ap", "PUUID-1")
+        cursor = ("puuid:puuid-1", "match-1", 1_700_000_000, 0, 1_700_000_100, 1_700_000_220)
+        store.ingest_match_batches([("alias:friend", "PUUID-1", [_sample_match("match-1", "PUUID-1")])], [cursor])
+        self.assertEqual(store.load_poll_state()["puuid:puuid-1"]["last_match_id"], "match-1")
+
+        # cursors without rows still flush; missing fields keep their stored values
+        store.ingest_match_batches([], [("puuid:puuid-1", None, None, 2, None, 1_700_000_600)])
+        saved = store.load_poll_state()["puuid:puuid-1"]
+        self.assertEqual((saved["last_match_id"], saved["misses"], saved["last_polled_at"]), ("match-1", 2, 1_700_000_100))
+
+        store.remove_alias("friend")
+        self.assertEqual(store.load_poll_state(), {})
+
+    def test_poll_state_migration_seeds_cursors_from_stored_matches(self) -> None:
+        store.upsert_alias("Friend", "name", "tag", "ap", "PUUID-1")
+        store.upsert_alias("Alt", "name", "tag", "ap", "puuid-1")
+        store.upsert_alias("Quiet", "other", "tag", "ap", "")
+        old, new = _sample_match("old", "puuid-1"), _sample_match("new", "puuid-1")
+        old["metadata"]["game_start"], new["metadata"]["game_start"] = 100, 200
+        store.store_match_batch("alias:friend", "puuid-1", [old])
+        store.store_match_batch("alias:alt", "puuid-1", [new])
+
+        with store._connect() as conn:
+            conn.execute("DROP TABLE poll_state")
+            store._schema_v10_poll_state(conn)
+
+        state = store.load_poll_state()
+        self.assertEqual(list(state), ["puuid:puuid-1"])
+        self.assertEqual((state["puuid:puuid-1"]["last_match_id"], state["puuid:puuid-1"]["last_played_at"]), ("new", 200))
+
 
 if __name__ == "__main__":
     unittest.main()
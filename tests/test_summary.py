@@ -0,0 +1,42 @@
+import unittest
+from unittest import mock
+
+from cogs import summary
+from cogs.summary import SummaryCog
+from core.models import Match
+
+
+def _payload(match_id: str) -> dict:
+    return {"metadata": {"matchid": match_id}, "players": {"all_players": []}}
+
+
+class FetchDeltaTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.cog = SummaryCog(bot=None)
+        self.cached = [Match.from_payload(_payload(f"c{i}")) for i in range(10)]
+
+    async def _delta(self, history: list) -> tuple:
+        async def fetch(region, name, tag, *, mode, size):
+            return {"data": history[:size]}
+
+        fetch_matches = mock.AsyncMock(side_effect=fetch)
+        with mock.patch.object(summary, "fetch_matches", fetch_matches):
+            payloads, fresh = await self.cog._fetch_delta("ap", "n", "t", self.cached, 10)
+        return [p["metadata"]["matchid"] for p in payloads], [c.kwargs["size"] for c in fetch_matches.await_args_list]
+
+    async def test_unchanged_history_costs_one_probe(self) -> None:
+        history = [_payload(f"c{i}") for i in range(10)]
+        self.assertEqual(await self._delta(history), (["c0"], [1]))
+
+    async def test_one_new_match_fetches_a_page_of_two(self) -> None:
+        history = [_payload("new"), *(_payload(f"c{i}") for i in range(9))]
+        self.assertEqual(await self._delta(history), (["new", "c0"], [1, 2]))
+
+    async def test_pages_stop_at_count(self) -> None:
+        history = [_payload(f"n{i}") for i in range(10)]
+        ids, sizes = await self._delta(history)
+        self.assertEqual((len(ids), sizes), (10, [1, 2, 10]))
+
+
+if __name__ == "__main__":
+    unittest.main()